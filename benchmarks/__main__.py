@@ -0,0 +1,141 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Run the benchmark suite from the command line.
+
+Example of usage:
+
+    python -m benchmarks run --output baseline.json
+    python -m benchmarks run --output current.json --compare baseline.json
+    python -m benchmarks compare baseline.json current.json --threshold 0.1
+
+The 'compare' command, and 'run' with '--compare', exit with status 1 if a
+benchmark regressed beyond the threshold.
+"""
+import argparse
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Dict
+
+from benchmarks.suite import (
+    DEFAULT_GRID_SIZES,
+    DEFAULT_THRESHOLD,
+    ENV_CLASSES,
+    Metric,
+    compare_results,
+    format_comparisons,
+    format_results,
+    load_results,
+    make_cases,
+    run_suite,
+    save_results,
+)
+
+
+def _grid_size(value: str) -> tuple:
+    """Parse a grid size in the format COLSxROWS."""
+    cols, rows = value.lower().split("x")
+    return int(cols), int(rows)
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse arguments."""
+    parser = ArgumentParser(prog="python -m benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmark suite.")
+    run_parser.add_argument(
+        "--env",
+        choices=[env_cls.__name__ for env_cls in ENV_CLASSES],
+        action="append",
+        help="Environment class to benchmark (repeatable). Default: all.",
+    )
+    run_parser.add_argument(
+        "--grid",
+        type=_grid_size,
+        action="append",
+        help="Grid size COLSxROWS (repeatable). Default: "
+        + ", ".join(f"{cols}x{rows}" for cols, rows in DEFAULT_GRID_SIZES),
+    )
+    run_parser.add_argument("--steps", type=int, default=2000, help="Steps per run.")
+    run_parser.add_argument("--resets", type=int, default=200, help="Resets per run.")
+    run_parser.add_argument("--frames", type=int, default=200, help="Renders per run.")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Runs per metric.")
+    run_parser.add_argument(
+        "--viewer", action="store_true", help="Also benchmark the Pygame viewer."
+    )
+    run_parser.add_argument("--output", type=Path, help="Save the results as JSON.")
+    run_parser.add_argument("--compare", type=Path, help="Baseline to compare with.")
+    run_parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD, help="Tolerance."
+    )
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two saved results.")
+    compare_parser.add_argument("baseline", type=Path, help="The baseline results.")
+    compare_parser.add_argument("current", type=Path, help="The new results.")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD, help="Tolerance."
+    )
+
+    return parser.parse_args()
+
+
+def _compare(
+    baseline: Dict[str, Metric], current: Dict[str, Metric], threshold: float
+) -> int:
+    """Print the comparison with the baseline, and return the exit status."""
+    comparisons = compare_results(baseline, current, threshold)
+    print(format_comparisons(comparisons))
+    regressions = [comparison for comparison in comparisons if comparison.is_regression]
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}.")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    """Run the command line interface."""
+    args = parse_arguments()
+    if args.command == "compare":
+        return _compare(
+            load_results(args.baseline), load_results(args.current), args.threshold
+        )
+
+    env_classes = [
+        env_cls
+        for env_cls in ENV_CLASSES
+        if args.env is None or env_cls.__name__ in args.env
+    ]
+    cases = make_cases(env_classes, args.grid or DEFAULT_GRID_SIZES)
+    results = run_suite(
+        cases, args.steps, args.resets, args.frames, args.repeat, args.viewer
+    )
+    print(format_results(results))
+    if args.output is not None:
+        save_results(results, args.output)
+    if args.compare is not None:
+        return _compare(load_results(args.compare), results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+The benchmark suite, as pytest-benchmark tests.
+
+Run it with:
+
+    pytest benchmarks/bench_envs.py --benchmark-autosave
+    pytest benchmarks/bench_envs.py --benchmark-compare --benchmark-compare-fail=mean:10%
+
+The file name does not match the test file pattern, so that the benchmarks are
+not collected together with the unit tests.
+"""
+import os
+
+import pytest
+
+from benchmarks.suite import (
+    ENV_CLASSES,
+    SEED,
+    BenchmarkCase,
+    make_cases,
+    random_actions,
+    run_steps,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+NB_STEPS = 1000
+CASES = make_cases()
+# the rendering does not depend on the observation type nor on the game options
+RENDER_CASES = [
+    case
+    for case in make_cases(ENV_CLASSES[:1])
+    if not case.config.fire_enabled and not case.config.complex_bump
+]
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_step(benchmark, case: BenchmarkCase) -> None:
+    """Benchmark a sequence of steps with random actions."""
+    env = case.make_env()
+    actions = random_actions(env, NB_STEPS)
+
+    def _setup():
+        env.reset(seed=SEED)
+
+    _, nb_frames = benchmark.pedantic(
+        run_steps, args=(env, actions), setup=_setup, rounds=5
+    )
+    benchmark.extra_info["nb_steps"] = NB_STEPS
+    benchmark.extra_info["frames_per_step"] = nb_frames / NB_STEPS
+    env.close()
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_reset(benchmark, case: BenchmarkCase) -> None:
+    """Benchmark the reset of the environment."""
+    env = case.make_env()
+    env.reset(seed=SEED)
+    benchmark(env.reset)
+    env.close()
+
+
+@pytest.mark.parametrize("case", RENDER_CASES, ids=lambda case: case.name)
+def test_render(benchmark, case: BenchmarkCase) -> None:
+    """Benchmark the rendering of a frame to a NumPy array."""
+    env = case.make_env()
+    env.reset(seed=SEED)
+    run_steps(env, random_actions(env, 10))
+    benchmark(env.render, "rgb_array")
+    env.close()
+
+
+@pytest.mark.parametrize("label_cache_size", [0, 256], ids=["uncached", "cached"])
+def test_viewer(benchmark, label_cache_size: int) -> None:
+    """Benchmark a frame of the Pygame viewer, with and without the label cache."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    # pylint: disable-next=import-outside-toplevel
+    from gym_breakout_pygame.viewer import PygameViewer
+
+    env = RENDER_CASES[0].make_env()
+    env.reset(seed=SEED)
+    env.viewer = PygameViewer(env.state, label_cache_size=label_cache_size)
+    env.render()
+    actions = iter(random_actions(env, 100000))
+
+    def _setup():
+        _, _, done, _ = env.step(next(actions))
+        if done:
+            env.reset()
+
+    benchmark.pedantic(env.render, setup=_setup, rounds=1000)
+    env.close()
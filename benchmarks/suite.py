@@ -0,0 +1,410 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+The benchmark suite of the Breakout environments.
+
+The suite measures, for each environment class and game configuration:
+
+- the throughput of 'step', in environment steps per second, with a fixed
+  sequence of random actions (the episodes are reset when they end);
+- the latency of 'reset';
+- the number of frames simulated per environment step, i.e. the number of
+  iterations of the inner loop of the skipper;
+
+and the cost of 'render("rgb_array")' for each grid size. Optionally, it also
+measures the cost of a frame of the Pygame viewer, with and without the cache
+of the rendered labels.
+
+The results are a flat mapping from the benchmark names to their metrics, that
+can be saved as a JSON baseline and compared with later runs.
+"""
+import dataclasses
+import json
+import os
+import platform
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, cast
+
+import numpy as np
+from gym.spaces import Discrete
+
+from gym_breakout_pygame import rollouts
+from gym_breakout_pygame.breakout_env import Breakout, BreakoutConfiguration
+
+ENV_CLASSES: Tuple[Type[Breakout], ...] = tuple(rollouts.ENV_CLASSES.values())
+DEFAULT_GRID_SIZES: Tuple[Tuple[int, int], ...] = ((3, 3), (6, 4), (12, 6))
+DEFAULT_THRESHOLD = 0.1
+SEED = 0
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkCase:
+    """An environment class with a game configuration to benchmark."""
+
+    env_cls: Type[Breakout]
+    config: BreakoutConfiguration
+
+    @property
+    def name(self) -> str:
+        """Get the name of the case, used as suffix of the benchmark names."""
+        config = self.config
+        return (
+            f"{self.env_cls.__name__}/{config.brick_cols}x{config.brick_rows}"
+            f"/fire={int(config.fire_enabled)}/complex_bump={int(config.complex_bump)}"
+        )
+
+    def make_env(self) -> Breakout:
+        """Instantiate the environment of the case."""
+        return self.env_cls(self.config)
+
+
+@dataclasses.dataclass(frozen=True)
+class Metric:
+    """The measured value of a benchmark."""
+
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+@dataclasses.dataclass(frozen=True)
+class Comparison:
+    """The comparison of a benchmark between a baseline and a new run."""
+
+    name: str
+    baseline: float
+    current: float
+    unit: str
+    change: float
+    is_regression: bool
+
+
+def make_cases(
+    env_classes: Iterable[Type[Breakout]] = ENV_CLASSES,
+    grid_sizes: Iterable[Tuple[int, int]] = DEFAULT_GRID_SIZES,
+) -> List[BenchmarkCase]:
+    """
+    Make the benchmark cases, for every combination of the game options.
+
+    :param env_classes: the environment classes.
+    :param grid_sizes: the (columns, rows) sizes of the brick grid.
+    :return: the list of benchmark cases.
+    """
+    return [
+        BenchmarkCase(
+            env_cls,
+            BreakoutConfiguration(
+                brick_cols=cols,
+                brick_rows=rows,
+                fire_enabled=fire_enabled,
+                complex_bump=complex_bump,
+            ),
+        )
+        for env_cls in env_classes
+        for cols, rows in grid_sizes
+        for fire_enabled in (False, True)
+        for complex_bump in (False, True)
+    ]
+
+
+def random_actions(env: Breakout, nb_steps: int, seed: int = SEED) -> List[int]:
+    """
+    Get a fixed sequence of random actions, drawn before the measurements.
+
+    :param env: the environment.
+    :param nb_steps: the number of actions.
+    :param seed: the random seed.
+    :return: the list of actions.
+    """
+    rng = np.random.default_rng(seed)
+    nb_actions = cast(Discrete, env.action_space).n
+    return rng.integers(0, nb_actions, size=nb_steps).tolist()
+
+
+def run_steps(env: Breakout, actions: Sequence[int]) -> Tuple[int, int]:
+    """
+    Play a sequence of actions, resetting the environment when an episode ends.
+
+    :param env: the environment, already reset.
+    :param actions: the actions to play.
+    :return: the number of episodes ended and the number of simulated frames.
+    """
+    nb_episodes = 0
+    nb_frames = 0
+    for action in actions:
+        _, _, done, _ = env.step(action)
+        if done:
+            nb_episodes += 1
+            nb_frames += int(env.get_state()["steps"])
+            env.reset()
+    nb_frames += int(env.get_state()["steps"])
+    return nb_episodes, nb_frames
+
+
+def measure_steps(
+    case: BenchmarkCase, nb_steps: int, repeat: int
+) -> Tuple[float, float]:
+    """
+    Measure the step throughput and the simulated frames per step of a case.
+
+    :param case: the benchmark case.
+    :param nb_steps: the number of steps of each run.
+    :param repeat: the number of runs; the fastest run is kept.
+    :return: the steps per second, and the frames per step.
+    """
+    env = case.make_env()
+    actions = random_actions(env, nb_steps)
+    best_time = float("inf")
+    nb_frames = 0
+    for _ in range(repeat):
+        env.reset(seed=SEED)
+        start = time.perf_counter()
+        _, nb_frames = run_steps(env, actions)
+        best_time = min(best_time, time.perf_counter() - start)
+    env.close()
+    return nb_steps / best_time, nb_frames / nb_steps
+
+
+def measure_reset(case: BenchmarkCase, nb_resets: int, repeat: int) -> float:
+    """
+    Measure the latency of 'reset'.
+
+    :param case: the benchmark case.
+    :param nb_resets: the number of resets of each run.
+    :param repeat: the number of runs; the fastest run is kept.
+    :return: the mean latency, in microseconds.
+    """
+    env = case.make_env()
+    env.reset(seed=SEED)
+    best_time = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(nb_resets):
+            env.reset()
+        best_time = min(best_time, time.perf_counter() - start)
+    env.close()
+    return best_time / nb_resets * 1e6
+
+
+def measure_render(case: BenchmarkCase, nb_frames: int, repeat: int) -> float:
+    """
+    Measure the cost of 'render("rgb_array")'.
+
+    :param case: the benchmark case.
+    :param nb_frames: the number of frames rendered in each run.
+    :param repeat: the number of runs; the fastest run is kept.
+    :return: the mean cost of a frame, in microseconds.
+    """
+    env = case.make_env()
+    env.reset(seed=SEED)
+    run_steps(env, random_actions(env, 10))
+    best_time = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(nb_frames):
+            env.render("rgb_array")
+        best_time = min(best_time, time.perf_counter() - start)
+    env.close()
+    return best_time / nb_frames * 1e6
+
+
+def measure_viewer(
+    case: BenchmarkCase, nb_frames: int, repeat: int, label_cache_size: int
+) -> float:
+    """
+    Measure the cost of a frame of the Pygame viewer, in "human" mode.
+
+    The game advances by one step between two frames, as when watching an agent.
+    Unless set, the SDL video driver is set to "dummy", so no window is opened.
+
+    :param case: the benchmark case.
+    :param nb_frames: the number of frames rendered in each run.
+    :param repeat: the number of runs; the fastest run is kept.
+    :param label_cache_size: the size of the cache of the labels; 0 to disable it.
+    :return: the mean cost of a frame, in microseconds.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    # pylint: disable-next=import-outside-toplevel
+    from gym_breakout_pygame.viewer import PygameViewer
+
+    env = case.make_env()
+    env.reset(seed=SEED)
+    env.viewer = PygameViewer(env.state, label_cache_size=label_cache_size)
+    actions = random_actions(env, nb_frames)
+    best_time = float("inf")
+    for _ in range(repeat):
+        env.reset(seed=SEED)
+        env.render()
+        elapsed = 0.0
+        for action in actions:
+            _, _, done, _ = env.step(action)
+            if done:
+                env.reset()
+            start = time.perf_counter()
+            env.render()
+            elapsed += time.perf_counter() - start
+        best_time = min(best_time, elapsed)
+    env.close()
+    return best_time / nb_frames * 1e6
+
+
+def run_suite(  # pylint: disable=too-many-arguments
+    cases: Optional[Sequence[BenchmarkCase]] = None,
+    nb_steps: int = 2000,
+    nb_resets: int = 200,
+    nb_frames: int = 200,
+    repeat: int = 3,
+    viewer: bool = False,
+) -> Dict[str, Metric]:
+    """
+    Run the benchmark suite.
+
+    :param cases: the benchmark cases; by default, the ones of 'make_cases'.
+    :param nb_steps: the number of steps of each step run.
+    :param nb_resets: the number of resets of each reset run.
+    :param nb_frames: the number of frames of each render run.
+    :param repeat: the number of runs of each measurement.
+    :param viewer: whether to measure the Pygame viewer too.
+    :return: the metrics, by benchmark name.
+    """
+    cases = make_cases() if cases is None else cases
+    results: Dict[str, Metric] = {}
+    rendered_grids = set()
+    for case in cases:
+        steps_per_second, frames_per_step = measure_steps(case, nb_steps, repeat)
+        results[f"step/{case.name}"] = Metric(steps_per_second, "steps/s", True)
+        results[f"skipper/{case.name}"] = Metric(frames_per_step, "frames/step", False)
+        results[f"reset/{case.name}"] = Metric(
+            measure_reset(case, nb_resets, repeat), "us", False
+        )
+        grid = (case.config.brick_cols, case.config.brick_rows)
+        if grid not in rendered_grids:
+            rendered_grids.add(grid)
+            results[f"render/{grid[0]}x{grid[1]}"] = Metric(
+                measure_render(case, nb_frames, repeat), "us", False
+            )
+            if viewer:
+                for labels, cache_size in [("uncached", 0), ("cached", 256)]:
+                    results[f"viewer/{grid[0]}x{grid[1]}/labels={labels}"] = Metric(
+                        measure_viewer(case, nb_frames, repeat, cache_size),
+                        "us",
+                        False,
+                    )
+    return results
+
+
+def save_results(results: Dict[str, Metric], path: Path) -> None:
+    """
+    Save the results of the suite as a JSON baseline.
+
+    :param results: the metrics, by benchmark name.
+    :param path: the path of the JSON file.
+    """
+    content = {
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": {
+            name: dataclasses.asdict(metric) for name, metric in results.items()
+        },
+    }
+    path.write_text(json.dumps(content, indent=2))
+
+
+def load_results(path: Path) -> Dict[str, Metric]:
+    """
+    Load the results of the suite from a JSON baseline.
+
+    :param path: the path of the JSON file.
+    :return: the metrics, by benchmark name.
+    """
+    content: Dict[str, Any] = json.loads(path.read_text())
+    return {name: Metric(**metric) for name, metric in content["results"].items()}
+
+
+def compare_results(
+    baseline: Dict[str, Metric],
+    current: Dict[str, Metric],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Comparison]:
+    """
+    Compare the results of a run with a baseline.
+
+    A benchmark regresses if its metric gets worse by more than the threshold,
+    relative to the baseline. Only the benchmarks in both results are compared.
+
+    :param baseline: the metrics of the baseline.
+    :param current: the metrics of the new run.
+    :param threshold: the tolerated relative change, e.g. 0.1 for 10%.
+    :return: the comparisons, in the order of the baseline.
+    """
+    comparisons = []
+    for name, old in baseline.items():
+        new = current.get(name)
+        if new is None:
+            continue
+        change = (new.value - old.value) / old.value if old.value != 0 else 0.0
+        worsening = -change if old.higher_is_better else change
+        comparisons.append(
+            Comparison(
+                name, old.value, new.value, old.unit, change, worsening > threshold
+            )
+        )
+    return comparisons
+
+
+def format_results(results: Dict[str, Metric]) -> str:
+    """
+    Format the results of the suite as a table.
+
+    :param results: the metrics, by benchmark name.
+    :return: the table.
+    """
+    width = max((len(name) for name in results), default=0)
+    return "\n".join(
+        f"{name:<{width}}  {metric.value:>12.2f} {metric.unit}"
+        for name, metric in results.items()
+    )
+
+
+def format_comparisons(comparisons: Sequence[Comparison]) -> str:
+    """
+    Format the comparisons with a baseline as a table.
+
+    :param comparisons: the comparisons.
+    :return: the table, with the regressions marked.
+    """
+    width = max((len(comparison.name) for comparison in comparisons), default=0)
+    return "\n".join(
+        f"{comparison.name:<{width}}  {comparison.baseline:>12.2f}"
+        f" -> {comparison.current:>12.2f} {comparison.unit:<11}"
+        f" {comparison.change:>+8.1%}"
+        + ("  REGRESSION" if comparison.is_regression else "")
+        for comparison in comparisons
+    )
@@ -20,3 +20,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 #
+
+"""Gym environments of the Breakout game, implemented with Pygame."""
+from gym_breakout_pygame.registration import register_envs
+
+register_envs()
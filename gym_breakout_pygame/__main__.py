@@ -26,17 +26,34 @@
 
 Example of usage:
 
-    python3 gym_breakout_pygame --rows 3 --columns 3 --fire --record
+    python3 gym_breakout_pygame --rows 3 --columns 3 --fire --record --format gif
+
+Or measure the environment headless, with random rollouts in parallel:
+
+    python3 -m gym_breakout_pygame --benchmark --episodes 100 --workers 4 --env dict
 
 """
 import argparse
+import json
 import time
 from argparse import ArgumentParser
 from datetime import datetime
+from pathlib import Path
+from typing import Union
 
-from gym.wrappers.monitoring.video_recorder import VideoRecorder
-
-from gym_breakout_pygame.breakout_env import Breakout, BreakoutConfiguration
+from gym_breakout_pygame.breakout_env import (
+    Breakout,
+    BreakoutConfiguration,
+    play_with_keyboard,
+)
+from gym_breakout_pygame.recording import (
+    FrameRecorder,
+    FrameWriter,
+    ImageioFrameWriter,
+    PngFrameWriter,
+    RawFrameWriter,
+)
+from gym_breakout_pygame.rollouts import ENV_CLASSES, benchmark_rollouts
 from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
 
 
@@ -48,6 +65,12 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--fire", action="store_true", help="Enable fire.")
     parser.add_argument("--disable-ball", action="store_true", help="Disable the ball.")
     parser.add_argument("--record", action="store_true", help="Record a video.")
+    parser.add_argument(
+        "--format",
+        choices=["raw", "png", "gif", "mp4"],
+        default="raw",
+        help="Format of the recording; 'gif' and 'mp4' require imageio.",
+    )
     parser.add_argument(
         "--output-dir",
         type=str,
@@ -55,19 +78,61 @@ def parse_arguments() -> argparse.Namespace:
         help="Video directory.",
     )
     parser.add_argument("--random", action="store_true", help="Play randomly")
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Measure random rollouts without a display, instead of playing.",
+    )
+    parser.add_argument(
+        "--episodes", type=int, default=100, help="Number of benchmark episodes."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of benchmark processes; 0 for one per CPU.",
+    )
+    parser.add_argument(
+        "--env",
+        choices=sorted(ENV_CLASSES),
+        default="multidiscrete",
+        help="Environment of the benchmark.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the benchmark.")
+    parser.add_argument(
+        "--json", action="store_true", help="Print the benchmark results as JSON."
+    )
 
     return parser.parse_args()
 
 
-def _play_randomly(env: Breakout) -> None:  # pylint: disable=redefined-outer-name
+def _make_writer(video_format: str, output_dir: str) -> FrameWriter:
+    """Make the frame writer of the recording."""
+    if video_format == "raw":
+        return RawFrameWriter(output_dir)
+    if video_format == "png":
+        return PngFrameWriter(output_dir)
+    return ImageioFrameWriter(Path(output_dir) / f"breakout.{video_format}")
+
+
+# pylint: disable-next=redefined-outer-name
+def _play_randomly(env: Union[Breakout, FrameRecorder]) -> None:
     env.reset()
     env.render(mode="human")
     done = False
     while not done:
         time.sleep(0.01)
         env.render(mode="human")
-        _ = env.step(env.action_space.sample())  # take a random action
-    env.close()
+        _, _, done, _ = env.step(env.action_space.sample())  # take a random action
+
+
+# pylint: disable-next=redefined-outer-name
+def _benchmark(args: argparse.Namespace, config: BreakoutConfiguration) -> None:
+    """Run the headless benchmark and print its statistics."""
+    stats = benchmark_rollouts(
+        args.env, config, args.episodes, args.workers or None, args.seed
+    )
+    print(json.dumps(stats.to_dict(), indent=2) if args.json else stats.format_table())
 
 
 if __name__ == "__main__":
@@ -78,11 +143,17 @@ if __name__ == "__main__":
         fire_enabled=args.fire,
         ball_enabled=not args.disable_ball,
     )
-    env = BreakoutDictSpace(config)
-    if args.record:
-        env = VideoRecorder(env, args.output_dir)
-
-    if args.random:
-        _play_randomly(env)
+    if args.benchmark:
+        _benchmark(args, config)
     else:
-        env.play()
+        env: Union[Breakout, FrameRecorder] = BreakoutDictSpace(config)
+        if args.record:
+            env = FrameRecorder(env, _make_writer(args.format, args.output_dir))
+
+        try:
+            if args.random:
+                _play_randomly(env)
+            else:
+                play_with_keyboard(env)
+        finally:
+            env.close()
@@ -27,21 +27,49 @@ The breakout game is based on CoderDojoSV/beginner-python's tutorial.
 
 Luca Iocchi 2017
 """
+# pylint: disable=too-many-lines
 import dataclasses
+import functools
 import math
-import random
+import time
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Any, Dict, Optional, Set, Tuple, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
 import gym
 import numpy as np
-import pygame
 from gym.spaces import Discrete, MultiBinary
 from gym.utils.seeding import np_random
 
+from gym_breakout_pygame.geometry import Rect
+from gym_breakout_pygame.profiling import Profiler
+from gym_breakout_pygame.utils import copy_observation, stack_observations
+
+if TYPE_CHECKING:
+    import pygame
+
+    from gym_breakout_pygame.rendering import (  # pylint: disable=cyclic-import
+        ArrayRenderer,
+    )
+    from gym_breakout_pygame.viewer import PygameViewer  # pylint: disable=cyclic-import
+
 Position = Tuple[int, int]
 
+# vertical offset of the first row of bricks, and vertical distance between rows
+BRICK_YOFFSET = 70
+BRICK_YDISTANCE = 8
+
 black = [0, 0, 0]
 white = [255, 255, 255]
 grey = [180, 180, 180]
@@ -52,9 +80,16 @@ red = [180, 0, 0]
 class PygameDrawable(ABC):  # pylint: disable=too-few-public-methods
     """Abstract base class of a drawable Pygame object."""
 
+    __slots__ = ()
+
     @abstractmethod
-    def draw_on_screen(self, screen: pygame.Surface) -> None:
-        """Draw a Pygame object on a given Pygame screen."""
+    def draw_on_screen(self, screen: "pygame.Surface") -> Optional["pygame.Rect"]:
+        """
+        Draw a Pygame object on a given Pygame screen.
+
+        :param screen: the Pygame surface.
+        :return: the bounding rectangle of the drawn pixels, None if nothing is drawn.
+        """
 
 
 class _AbstractPygameViewer(ABC):
@@ -65,7 +100,7 @@ class _AbstractPygameViewer(ABC):
         """Reset the viewer."""
 
     @abstractmethod
-    def render(self) -> None:
+    def render(self) -> Optional[np.ndarray]:
         """Render a frame of the game."""
 
     @abstractmethod
@@ -73,84 +108,6 @@ class _AbstractPygameViewer(ABC):
         """Close the viewer."""
 
 
-class PygameViewer(_AbstractPygameViewer):
-    """A concrete Pygame viewer class."""
-
-    def __init__(self, breakout_state: "BreakoutState") -> None:
-        """Initialize the Pygame viewer object."""
-        self.state = breakout_state
-
-        pygame.init()  # pylint: disable=no-member
-        pygame.display.set_caption("Breakout")
-        self.screen = pygame.display.set_mode(
-            [self.state.config.win_width, self.state.config.win_height]
-        )
-        self.myfont = pygame.font.SysFont("Arial", 30)
-        self.drawables = self._init_drawables()  # type: Set[PygameDrawable]
-
-    def reset(self, breakout_state: "BreakoutState") -> None:
-        """Reset the viewer."""
-        self.state = breakout_state
-        self.drawables = self._init_drawables()
-
-    def _init_drawables(self) -> Set[PygameDrawable]:
-        """Initialize the drawable objects."""
-        result: Set[PygameDrawable] = set()
-        result.add(self.state.ball)
-        result.add(self.state.paddle)
-        result.add(self.state.brick_grid)
-        result.add(self.state.bullet)
-        return result
-
-    def render(self, mode="human") -> None:
-        """Render a frame of the game."""
-        self._fill_screen()
-        self._draw_score_label()
-        self._draw_last_command()
-        self._draw_game_objects()
-
-        if mode == "human":
-            pygame.display.update()
-        elif mode == "rgb_array":
-            screen = pygame.surfarray.array3d(self.screen)
-            # swap width with height
-            screen.swapaxes(0, 1)
-
-    def _fill_screen(self) -> None:
-        """Fill the screen with white color."""
-        self.screen.fill(white)
-
-    def _draw_score_label(self) -> None:
-        """Draw the score label."""
-        score_label = self.myfont.render(
-            str(self.state.score),
-            100,
-            pygame.color.THECOLORS["black"],  # pylint: disable=c-extension-no-member
-        )
-        self.screen.blit(score_label, (50, 10))
-
-    def _draw_last_command(self) -> None:
-        """Draw the last command executed."""
-        cmd = self.state.last_command
-        cmd_to_string = str(cmd)
-        count_label = self.myfont.render(
-            cmd_to_string,
-            100,
-            pygame.color.THECOLORS["brown"],  # pylint: disable=c-extension-no-member
-        )
-        self.screen.blit(count_label, (20, 10))
-
-    def _draw_game_objects(self) -> None:
-        """Draw the game objects."""
-        for drawable in self.drawables:
-            drawable.draw_on_screen(self.screen)
-
-    def close(self) -> None:
-        """Close the viewer."""
-        pygame.display.quit()
-        pygame.quit()  # pylint: disable=no-member
-
-
 @dataclasses.dataclass(frozen=True)
 class BreakoutConfiguration:  # pylint: disable=too-many-instance-attributes
     """A dataclass for the breakout configuration."""
@@ -266,11 +223,57 @@ class Command(Enum):
         raise ValueError("Shouldn't be here...")
 
 
+# the commands, by value
+_COMMANDS: Dict[int, Command] = {command.value: command for command in Command}
+
+# the observations returned by 'Breakout.step_many'
+ALL_OBSERVATIONS = "all"
+LAST_OBSERVATION = "last"
+NO_OBSERVATION = "none"
+OBSERVATION_MODES = (ALL_OBSERVATIONS, LAST_OBSERVATION, NO_OBSERVATION)
+
+
+def iter_commands(actions: Union[Sequence[int], np.ndarray]) -> Iterator[Command]:
+    """
+    Iterate over the commands of a sequence of actions, converting them lazily.
+
+    :param actions: the actions, i.e. the values of the commands.
+    :yield: the commands.
+    :raises ValueError: when an action is not the value of a command.
+    """
+    for action in actions:
+        try:
+            yield _COMMANDS[action]
+        except (KeyError, TypeError) as error:
+            raise ValueError(f"Invalid action {action!r}.") from error
+
+
+def brick_position(
+    i: int, j: int, width: int, height: int, xdistance: int
+) -> Tuple[int, int]:
+    """
+    Get the top-left corner of the brick in a cell of the grid.
+
+    :param i: the column of the brick.
+    :param j: the row of the brick.
+    :param width: the width of a brick.
+    :param height: the height of a brick.
+    :param xdistance: the horizontal distance between the bricks.
+    :return: the x and y coordinates.
+    """
+    return (
+        (width + xdistance) * i + xdistance,
+        BRICK_YOFFSET + (height + BRICK_YDISTANCE) * j,
+    )
+
+
 class Brick(
     PygameDrawable
 ):  # pylint: disable=too-many-instance-attributes,too-few-public-methods
     """Class to represent a brick Pygame object."""
 
+    __slots__ = ("i", "j", "width", "height", "xdistance", "x", "y", "rect")
+
     def __init__(
         self,
         i: int,
@@ -286,19 +289,66 @@ class Brick(
         self.height = height
         self.xdistance = xdistance
 
-        self.x = (  # pylint: disable=invalid-name
-            self.width + self.xdistance
-        ) * i + self.xdistance
-        self.y = 70 + (self.height + 8) * j  # pylint: disable=invalid-name
-        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
+        x, y = brick_position(i, j, width, height, xdistance)
+        self.x = x  # pylint: disable=invalid-name
+        self.y = y  # pylint: disable=invalid-name
+        self.rect = Rect(self.x, self.y, self.width, self.height)
 
-    def draw_on_screen(self, screen: pygame.Surface) -> None:
+    def draw_on_screen(self, screen: "pygame.Surface") -> "pygame.Rect":
         """Draw the object on the screen."""
-        pygame.draw.rect(screen, grey, self.rect, 0)
+        import pygame  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        return pygame.draw.rect(screen, grey, self.rect, 0)
+
+
+# the seed of the random keys of the Zobrist hashes
+ZOBRIST_SEED = 0x5EED
+_MASK64 = (1 << 64) - 1
+
 
+@functools.lru_cache(maxsize=None)
+def zobrist_keys(brick_cols: int, brick_rows: int) -> Tuple[np.ndarray, int]:
+    """
+    Get the random 64-bit keys of the cells of a grid, for its Zobrist hash.
 
-class BrickGrid(PygameDrawable):
-    """Class to represent the brick grid."""
+    The keys are the same in every process, as they are drawn with a fixed seed.
+
+    :param brick_cols: the number of columns.
+    :param brick_rows: the number of rows.
+    :return: the read-only (cols, rows) uint64 array of keys, and the hash of
+        the full grid.
+    """
+    keys = np.random.default_rng(ZOBRIST_SEED).integers(
+        0, np.iinfo(np.uint64).max, size=(brick_cols, brick_rows), dtype=np.uint64
+    )
+    keys.flags.writeable = False
+    return keys, int(np.bitwise_xor.reduce(keys, axis=None))
+
+
+class BrickGrid(PygameDrawable):  # pylint: disable=too-many-instance-attributes
+    """
+    Class to represent the brick grid.
+
+    The grid is a (brick_cols, brick_rows) uint8 array, 1 where a brick is
+    present, with a counter of the present bricks; the geometry of a brick is
+    derived from its position, so the cost of a step does not depend on the size
+    of the grid, and a new grid is a single array fill.
+
+    The grid also keeps its Zobrist hash, the XOR of the keys of the present
+    bricks (see 'zobrist_keys'), updated when a brick is removed.
+    """
+
+    __slots__ = (
+        "brick_cols",
+        "brick_rows",
+        "brick_width",
+        "brick_height",
+        "brick_xdistance",
+        "bricksgrid",
+        "nb_bricks",
+        "zobrist_hash",
+        "_zobrist_keys",
+    )
 
     def __init__(
         self,
@@ -315,38 +365,106 @@ class BrickGrid(PygameDrawable):
         self.brick_height = brick_height
         self.brick_xdistance = brick_xdistance
 
-        self.bricks = {}  # type: Dict[Tuple[int, int], Brick]
-        self.bricksgrid = np.zeros((self.brick_cols, self.brick_rows))
-        self._init_bricks()
-
-    def _init_bricks(self) -> None:
-        """Initialize the grid of bricks."""
-        for i in range(0, self.brick_cols):
-            for j in range(0, self.brick_rows):
-                temp = Brick(
-                    i, j, self.brick_width, self.brick_height, self.brick_xdistance
-                )
-                self.bricks[(i, j)] = temp
-                self.bricksgrid[i][j] = 1
-
-    def draw_on_screen(self, screen: pygame.Surface) -> None:
+        self.bricksgrid = np.ones((self.brick_cols, self.brick_rows), dtype=np.uint8)
+        self.nb_bricks = self.brick_cols * self.brick_rows
+        self._zobrist_keys, self.zobrist_hash = zobrist_keys(brick_cols, brick_rows)
+
+    def brick(self, i: int, j: int) -> Brick:
+        """
+        Get the brick in a cell of the grid, present or not.
+
+        :param i: the column of the brick.
+        :param j: the row of the brick.
+        :return: a new brick object.
+        """
+        return Brick(i, j, self.brick_width, self.brick_height, self.brick_xdistance)
+
+    def positions(self) -> List[Position]:
+        """Get the positions of the present bricks, column by column."""
+        return list(zip(*map(np.ndarray.tolist, np.nonzero(self.bricksgrid))))
+
+    @property
+    def bricks(self) -> Dict[Position, Brick]:
+        """Get the present bricks by position; the dictionary is built on demand."""
+        return {(i, j): self.brick(i, j) for i, j in self.positions()}
+
+    def set_bricks(self, bricksgrid: np.ndarray) -> None:
+        """
+        Set the bricks that are present in the grid.
+
+        :param bricksgrid: a (brick_cols, brick_rows) array, nonzero where a brick is present.
+        """
+        np.not_equal(bricksgrid, 0, out=self.bricksgrid, casting="unsafe")
+        self.nb_bricks = int(np.count_nonzero(self.bricksgrid))
+        # the grid holds 0 or 1, so its boolean view is the mask of the bricks
+        present_keys = self._zobrist_keys[self.bricksgrid.view(bool)]
+        self.zobrist_hash = int(np.bitwise_xor.reduce(present_keys))
+
+    def draw_on_screen(self, screen: "pygame.Surface") -> Optional["pygame.Rect"]:
         """Draw the bricks on the screen."""
-        for brick in self.bricks.values():
-            brick.draw_on_screen(screen)
+        rects = [self.brick(i, j).draw_on_screen(screen) for i, j in self.positions()]
+        return rects[0].unionall(rects[1:]) if len(rects) > 0 else None
 
     def remove_brick_at_position(self, position: Position) -> None:
         """Remove the brick at a given position."""
-        self.bricks.pop(position)
-        self.bricksgrid[position[0], position[1]] = 0
+        i, j = position
+        if not self.bricksgrid.item(i, j):
+            raise KeyError(position)
+        self.bricksgrid[i, j] = 0
+        self.nb_bricks -= 1
+        self.zobrist_hash ^= self._zobrist_keys.item(i, j)
 
     def is_empty(self) -> bool:
         """Return true if the grid of bricks is empty."""
-        return len(self.bricks) == 0
+        return self.nb_bricks == 0
+
+    def find_colliding_brick(
+        self, left: int, top: int, width: int, height: int
+    ) -> Optional[Brick]:
+        """
+        Find the first brick that collides with a rectangle.
+
+        The candidate cells are computed from the layout of the grid, so the cost
+        does not depend on the number of bricks. The bricks are checked column by
+        column, as in 'positions'.
+
+        :param left: the x-coordinate of the rectangle.
+        :param top: the y-coordinate of the rectangle.
+        :param width: the width of the rectangle.
+        :param height: the height of the rectangle.
+        :return: the first colliding brick, or None.
+        """
+        if width <= 0 or height <= 0:
+            return None
+        x_step = self.brick_width + self.brick_xdistance
+        y_step = self.brick_height + BRICK_YDISTANCE
+        # a brick in column i spans [x_step * i + xdistance, ... + brick_width)
+        first_col = max(
+            (left - self.brick_xdistance - self.brick_width) // x_step + 1, 0
+        )
+        last_col = min(
+            (left + width - self.brick_xdistance - 1) // x_step, self.brick_cols - 1
+        )
+        # a brick in row j spans [y_step * j + BRICK_YOFFSET, ... + brick_height)
+        first_row = max((top - BRICK_YOFFSET - self.brick_height) // y_step + 1, 0)
+        last_row = min(
+            (top + height - BRICK_YOFFSET - 1) // y_step, self.brick_rows - 1
+        )
+        if first_col > last_col or first_row > last_row:
+            return None
+        present = self.bricksgrid.item
+        for i in range(first_col, last_col + 1):
+            for j in range(first_row, last_row + 1):
+                if present(i, j):
+                    return self.brick(i, j)
+        return None
 
 
 class Ball(PygameDrawable):
     """Class to represent the ball object."""
 
+    __slots__ = ("config", "x", "y", "speed_x", "speed_y", "radius", "rect")
+
     def __init__(self, breakout_config: BreakoutConfiguration) -> None:
         """Initialize the ball object."""
         self.config = breakout_config
@@ -358,70 +476,71 @@ class Ball(PygameDrawable):
             self.y: float = _initial_ball_y  # pylint: disable=invalid-name
             self.speed_x = self.config.init_ball_speed_x
             self.speed_y = self.config.init_ball_speed_y
-            self._radius = self.config.ball_radius
+            self.radius: int = self.config.ball_radius
         else:
             self.x = 0.0
             self.y = 0.0
             self.speed_x = 0.0
             self.speed_y = 0.0
-            self._radius = 0
+            self.radius = 0
 
-    @property
-    def radius(self) -> int:
-        """Get the radius of the ball."""
-        return self._radius
+        # the collision box, updated in place by 'update'
+        self.rect = Rect(0, 0, 0, 0)
+        self.update_rect()
 
     @property
     def speed_x_norm(self) -> int:
         """Get the normalized x-speed."""
-        if self.speed_x < -2.5:
-            return 0
-        if -2.5 <= self.speed_x < 0:
-            return 1
-        if self.speed_x == 0:
+        speed_x = self.speed_x
+        if speed_x < 0:
+            return 0 if speed_x < -2.5 else 1
+        if speed_x > 0:
+            return 3 if speed_x < 2.5 else 4
+        if speed_x == 0:
             return 2
-        if 0 < self.speed_x < 2.5:
-            return 3
-        if 2.5 <= self.speed_x:
-            return 4
         raise ValueError("Speed x not recognized.")
 
     @property
     def speed_y_norm(self) -> int:
         """Get the normalized y-speed."""
-        if self.speed_y <= 0:
-            return 0
-        return 1
+        return 0 if self.speed_y <= 0 else 1
 
     @property
     def dir(self) -> int:
         """Get the direction index of the ball."""
-        ball_dir = 0
-        if self.speed_y > 0:  # down
-            ball_dir += 5
-        if self.speed_x < -2.5:  # quick-left
-            ball_dir += 1
-        elif self.speed_x < 0:  # left
-            ball_dir += 2
-        elif self.speed_x > 2.5:  # quick-right
-            ball_dir += 3
-        elif self.speed_x > 0:  # right
-            ball_dir += 4
+        ball_dir = 5 if self.speed_y > 0 else 0  # down
+        speed_x = self.speed_x
+        if speed_x < 0:
+            return ball_dir + (1 if speed_x < -2.5 else 2)  # quick-left, left
+        if speed_x > 0:
+            return ball_dir + (3 if speed_x > 2.5 else 4)  # quick-right, right
         return ball_dir
 
-    def draw_on_screen(self, screen: pygame.Surface) -> None:
+    def draw_on_screen(self, screen: "pygame.Surface") -> Optional["pygame.Rect"]:
         """Draw the Pygame object on the screen."""
-        pygame.draw.circle(screen, orange, [int(self.x), int(self.y)], self.radius, 0)
+        import pygame  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        return pygame.draw.circle(
+            screen, orange, [int(self.x), int(self.y)], self.radius, 0
+        )
 
     def update(self) -> None:
         """Update the position of the ball according to the speed."""
         self.x += self.speed_x
         self.y += self.speed_y
+        self.update_rect()
 
+    def update_rect(self) -> None:
+        """Update the collision box to the current position of the ball."""
+        radius = self.radius
+        self.rect.update(self.x - radius, self.y - radius, 2 * radius, 2 * radius)
 
-class Paddle(PygameDrawable):
+
+class Paddle(PygameDrawable):  # pylint: disable=too-many-instance-attributes
     """Class to represent the paddle object."""
 
+    __slots__ = ("config", "x", "y", "width", "height", "speed", "_max_x", "rect")
+
     def __init__(self, breakout_config: BreakoutConfiguration) -> None:
         """Initialize the paddle object."""
         self.config = breakout_config
@@ -430,47 +549,49 @@ class Paddle(PygameDrawable):
         _initial_paddle_y = self.config.win_height - 20
         self.x = _initial_paddle_x  # pylint: disable=invalid-name
         self.y = _initial_paddle_y  # pylint: disable=invalid-name
+        self.width = self.config.paddle_width
+        self.height = self.config.paddle_height
+        self.speed = self.config.paddle_speed
+        self._max_x = self.config.win_width - self.width
 
-    @property
-    def width(self) -> int:
-        """Get the paddle width."""
-        return self.config.paddle_width
+        # the collision box, updated in place by 'update'
+        self.rect = Rect(self.x, self.y, self.width, self.height)
 
-    @property
-    def height(self) -> int:
-        """Get the paddle height."""
-        return self.config.paddle_height
-
-    @property
-    def speed(self) -> int:
-        """Get the paddle speed."""
-        return self.config.paddle_speed
-
-    def draw_on_screen(self, screen: pygame.Surface) -> None:
+    def draw_on_screen(self, screen: "pygame.Surface") -> Optional["pygame.Rect"]:
         """Draw the object on screen."""
-        pygame.draw.rect(screen, grey, [self.x, self.y, self.width, self.height], 0)
+        import pygame  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        return pygame.draw.rect(
+            screen, grey, [self.x, self.y, self.width, self.height], 0
+        )
 
     def update(self, command: Command) -> None:
         """Update the position of the paddle."""
-        if command == Command.LEFT:
+        if command is Command.LEFT:
             self.x -= self.speed
-        elif command == Command.RIGHT:
+        elif command is Command.RIGHT:
             self.x += self.speed
-        elif command == Command.NOP:
+        elif command is Command.NOP:
             pass
-        elif command == Command.FIRE:
+        elif command is Command.FIRE:
             pass
         else:
             raise Exception("Command not recognized.")
 
         self.x = max(self.x, 0)
-        if self.x > self.config.win_width - self.width:
-            self.x = self.config.win_width - self.width
+        if self.x > self._max_x:
+            self.x = self._max_x
+        self.rect.x = self.x
 
 
 class Bullet(PygameDrawable):
     """Class to represent a bullet object."""
 
+    __slots__ = ("config", "x", "y", "speed_y", "rect")
+
+    width = 5
+    height = 5
+
     def __init__(self, breakout_config: BreakoutConfiguration) -> None:
         """Initialize the bullet object."""
         self.config = breakout_config
@@ -479,26 +600,22 @@ class Bullet(PygameDrawable):
         self.y = 0.0  # pylint: disable=invalid-name
         self.speed_y = 0.0
 
+        # the collision box, updated in place by 'update'
+        self.rect = Rect(0, 0, self.width, self.height)
+
     @property
     def in_movement(self) -> bool:
         """Return true if the bullet is in movement."""
         return self.speed_y < 0.0
 
-    @property
-    def width(self) -> int:
-        """Get the width of the bullet."""
-        return 5
-
-    @property
-    def height(self) -> int:
-        """Get the height of the bullet."""
-        return 5
-
     def update(self) -> None:
         """Update the position of the bullet."""
         self.y += self.speed_y
         if self.y < 5:
             self.reset()
+        rect = self.rect
+        rect.x = int(self.x)
+        rect.y = int(self.y)
 
     def reset(self) -> None:
         """Reset the state of the bullet."""
@@ -506,15 +623,33 @@ class Bullet(PygameDrawable):
         self.y = 0.0
         self.speed_y = 0.0
 
-    def draw_on_screen(self, screen: pygame.Surface) -> None:
+    def draw_on_screen(self, screen: "pygame.Surface") -> Optional["pygame.Rect"]:
         """Draw the object on the screen."""
+        import pygame  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
         if self.speed_y < 0:
-            pygame.draw.rect(screen, red, [self.x, self.y, self.width, self.height], 0)
+            return pygame.draw.rect(
+                screen, red, [self.x, self.y, self.width, self.height], 0
+            )
+        return None
 
 
 class BreakoutState:  # pylint: disable=too-many-instance-attributes
     """Class to represent the Breakout game state."""
 
+    __slots__ = (
+        "config",
+        "ball",
+        "paddle",
+        "brick_grid",
+        "bullet",
+        "last_command",
+        "score",
+        "_steps",
+        "_random_event_gen",
+        "_profiler",
+    )
+
     def __init__(
         self,
         breakout_configuration: BreakoutConfiguration,
@@ -542,10 +677,34 @@ class BreakoutState:  # pylint: disable=too-many-instance-attributes
         self._random_event_gen = (
             RandomEventGenerator() if random_event_gen is None else random_event_gen
         )
+        self._profiler: Optional[Profiler] = None
 
     def reset(self) -> "BreakoutState":
         """Reset the Breakout state."""
-        return BreakoutState(self.config, self._random_event_gen)
+        state = BreakoutState(self.config, self._random_event_gen)
+        state._profiler = self._profiler  # pylint: disable=protected-access
+        return state
+
+    @property
+    def profiler(self) -> Optional[Profiler]:
+        """Get the profiler attached to the game, if any."""
+        return self._profiler
+
+    def enable_profiling(self, profiler: Optional[Profiler] = None) -> Profiler:
+        """
+        Record the duration of the phases of each step in a profiler.
+
+        The profiler is kept by the states returned by 'reset'.
+
+        :param profiler: the profiler; by default, a new one.
+        :return: the attached profiler.
+        """
+        self._profiler = Profiler() if profiler is None else profiler
+        return self._profiler
+
+    def disable_profiling(self) -> None:
+        """Detach the profiler, if any."""
+        self._profiler = None
 
     def update(self, command: Command) -> None:
         """Update the Breakout state according to the provided command."""
@@ -558,8 +717,15 @@ class BreakoutState:  # pylint: disable=too-many-instance-attributes
         """Remove brick at a certain position."""
         self.brick_grid.remove_brick_at_position(position)
 
-    def to_dict(self) -> Dict:
-        """Extract the state observation based on the game configuration."""
+    def to_dict(self, out: Optional[Dict] = None) -> Dict:
+        """
+        Extract the state observation based on the game configuration.
+
+        :param out: a dictionary returned by a previous call, to update in place;
+            its brick matrix is overwritten with the current bricks.
+        :return: the observation; without 'out', its brick matrix is the live
+            matrix of the game.
+        """
         ball_x = int(self.ball.x) // self.config.resolution_x
         ball_y = int(self.ball.y) // self.config.resolution_y
         ball_x_speed = self.ball.speed_x_norm
@@ -567,6 +733,14 @@ class BreakoutState:  # pylint: disable=too-many-instance-attributes
         paddle_x = int(self.paddle.x) // self.config.resolution_x
         bricks_matrix = self.brick_grid.bricksgrid
 
+        if out is not None:
+            out["paddle_x"] = paddle_x
+            out["ball_x"] = ball_x
+            out["ball_y"] = ball_y
+            out["ball_x_speed"] = ball_y_speed
+            out["ball_y_speed"] = ball_x_speed
+            np.copyto(out["bricks_matrix"], bricks_matrix, casting="unsafe")
+            return out
         return {
             "paddle_x": paddle_x,
             "ball_x": ball_x,
@@ -576,36 +750,86 @@ class BreakoutState:  # pylint: disable=too-many-instance-attributes
             "bricks_matrix": bricks_matrix,
         }
 
-    def step(  # noqa: C901 # pylint: disable=too-many-branches,too-many-statements
-        self, command: Command
-    ) -> float:
+    def step(self, command: Command) -> float:
         """
         Check collisions and update the state of the game accordingly.
 
         :param command: the command chosen by the player
         :return: the reward resulting from this step.
         """
-        reward = 0.0
+        if self._profiler is not None:
+            return self._profiled_step(command)
         self._steps += 1
         self.update(command)
+        self._bounce_on_walls()
+        self._bump_on_paddle()
+        reward = self._hit_brick_with_ball(0.0)
+        reward = self._move_bullet(command, reward)
+        return self._add_final_rewards(reward)
+
+    def rollout(
+        self, actions: Union[Sequence[int], np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Do a step for each action of a sequence, until the game is finished.
 
-        ball = self.ball
-        paddle = self.paddle
-        bullet = self.bullet
-        brick_grid = self.brick_grid
+        An invalid action raises ValueError, after the steps of the previous ones.
 
-        ball_rect = pygame.Rect(
-            ball.x - ball.radius, ball.y - ball.radius, ball.radius * 2, ball.radius * 2
+        :param actions: the actions, i.e. the values of the commands.
+        :return: the rewards and the done flags of the steps done; as the game
+            stops at the first finished step, only the last flag can be true.
+        """
+        step = self.step
+        is_finished = self.is_finished
+        rewards = []
+        done = False
+        for command in iter_commands(actions):
+            rewards.append(step(command))
+            done = is_finished()
+            if done:
+                break
+        dones = np.zeros(len(rewards), dtype=bool)
+        dones[-1:] = done
+        return np.array(rewards, dtype=np.float64), dones
+
+    def _profiled_step(self, command: Command) -> float:
+        """Do 'step', recording the duration of each phase in the profiler."""
+        clock = time.perf_counter_ns
+        start = clock()
+        self._steps += 1
+        self.update(command)
+        update_end = clock()
+        self._bounce_on_walls()
+        wall_end = clock()
+        self._bump_on_paddle()
+        paddle_end = clock()
+        reward = self._hit_brick_with_ball(0.0)
+        bricks_end = clock()
+        reward = self._move_bullet(command, reward)
+        bullet_end = clock()
+        reward = self._add_final_rewards(reward)
+        reward_end = clock()
+        cast(Profiler, self._profiler).record_frame(
+            [
+                start,
+                update_end,
+                wall_end,
+                paddle_end,
+                bricks_end,
+                bullet_end,
+                reward_end,
+            ]
         )
-        paddle_rect = pygame.Rect(paddle.x, paddle.y, paddle.width, paddle.height)
-        bullet_rect = pygame.Rect(bullet.x, bullet.y, bullet.width, bullet.height)
+        return reward
 
-        # for screen border
+    def _bounce_on_walls(self) -> None:
+        """Make the ball bounce on the screen border."""
+        ball = self.ball
         if ball.y < ball.radius:
             ball.y = ball.radius
             ball.speed_y = -ball.speed_y
-            if np.isclose(ball.speed_x, 0.0):
-                ball.speed_x = 1.0 * random.choice([-1.0, 1.0])
+            if abs(ball.speed_x) <= 1e-08:  # same as np.isclose(ball.speed_x, 0.0)
+                self._random_event_gen.perturbate_ball_speed_after_wall_hit(self)
         if ball.x < ball.radius:
             ball.x = ball.radius
             ball.speed_x = -ball.speed_x
@@ -613,53 +837,67 @@ class BreakoutState:  # pylint: disable=too-many-instance-attributes
             ball.x = self.config.win_width - ball.radius
             ball.speed_x = -ball.speed_x
 
-        # for paddle
-        if ball_rect.colliderect(paddle_rect):
-            if self.config.complex_bump:
-                dbp = math.fabs(ball.x - (paddle.x + paddle.width / 2))
-                if dbp < 20:
-                    if ball.speed_x < -5:
-                        ball.speed_x += 2
-                    elif ball.speed_x > 5:
-                        ball.speed_x -= 2
-                    elif ball.speed_x <= -0.5:
-                        ball.speed_x += 0.5
-                    elif ball.speed_x >= 0.5:
-                        ball.speed_x -= 0.5
-
-                dbp = math.fabs(ball.x - (paddle.x + 0))
-                if dbp < 10:
-                    ball.speed_x = -abs(ball.speed_x) - 1
-                dbp = math.fabs(ball.x - (paddle.x + paddle.width))
-                if dbp < 10:
-                    ball.speed_x = abs(ball.speed_x) + 1
-
-            else:
-                dbp = math.fabs(ball.x - (paddle.x + paddle.width / 2))
-                if dbp < 20:
-                    if ball.speed_x != 0:
-                        ball.speed_x = 2 * abs(ball.speed_x) / ball.speed_x
-                dbp = math.fabs(ball.x - (paddle.x + 0))
-                if dbp < 20:
-                    ball.speed_x = -5
-                    self._random_event_gen.perturbate_ball_speed_after_paddle_hit(self)
-                dbp = math.fabs(ball.x - (paddle.x + paddle.width))
-                if dbp < 20:
-                    ball.speed_x = 5
-                    self._random_event_gen.perturbate_ball_speed_after_paddle_hit(self)
-
-            ball.speed_y = -abs(ball.speed_y)
-
-        for brick in brick_grid.bricks.values():
-            if brick.rect.colliderect(ball_rect):
-                self.score += self.config.brick_reward
-                self.remove_brick_at_position((brick.i, brick.j))
-                ball.speed_y = -ball.speed_y
-                reward += self.config.brick_reward
-                break
+    def _bump_on_paddle(self) -> None:  # noqa: C901 # pylint: disable=too-many-branches
+        """Make the ball bounce on the paddle."""
+        ball = self.ball
+        paddle = self.paddle
+        # the collision box of the ball is not updated by the wall bounce
+        if not ball.rect.colliderect(paddle.rect):
+            return
+        if self.config.complex_bump:
+            dbp = math.fabs(ball.x - (paddle.x + paddle.width / 2))
+            if dbp < 20:
+                if ball.speed_x < -5:
+                    ball.speed_x += 2
+                elif ball.speed_x > 5:
+                    ball.speed_x -= 2
+                elif ball.speed_x <= -0.5:
+                    ball.speed_x += 0.5
+                elif ball.speed_x >= 0.5:
+                    ball.speed_x -= 0.5
+
+            dbp = math.fabs(ball.x - (paddle.x + 0))
+            if dbp < 10:
+                ball.speed_x = -abs(ball.speed_x) - 1
+            dbp = math.fabs(ball.x - (paddle.x + paddle.width))
+            if dbp < 10:
+                ball.speed_x = abs(ball.speed_x) + 1
+
+        else:
+            dbp = math.fabs(ball.x - (paddle.x + paddle.width / 2))
+            if dbp < 20:
+                if ball.speed_x != 0:
+                    ball.speed_x = 2 * abs(ball.speed_x) / ball.speed_x
+            dbp = math.fabs(ball.x - (paddle.x + 0))
+            if dbp < 20:
+                ball.speed_x = -5
+                self._random_event_gen.perturbate_ball_speed_after_paddle_hit(self)
+            dbp = math.fabs(ball.x - (paddle.x + paddle.width))
+            if dbp < 20:
+                ball.speed_x = 5
+                self._random_event_gen.perturbate_ball_speed_after_paddle_hit(self)
+
+        ball.speed_y = -abs(ball.speed_y)
+
+    def _hit_brick_with_ball(self, reward: float) -> float:
+        """Remove the first brick hit by the ball, and add its reward."""
+        ball_rect = self.ball.rect
+        brick = self.brick_grid.find_colliding_brick(
+            ball_rect.x, ball_rect.y, ball_rect.w, ball_rect.h
+        )
+        if brick is not None:
+            self.score += self.config.brick_reward
+            self.remove_brick_at_position((brick.i, brick.j))
+            self.ball.speed_y = -self.ball.speed_y
+            reward += self.config.brick_reward
+        return reward
 
-        if command == Command.FIRE:  # fire
+    def _move_bullet(self, command: Command, reward: float) -> float:
+        """Fire the bullet, and remove the first brick it hits, adding its reward."""
+        bullet = self.bullet
+        if command is Command.FIRE:  # fire
             if not bullet.in_movement:
+                paddle = self.paddle
                 bullet.x = paddle.x + paddle.width / 2
                 bullet.y = paddle.y
                 bullet.speed_y = -10
@@ -669,14 +907,20 @@ class BreakoutState:  # pylint: disable=too-many-instance-attributes
             # reset
             bullet.reset()
 
-        for brick in brick_grid.bricks.values():
-            if brick.rect.colliderect(bullet_rect):
-                self.remove_brick_at_position((brick.i, brick.j))
-                reward += self.config.brick_reward
-                self.score += self.config.brick_reward
-                self.bullet.reset()
-                break
+        # the collision box of the bullet is the one before firing or resetting
+        bullet_rect = bullet.rect
+        brick = self.brick_grid.find_colliding_brick(
+            bullet_rect.x, bullet_rect.y, bullet_rect.w, bullet_rect.h
+        )
+        if brick is not None:
+            self.remove_brick_at_position((brick.i, brick.j))
+            reward += self.config.brick_reward
+            self.score += self.config.brick_reward
+            bullet.reset()
+        return reward
 
+    def _add_final_rewards(self, reward: float) -> float:
+        """Add the step reward, and the penalties for losing the ball or time out."""
         reward += self.config.step_reward
 
         # ball out
@@ -696,15 +940,164 @@ class BreakoutState:  # pylint: disable=too-many-instance-attributes
 
     def is_finished(self) -> bool:
         """Check whether the game is over."""
+        return self.is_terminated() or self.is_truncated()
+
+    def is_terminated(self) -> bool:
+        """Check whether the ball is lost or the bricks are all broken."""
         end1 = self.ball.y > self.config.win_height - self.ball.radius
         end2 = self.brick_grid.is_empty()
-        end3 = self._steps > cast(int, self.config.horizon)
-        return end1 or end2 or end3
+        return end1 or end2
+
+    def is_truncated(self) -> bool:
+        """Check whether the horizon is reached."""
+        return self._steps > cast(int, self.config.horizon)
+
+    def state_hash(self) -> int:
+        """
+        Get a 64-bit hash of the game state, in O(1).
+
+        The hash combines the Zobrist hash of the bricks, maintained by the grid,
+        with the hash of the positions and speeds of the ball, the paddle and the
+        bullet. As in the tabular model, the score, the step counter, the last
+        command and the random number generator are not part of the state. The
+        hash is the same in every process.
+
+        :return: the hash, an integer in [0, 2**64).
+        """
+        ball = self.ball
+        bullet = self.bullet
+        movers = hash(
+            (
+                ball.x,
+                ball.y,
+                ball.speed_x,
+                ball.speed_y,
+                self.paddle.x,
+                bullet.x,
+                bullet.y,
+                bullet.speed_y,
+            )
+        )
+        return _mix64(self.brick_grid.zobrist_hash ^ (movers & _MASK64))
 
     def set_seed(self, seed: int) -> None:
         """Set the random seed."""
         self._random_event_gen = RandomEventGenerator(seed)
 
+    def snapshot(self) -> np.ndarray:
+        """
+        Take a snapshot of the game.
+
+        The snapshot is a fixed-size NumPy record (see 'snapshot_dtype') with the
+        state of the ball, the paddle and the bullet, the bricks packed in a bitmap,
+        the step counter, the score and the state of the random number generator.
+        Use 'tobytes()' to get it as a bytes blob.
+
+        :return: the snapshot, a zero-dimensional structured array.
+        """
+        ball = self.ball
+        bullet = self.bullet
+        record = np.empty((), dtype=snapshot_dtype(self.config))
+        record[()] = (
+            ball.x,
+            ball.y,
+            ball.speed_x,
+            ball.speed_y,
+            self.paddle.x,
+            bullet.x,
+            bullet.y,
+            bullet.speed_y,
+            self.score,
+            self._steps,
+            self.last_command.value,
+            *self._random_event_gen.get_state(),
+            np.packbits(self.brick_grid.bricksgrid),
+        )
+        return record
+
+    def restore(self, snapshot: Union[np.ndarray, bytes]) -> None:
+        """
+        Restore the game from a snapshot taken with 'snapshot'.
+
+        The random number generator is restored as well, so the game continues
+        exactly as the game the snapshot was taken from.
+
+        :param snapshot: the snapshot record, or its bytes.
+        """
+        record = (
+            np.frombuffer(snapshot, dtype=snapshot_dtype(self.config))[0]
+            if isinstance(snapshot, bytes)
+            else snapshot
+        )
+        (
+            ball_x,
+            ball_y,
+            ball_speed_x,
+            ball_speed_y,
+            paddle_x,
+            bullet_x,
+            bullet_y,
+            bullet_speed_y,
+            score,
+            steps,
+            last_command,
+            *rng_state,
+            bricks,
+        ) = record.item()
+        ball = self.ball
+        ball.x, ball.y = ball_x, ball_y
+        ball.speed_x, ball.speed_y = ball_speed_x, ball_speed_y
+        self.paddle.x = paddle_x
+        bullet = self.bullet
+        bullet.x, bullet.y, bullet.speed_y = bullet_x, bullet_y, bullet_speed_y
+        self.score = score
+        self._steps = steps
+        self.last_command = Command(last_command)
+        self._random_event_gen.set_state(*rng_state)
+        brick_grid = self.brick_grid
+        brick_grid.set_bricks(
+            np.unpackbits(
+                bricks, count=brick_grid.brick_cols * brick_grid.brick_rows
+            ).reshape(brick_grid.brick_cols, brick_grid.brick_rows)
+        )
+
+    def clone(self) -> "BreakoutState":
+        """Return an independent copy of the game, random number generator included."""
+        result = BreakoutState(self.config, RandomEventGenerator())
+        result.restore(self.snapshot())
+        return result
+
+
+@functools.lru_cache(maxsize=None)
+def snapshot_dtype(config: BreakoutConfiguration) -> np.dtype:
+    """
+    Get the dtype of the snapshots of the games with a given configuration.
+
+    :param config: the game configuration.
+    :return: the structured dtype of the snapshot records.
+    """
+    nb_brick_bytes = (config.brick_cols * config.brick_rows + 7) // 8
+    return np.dtype(
+        [
+            ("ball_x", "<f8"),
+            ("ball_y", "<f8"),
+            ("ball_speed_x", "<f8"),
+            ("ball_speed_y", "<f8"),
+            ("paddle_x", "<i8"),
+            ("bullet_x", "<f8"),
+            ("bullet_y", "<f8"),
+            ("bullet_speed_y", "<f8"),
+            ("score", "<f8"),
+            ("steps", "<i8"),
+            ("last_command", "u1"),
+            ("rng_state", "<u8", (2,)),
+            ("rng_inc", "<u8", (2,)),
+            ("rng_has_uint32", "u1"),
+            ("rng_uinteger", "<u4"),
+            ("bricks", "u1", (nb_brick_bytes,)),
+        ]
+    )
+
 
 class RandomEventGenerator:
     """Class to wrap a random number generator."""
@@ -714,6 +1107,40 @@ class RandomEventGenerator:
         self._seed = seed
         self._rng = np_random(self._seed)[0]
 
+    def get_state(self) -> Tuple[Tuple[int, int], Tuple[int, int], int, int]:
+        """
+        Get the state of the PCG64 random number generator as fixed-size integers.
+
+        :return: the 128-bit state and increment, split in (low, high) 64-bit words,
+            the 'has_uint32' flag and the buffered 32-bit integer.
+        """
+        state = self._rng.bit_generator.state
+        pcg_state = state["state"]
+        return (
+            _split_uint128(pcg_state["state"]),
+            _split_uint128(pcg_state["inc"]),
+            state["has_uint32"],
+            state["uinteger"],
+        )
+
+    def set_state(
+        self,
+        pcg_state: Tuple[int, int],
+        pcg_inc: Tuple[int, int],
+        has_uint32: int,
+        uinteger: int,
+    ) -> None:
+        """Set the state of the random number generator, as returned by 'get_state'."""
+        self._rng.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {
+                "state": int(pcg_state[0]) | int(pcg_state[1]) << 64,
+                "inc": int(pcg_inc[0]) | int(pcg_inc[1]) << 64,
+            },
+            "has_uint32": int(has_uint32),
+            "uinteger": int(uinteger),
+        }
+
     def perturbate_initial_ball_speed(self, state: BreakoutState) -> None:
         """Perturbate the initial ball speed randomly."""
         if not state.config.deterministic:
@@ -740,11 +1167,33 @@ class RandomEventGenerator:
             state.ball.speed_x = min(state.ball.speed_x, 6) * sign
             state.ball.speed_x = max(state.ball.speed_x, 0.5) * sign
 
+    def perturbate_ball_speed_after_wall_hit(self, state: BreakoutState) -> None:
+        """Choose a random horizontal direction for a vertical ball hitting the top wall."""
+        state.ball.speed_x = 1.0 * float(self._rng.choice([-1.0, 1.0]))
+
+
+def _mix64(value: int) -> int:
+    """Mix the bits of a 64-bit integer, with the finalizer of SplitMix64."""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & _MASK64
+    return value ^ (value >> 31)
+
+
+def _split_uint128(value: int) -> Tuple[int, int]:
+    """Split a 128-bit unsigned integer in its (low, high) 64-bit words."""
+    return value & 0xFFFFFFFFFFFFFFFF, value >> 64
+
 
 class Breakout(gym.Env, ABC):  # pylint: disable=too-many-instance-attributes
     """A generic Breakout env. The feature space must be defined in subclasses."""
 
-    metadata = {"render.modes": ["human", "rgb_array"]}
+    metadata = {
+        "render.modes": ["human", "rgb_array"],
+        "render_modes": ["human", "rgb_array"],
+    }
+    # whether 'observe' updates the environment (e.g. a stack of frames), so
+    # that 'step_many' must observe after every step, as 'step' does
+    _stateful_observe = False
 
     def __init__(self, breakout_config: Optional[BreakoutConfiguration] = None) -> None:
         """Initialize the Breakout Gym environment."""
@@ -752,7 +1201,9 @@ class Breakout(gym.Env, ABC):  # pylint: disable=too-many-instance-attributes
             BreakoutConfiguration() if breakout_config is None else breakout_config
         )
         self.state = BreakoutState(self.config)
-        self.viewer = None  # type: Optional[PygameViewer]
+        self.viewer: Optional["PygameViewer"] = None
+        self._renderer: Optional["ArrayRenderer"] = None
+        self._profiler: Optional[Profiler] = None
 
         self.action_space = Discrete(
             len(Command) if self.config.fire_enabled else len(Command) - 1
@@ -764,19 +1215,90 @@ class Breakout(gym.Env, ABC):  # pylint: disable=too-many-instance-attributes
         self._ball_x_speed_space = Discrete(self.config.n_ball_x_speed)
         self._ball_y_speed_space = Discrete(self.config.n_ball_y_speed)
         self._ball_dir_space = Discrete(self.config.n_ball_dir)
+        # the brick matrix is indexed by column, then by row
         self._bricks_matrix_space = MultiBinary(
-            (self.config.brick_rows, self.config.brick_cols)
+            (self.config.brick_cols, self.config.brick_rows)
         )
 
     def step(self, action: int) -> Tuple[Any, float, bool, Any]:
         """Do a simulation step in the environment."""
         command = Command(action)
         reward = self.state.step(command)
-        obs = self.observe(self.state)
+        obs = self._observe_current_state()
         is_finished = self.state.is_finished()
         info: Dict = {}
         return obs, reward, is_finished, info
 
+    def step_many(
+        self,
+        actions: Union[Sequence[int], np.ndarray],
+        observations: str = LAST_OBSERVATION,
+    ) -> Tuple[Any, np.ndarray, np.ndarray]:
+        """
+        Do a simulation step for each action of a sequence, until done.
+
+        The steps are the ones of 'step', but the observations are only built
+        if requested, and there are no info dictionaries.
+
+        :param actions: the actions.
+        :param observations: 'all' for the observations after every step,
+            stacked as in 'utils.stack_observations'; 'last' for the observation
+            after the last step; 'none' for no observation.
+        :return: the observations (None with 'none'), the rewards and the done
+            flags of the steps done; only the last flag can be true.
+        :raises ValueError: if the observation mode is invalid; an invalid
+            action raises ValueError too, after the steps of the previous ones.
+        """
+        if observations not in OBSERVATION_MODES:
+            raise ValueError(
+                f"Invalid observations {observations!r}, "
+                f"expected one of {OBSERVATION_MODES}."
+            )
+        advance = self._advance
+        observe_all = observations == ALL_OBSERVATIONS
+        observe_steps = observe_all or self._stateful_observe
+        obs = None
+        observed = []
+        rewards = []
+        done = False
+        for command in iter_commands(actions):
+            reward, done = advance(command)
+            rewards.append(reward)
+            if observe_steps:
+                obs = self._observe_current_state()
+                if observe_all:
+                    observed.append(copy_observation(obs))
+            if done:
+                break
+        dones = np.zeros(len(rewards), dtype=bool)
+        dones[-1:] = done
+        if observe_all:
+            obs = stack_observations(observed) if len(observed) > 0 else None
+        elif observations == NO_OBSERVATION:
+            obs = None
+        elif not observe_steps and len(rewards) > 0:
+            obs = self._observe_current_state()
+        return obs, np.array(rewards, dtype=np.float64), dones
+
+    def _advance(self, command: Command) -> Tuple[float, bool]:
+        """
+        Do the simulation step of 'step', without observing.
+
+        :param command: the command.
+        :return: the reward, and whether the game is finished.
+        """
+        reward = self.state.step(command)
+        return reward, self.state.is_finished()
+
+    def _observe_current_state(self) -> Any:
+        """Observe the current state, timing the observation when profiling."""
+        if self._profiler is None:
+            return self.observe(self.state)
+        start = time.perf_counter_ns()
+        obs = self.observe(self.state)
+        self._profiler.record_observe(time.perf_counter_ns() - start)
+        return obs
+
     def reset(self, seed: Optional[int] = None, **_kwargs) -> Any:
         """Reset the environment."""
         self.state = self.state.reset()
@@ -786,10 +1308,67 @@ class Breakout(gym.Env, ABC):  # pylint: disable=too-many-instance-attributes
             self.viewer.reset(self.state)
         return self.observe(self.state)
 
-    def render(self, mode="human") -> None:
-        """Render the state of the environment."""
+    @property
+    def profiler(self) -> Optional[Profiler]:
+        """Get the profiler attached to the environment, if any."""
+        return self._profiler
+
+    def enable_profiling(self, profiler: Optional[Profiler] = None) -> Profiler:
+        """
+        Collect profiling statistics of the simulation and of the observations.
+
+        See 'gym_breakout_pygame.profiling' for the collected statistics.
+
+        :param profiler: the profiler; by default, a new one.
+        :return: the attached profiler.
+        """
+        self._profiler = self.state.enable_profiling(profiler)
+        return self._profiler
+
+    def disable_profiling(self) -> None:
+        """Stop collecting profiling statistics."""
+        self._profiler = None
+        self.state.disable_profiling()
+
+    def get_state(self) -> np.ndarray:
+        """
+        Get a snapshot of the game state.
+
+        :return: the snapshot record, see 'BreakoutState.snapshot'.
+        """
+        return self.state.snapshot()
+
+    def set_state(self, snapshot: Union[np.ndarray, bytes]) -> None:
+        """
+        Restore the game state from a snapshot taken with 'get_state'.
+
+        :param snapshot: the snapshot record, or its bytes.
+        """
+        self.state.restore(snapshot)
+
+    def render(self, mode="human") -> Optional[np.ndarray]:
+        """
+        Render the state of the environment.
+
+        In "rgb_array" mode, the frame is rasterized with NumPy,
+        without opening a Pygame display.
+
+        :param mode: the rendering mode, either "human" or "rgb_array".
+        :return: the (height, width, 3) frame in "rgb_array" mode, None otherwise.
+        """
+        if mode == "rgb_array":
+            if self._renderer is None:
+                # pylint: disable-next=import-outside-toplevel,cyclic-import
+                from gym_breakout_pygame import rendering
+
+                self._renderer = rendering.ArrayRenderer(self.config)
+            return self._renderer.render(self.state).copy()
+
         if self.viewer is None:
-            self.viewer = PygameViewer(self.state)
+            # pylint: disable-next=import-outside-toplevel,cyclic-import
+            from gym_breakout_pygame import viewer
+
+            self.viewer = viewer.PygameViewer(self.state)
 
         return self.viewer.render(mode=mode)
 
@@ -809,29 +1388,61 @@ class Breakout(gym.Env, ABC):  # pylint: disable=too-many-instance-attributes
 
     def play(self) -> None:
         """Do a playing session."""
-        self.reset()
-        self.render()
-        quitted = False
-        while not quitted:
-            pygame.time.wait(10)
-            cmd = 0
-            events = pygame.event.get()
-            for event in events:
-                if (
-                    event.type == pygame.KEYDOWN  # pylint: disable=no-member
-                    and event.key == pygame.K_q  # pylint: disable=no-member
-                ):
-                    quitted = True
-
-            pressed = pygame.key.get_pressed()
-            if pressed[pygame.K_LEFT]:  # pylint: disable=no-member
-                cmd = 1
-            elif pressed[pygame.K_RIGHT]:  # pylint: disable=no-member
-                cmd = 2
-            elif pressed[pygame.K_SPACE]:  # pylint: disable=no-member
-                cmd = 3
-
-            _, _, done, _ = self.step(cmd)
-            if done:
-                self.reset()
-            self.render()
+        play_with_keyboard(self)
+
+
+def play_with_keyboard(env: gym.Env) -> None:
+    """
+    Do a playing session with the keyboard, until the 'q' key is pressed.
+
+    The actions go through the 'step' method of the given environment, so that its
+    wrappers, e.g. a recorder, see them.
+
+    :param env: the Breakout environment, possibly wrapped.
+    """
+    import pygame  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+    env.reset()
+    env.render()
+    quitted = False
+    while not quitted:
+        pygame.time.wait(10)
+        cmd = 0
+        events = pygame.event.get()
+        for event in events:
+            if (
+                event.type == pygame.KEYDOWN  # pylint: disable=no-member
+                and event.key == pygame.K_q  # pylint: disable=no-member
+            ):
+                quitted = True
+
+        pressed = pygame.key.get_pressed()
+        if pressed[pygame.K_LEFT]:  # pylint: disable=no-member
+            cmd = 1
+        elif pressed[pygame.K_RIGHT]:  # pylint: disable=no-member
+            cmd = 2
+        elif pressed[pygame.K_SPACE]:  # pylint: disable=no-member
+            cmd = 3
+
+        _, _, done, _ = env.step(cmd)
+        if done:
+            env.reset()
+        env.render()
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Import the Pygame viewer lazily.
+
+    The simulation does not depend on Pygame; the viewer is still accessible
+    from this module, for backward compatibility.
+
+    :param name: the name of the attribute.
+    :return: the attribute.
+    """
+    if name == "PygameViewer":
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from gym_breakout_pygame import viewer
+
+        return viewer.PygameViewer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,210 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Deterministic evaluation of a policy over a range of seeds, in parallel.
+
+'evaluate' plays one episode per seed, resetting the environment with
+'Breakout.reset(seed=seed)'. The seeds are split in chunks that a pool of
+processes plays; in each process, up to 'batch_size' episodes are played in
+lockstep, and the policy is called once per step on the batch of their
+observations.
+
+An episode only depends on its seed and on the policy, so, for a
+deterministic policy, the returns are bit-identical whatever the number of
+workers and the batch size: the results are merged in the order of the seeds,
+and the statistics are computed on the merged arrays.
+"""
+import dataclasses
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+from gym_breakout_pygame.breakout_env import Breakout, BreakoutConfiguration
+from gym_breakout_pygame.utils import map_shards, stack_observations
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNMultiDiscrete
+
+# a policy maps a batch of observations to a batch of actions
+Policy = Callable[[Any], Any]
+
+DEFAULT_SEEDS = range(100)
+
+# the number of chunks of seeds per worker, to balance the load
+_CHUNKS_PER_WORKER = 4
+
+
+@dataclasses.dataclass(frozen=True)
+class EvaluationResult:
+    """The results of an evaluation, in the order of the seeds."""
+
+    seeds: np.ndarray
+    returns: np.ndarray
+    lengths: np.ndarray
+
+    @property
+    def mean_return(self) -> float:
+        """Get the mean return of the episodes."""
+        return float(np.mean(self.returns))
+
+    @property
+    def std_return(self) -> float:
+        """Get the standard deviation of the returns of the episodes."""
+        return float(np.std(self.returns))
+
+    @property
+    def mean_length(self) -> float:
+        """Get the mean number of steps of the episodes."""
+        return float(np.mean(self.lengths))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the results as a dictionary of lists and statistics.
+
+        :return: the seeds, returns and lengths, and their statistics.
+        """
+        return {
+            "seeds": self.seeds.tolist(),
+            "returns": self.returns.tolist(),
+            "lengths": self.lengths.tolist(),
+            "mean_return": self.mean_return,
+            "std_return": self.std_return,
+            "mean_length": self.mean_length,
+        }
+
+
+class _Evaluator:  # pylint: disable=too-few-public-methods
+    """Play chunks of seeded episodes, in lockstep, with a batched policy."""
+
+    def __init__(
+        self,
+        policy: Policy,
+        env_class: Type[Breakout],
+        config: BreakoutConfiguration,
+        batch_size: int,
+    ) -> None:
+        """Initialize the evaluator."""
+        self.policy = policy
+        self.envs = [env_class(config) for _ in range(batch_size)]
+
+    def run(self, seeds: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Play an episode per seed, and return their returns and lengths."""
+        returns = np.zeros(len(seeds), dtype=np.float64)
+        lengths = np.zeros(len(seeds), dtype=np.int64)
+        free = list(reversed(self.envs))
+        # the environment, the episode index and the last observation of each
+        # active episode
+        active: List[Tuple[Breakout, int, Any]] = []
+        next_episode = 0
+        while True:
+            while len(free) > 0 and next_episode < len(seeds):
+                env = free.pop()
+                obs = env.reset(seed=int(seeds[next_episode]))
+                active.append((env, next_episode, obs))
+                next_episode += 1
+            if len(active) == 0:
+                return returns, lengths
+            actions = np.asarray(
+                self.policy(stack_observations([obs for _, _, obs in active]))
+            )
+            if actions.shape[:1] != (len(active),):
+                raise ValueError(
+                    f"The policy returned {actions.shape[:1]} actions"
+                    f" for {len(active)} observations."
+                )
+            still_active = []
+            for (env, episode, _), action in zip(active, actions.tolist()):
+                obs, reward, done, _ = env.step(action)
+                returns[episode] += reward
+                lengths[episode] += 1
+                if done:
+                    free.append(env)
+                else:
+                    still_active.append((env, episode, obs))
+            active = still_active
+
+
+_EVALUATOR: Optional[_Evaluator] = None
+
+
+def _init_worker(
+    policy: Policy,
+    env_class: Type[Breakout],
+    config: BreakoutConfiguration,
+    batch_size: int,
+) -> None:
+    """Initialize the evaluator of a worker process."""
+    global _EVALUATOR  # pylint: disable=global-statement
+    _EVALUATOR = _Evaluator(policy, env_class, config, batch_size)
+
+
+def _evaluate_chunk(seeds: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Evaluate a chunk of seeds in a worker process."""
+    assert _EVALUATOR is not None, "Worker not initialized."
+    return _EVALUATOR.run(seeds)
+
+
+def evaluate(  # pylint: disable=too-many-arguments
+    policy: Policy,
+    config: Optional[BreakoutConfiguration] = None,
+    seeds: Sequence[int] = DEFAULT_SEEDS,
+    env_class: Type[Breakout] = BreakoutNMultiDiscrete,
+    num_workers: Optional[int] = 1,
+    batch_size: int = 32,
+) -> EvaluationResult:
+    """
+    Evaluate a policy on one episode per seed.
+
+    With more than one worker, the policy, the environment class and the
+    configuration are pickled to the worker processes: the policy must be a
+    module-level function or a picklable object.
+
+    :param policy: the policy; it takes the batch of the observations of the
+        active episodes (see 'utils.stack_observations') and returns one action each.
+    :param config: the game configuration; by default, the default one.
+    :param seeds: the seeds of the episodes, e.g. a range.
+    :param env_class: the environment class, that determines the observations.
+    :param num_workers: the number of processes; None for one per CPU, 1 to
+        evaluate in the current process.
+    :param batch_size: the maximum number of episodes played in lockstep by a
+        process.
+    :return: the returns and the lengths of the episodes, in the order of the
+        seeds.
+    """
+    if len(seeds) == 0:
+        raise ValueError("At least one seed is required.")
+    if batch_size <= 0:
+        raise ValueError(f"The batch size must be positive, got {batch_size}.")
+    config = BreakoutConfiguration() if config is None else config
+    results = map_shards(
+        _evaluate_chunk,
+        seeds,
+        num_workers,
+        shards_per_worker=_CHUNKS_PER_WORKER,
+        initializer=_init_worker,
+        initargs=(policy, env_class, config, batch_size),
+    )
+    return EvaluationResult(
+        seeds=np.asarray(seeds, dtype=np.int64),
+        returns=np.concatenate([returns for returns, _ in results]),
+        lengths=np.concatenate([lengths for _, lengths in results]),
+    )
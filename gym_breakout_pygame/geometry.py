@@ -0,0 +1,90 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Geometric primitives used by the simulation, independent from Pygame."""
+from typing import Iterator
+
+
+class Rect:
+    """
+    An axis-aligned rectangle with integer coordinates.
+
+    It mirrors the subset of 'pygame.Rect' used by the game: the coordinates are
+    truncated to integers, and rectangles with zero width or height never
+    collide. Sizes are assumed to be non-negative.
+
+    The rectangle is a sequence of four numbers, so it can be passed to the
+    Pygame drawing functions.
+    """
+
+    __slots__ = ("x", "y", "w", "h")
+
+    def __init__(self, x: float, y: float, w: float, h: float) -> None:
+        """Initialize the rectangle."""
+        self.x = int(x)  # pylint: disable=invalid-name
+        self.y = int(y)  # pylint: disable=invalid-name
+        self.w = int(w)  # pylint: disable=invalid-name
+        self.h = int(h)  # pylint: disable=invalid-name
+
+    def update(self, x: float, y: float, w: float, h: float) -> None:
+        """Set position and size of the rectangle in place."""
+        self.x = int(x)
+        self.y = int(y)
+        self.w = int(w)
+        self.h = int(h)
+
+    def colliderect(self, other: "Rect") -> bool:
+        """Test whether two rectangles overlap."""
+        return (
+            self.w > 0
+            and self.h > 0
+            and other.w > 0
+            and other.h > 0
+            and self.x < other.x + other.w
+            and other.x < self.x + self.w
+            and self.y < other.y + other.h
+            and other.y < self.y + self.h
+        )
+
+    def __len__(self) -> int:
+        """Get the number of components of the rectangle."""
+        return 4
+
+    def __getitem__(self, index: int) -> int:
+        """Get the components of the rectangle, in the order (x, y, w, h)."""
+        return (self.x, self.y, self.w, self.h)[index]
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the components of the rectangle."""
+        return iter((self.x, self.y, self.w, self.h))
+
+    def __eq__(self, other: object) -> bool:
+        """Compare two rectangles."""
+        try:
+            return tuple(self) == tuple(other)  # type: ignore
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        """Get the string representation."""
+        return f"Rect({self.x}, {self.y}, {self.w}, {self.h})"
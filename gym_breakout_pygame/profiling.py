@@ -0,0 +1,173 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Opt-in instrumentation of the Breakout simulation.
+
+A 'Profiler' collects, in nanoseconds, the time spent in each phase of a
+simulation step (see 'PHASES') and in the construction of the observations,
+together with the number of frames simulated by the skipper for each
+environment step. The statistics are available as a dictionary (see
+'Profiler.snapshot'), and can be appended periodically to a JSON-lines file.
+
+Attach a profiler with 'Breakout.enable_profiling' (or
+'BreakoutState.enable_profiling' for the bare simulation). When no profiler is
+attached, the simulation only pays an attribute check per step.
+"""
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# the phases of 'BreakoutState.step', in order
+PHASES = ("update", "wall", "paddle", "bricks", "bullet", "reward")
+OBSERVE = "observe"
+
+# the histograms have a bucket for each power of two, up to ~ 2 ** 63 ns
+NB_BUCKETS = 64
+
+
+class TimeStats:
+    """Statistics of the durations of a timed section."""
+
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "histogram")
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        # bucket i counts the durations in [2 ** (i - 1), 2 ** i) nanoseconds
+        self.histogram: List[int] = [0] * NB_BUCKETS
+
+    def add(self, duration_ns: int) -> None:
+        """Add a duration, in nanoseconds."""
+        if self.count == 0 or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+        self.count += 1
+        self.total_ns += duration_ns
+        self.histogram[min(duration_ns.bit_length(), NB_BUCKETS - 1)] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the statistics as a dictionary.
+
+        :return: the count, total, mean, min and max durations, and the non-empty
+            buckets of the histogram, by their upper bound in nanoseconds.
+        """
+        return {
+            "count": self.count,
+            "total_ns": self.total_ns,
+            "mean_ns": self.total_ns / self.count if self.count > 0 else 0.0,
+            "min_ns": self.min_ns,
+            "max_ns": self.max_ns,
+            "histogram": {
+                str(1 << index): count
+                for index, count in enumerate(self.histogram)
+                if count > 0
+            },
+        }
+
+
+class Profiler:
+    """Collect the profiling statistics of a Breakout simulation."""
+
+    def __init__(
+        self, dump_path: Optional[Union[str, Path]] = None, dump_every: int = 10000
+    ) -> None:
+        """
+        Initialize the profiler.
+
+        :param dump_path: if given, the snapshots are appended to this file,
+            one JSON object per line, every 'dump_every' frames.
+        :param dump_every: the number of simulated frames between two dumps.
+        """
+        assert dump_every > 0, "The dump period must be positive."
+        self.dump_path = None if dump_path is None else Path(dump_path)
+        self.dump_every = dump_every
+        self.timers: Dict[str, TimeStats] = {}
+        self.skipper_iterations: Dict[int, int] = {}
+        self.frames = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset the statistics."""
+        self.timers = {name: TimeStats() for name in (*PHASES, OBSERVE)}
+        self.skipper_iterations = {}
+        self.frames = 0
+
+    def record_frame(self, timestamps: List[int]) -> None:
+        """
+        Record the durations of the phases of a simulation step.
+
+        :param timestamps: the times, in nanoseconds, at the start of the step
+            and at the end of each phase.
+        """
+        start = timestamps[0]
+        for name, end in zip(PHASES, timestamps[1:]):
+            self.timers[name].add(end - start)
+            start = end
+        self.frames += 1
+        if self.dump_path is not None and self.frames % self.dump_every == 0:
+            self.dump()
+
+    def record_observe(self, duration_ns: int) -> None:
+        """Record the duration of the construction of an observation."""
+        self.timers[OBSERVE].add(duration_ns)
+
+    def record_skipper_iterations(self, iterations: int) -> None:
+        """Record the number of frames simulated for an environment step."""
+        self.skipper_iterations[iterations] = (
+            self.skipper_iterations.get(iterations, 0) + 1
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the statistics collected so far.
+
+        :return: a JSON-serializable dictionary with the number of frames, the
+            statistics of each timer, and the number of environment steps by number
+            of skipper iterations.
+        """
+        return {
+            "frames": self.frames,
+            "timers": {name: stats.to_dict() for name, stats in self.timers.items()},
+            "skipper_iterations": {
+                str(iterations): count
+                for iterations, count in sorted(self.skipper_iterations.items())
+            },
+        }
+
+    def dump(self, path: Optional[Union[str, Path]] = None) -> None:
+        """
+        Append a snapshot of the statistics to a JSON-lines file.
+
+        :param path: the file; by default, the one given at construction.
+        """
+        path = self.dump_path if path is None else Path(path)
+        assert path is not None, "No dump file given."
+        record = {"timestamp": time.time(), **self.snapshot()}
+        with path.open("a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
@@ -0,0 +1,323 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Record the frames of a Breakout environment in the background.
+
+The 'FrameRecorder' wrapper renders a frame with the NumPy renderer after each
+reset and step, and hands a copy of it to a worker thread through a bounded
+queue; the worker encodes the frames and writes them to disk with a
+'FrameWriter':
+
+- 'RawFrameWriter': the raw uint8 frames, in a memory-mapped file;
+- 'PngFrameWriter': one PNG image per frame, encoded with Pygame;
+- 'ImageioFrameWriter': a GIF or MP4 video, encoded with the optional
+  'imageio' package (and 'imageio-ffmpeg' for MP4).
+
+When the queue is full, the wrapper applies the overflow policy: wait for a free
+slot, at most for a given timeout, or drop the newest or the oldest frame. With
+a timeout or a dropping policy, recording adds a bounded latency to each step.
+"""
+import json
+import queue
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Optional, Tuple, Union, cast
+
+import gym
+import numpy as np
+
+from gym_breakout_pygame.breakout_env import Breakout
+
+BLOCK = "block"
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+OVERFLOW_POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST)
+
+RAW_FRAMES_FILENAME = "frames.u8"
+RAW_META_FILENAME = "frames.json"
+
+
+class FrameWriter(ABC):
+    """Write a sequence of RGB frames; called by the worker thread only."""
+
+    @abstractmethod
+    def write(self, frame: np.ndarray) -> None:
+        """
+        Write a frame.
+
+        :param frame: the (height, width, 3) uint8 frame.
+        """
+
+    def close(self) -> None:  # noqa: B027
+        """Complete the output, and release its resources."""
+
+
+class RawFrameWriter(FrameWriter):
+    """Write the raw frames in a memory-mapped file, read by 'load_raw_frames'."""
+
+    def __init__(self, directory: Union[str, Path], initial_capacity: int = 256):
+        """
+        Initialize the writer.
+
+        :param directory: the output directory.
+        :param initial_capacity: the number of frames allocated at first; the
+            file doubles its capacity when full.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.nb_frames = 0
+        self._capacity = initial_capacity
+        self._frames: Optional[np.memmap] = None
+
+    def write(self, frame: np.ndarray) -> None:
+        """Copy the frame in the file, growing it if needed."""
+        if self._frames is None:
+            self._frames = self._map(frame.shape, grow=False)
+        elif self.nb_frames == self._capacity:
+            self._frames.flush()
+            self._capacity *= 2
+            self._frames = self._map(frame.shape, grow=True)
+        self._frames[self.nb_frames] = frame
+        self.nb_frames += 1
+
+    def _map(self, shape: Tuple[int, ...], grow: bool) -> np.memmap:
+        """Map the file with the current capacity, keeping its frames if it grows."""
+        path = self.directory / RAW_FRAMES_FILENAME
+        if not grow:
+            return np.memmap(
+                str(path), dtype=np.uint8, mode="w+", shape=(self._capacity, *shape)
+            )
+        with path.open("r+b") as file:
+            file.truncate(self._capacity * int(np.prod(shape)))
+        return np.memmap(
+            str(path), dtype=np.uint8, mode="r+", shape=(self._capacity, *shape)
+        )
+
+    def close(self) -> None:
+        """Trim the file to the written frames, and write their shape."""
+        shape: Tuple[int, ...] = ()
+        if self._frames is not None:
+            shape = self._frames.shape[1:]
+            self._frames.flush()
+            self._frames = None
+            path = self.directory / RAW_FRAMES_FILENAME
+            with path.open("r+b") as file:
+                file.truncate(self.nb_frames * int(np.prod(shape)))
+        meta = {"nb_frames": self.nb_frames, "shape": list(shape), "dtype": "uint8"}
+        (self.directory / RAW_META_FILENAME).write_text(json.dumps(meta))
+
+
+def load_raw_frames(directory: Union[str, Path]) -> np.ndarray:
+    """
+    Memory-map the frames written by 'RawFrameWriter'.
+
+    :param directory: the output directory of the writer.
+    :return: the read-only (nb_frames, height, width, 3) array of frames.
+    """
+    directory = Path(directory)
+    meta = json.loads((directory / RAW_META_FILENAME).read_text())
+    if meta["nb_frames"] == 0:
+        return np.empty((0, *meta["shape"]), dtype=np.uint8)
+    return np.memmap(
+        str(directory / RAW_FRAMES_FILENAME),
+        dtype=np.uint8,
+        mode="r",
+        shape=(meta["nb_frames"], *meta["shape"]),
+    )
+
+
+class PngFrameWriter(FrameWriter):
+    """Write each frame in a PNG image, named 'frame_000000.png' and so on."""
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        """
+        Initialize the writer.
+
+        :param directory: the output directory.
+        """
+        # pylint: disable-next=import-outside-toplevel
+        import pygame
+
+        self._pygame = pygame
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.nb_frames = 0
+
+    def write(self, frame: np.ndarray) -> None:
+        """Encode the frame in a PNG image."""
+        surface = self._pygame.surfarray.make_surface(frame.swapaxes(0, 1))
+        path = self.directory / f"frame_{self.nb_frames:06d}.png"
+        self._pygame.image.save(surface, str(path))
+        self.nb_frames += 1
+
+
+class ImageioFrameWriter(FrameWriter):
+    """Write the frames in a video, e.g. a GIF or an MP4 file, with 'imageio'."""
+
+    def __init__(self, path: Union[str, Path], fps: int = 30) -> None:
+        """
+        Initialize the writer.
+
+        :param path: the path of the video; the extension selects the format.
+        :param fps: the frames per second of the video.
+        :raises ImportError: if 'imageio' is not installed.
+        """
+        try:
+            import imageio  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise ImportError(
+                "Writing videos requires 'imageio' (and 'imageio-ffmpeg' for MP4): "
+                "pip install imageio imageio-ffmpeg"
+            ) from error
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._writer = imageio.get_writer(str(path), fps=fps)
+        self.nb_frames = 0
+
+    def write(self, frame: np.ndarray) -> None:
+        """Append the frame to the video."""
+        self._writer.append_data(frame)
+        self.nb_frames += 1
+
+    def close(self) -> None:
+        """Complete the video file."""
+        self._writer.close()
+
+
+class FrameRecorder(gym.Wrapper):  # pylint: disable=too-many-instance-attributes
+    """Record the frames of a Breakout environment, with a background writer."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        env: gym.Env,
+        writer: FrameWriter,
+        queue_size: int = 64,
+        policy: str = BLOCK,
+        timeout: Optional[float] = 0.005,
+    ) -> None:
+        """
+        Initialize the recorder, and start the worker thread.
+
+        :param env: the Breakout environment, possibly wrapped.
+        :param writer: the writer of the frames, used by the worker thread only.
+        :param queue_size: the maximum number of frames waiting to be written.
+        :param policy: what to do when the queue is full: 'block' waits for a free
+            slot, 'drop_newest' drops the new frame, 'drop_oldest' drops the
+            oldest frame in the queue.
+        :param timeout: with 'block', the maximum wait in seconds before dropping
+            the new frame; None to wait indefinitely.
+        """
+        super().__init__(env)
+        assert (
+            policy in OVERFLOW_POLICIES
+        ), f"Policy must be one of {OVERFLOW_POLICIES}."
+        self._breakout = cast(Breakout, env.unwrapped)
+        self.writer = writer
+        self.policy = policy
+        self.timeout = timeout
+        self.nb_recorded = 0
+        self.nb_dropped = 0
+        self._queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue(queue_size)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._worker = threading.Thread(
+            target=self._write_frames, name="FrameRecorder", daemon=True
+        )
+        self._worker.start()
+
+    def reset(self, **kwargs) -> Any:
+        """Reset the environment, and record the first frame."""
+        obs = self.env.reset(**kwargs)
+        self._record()
+        return obs
+
+    def step(self, action: int) -> Tuple[Any, float, bool, Any]:
+        """Do a step in the environment, and record the frame."""
+        obs, reward, done, info = self.env.step(action)
+        self._record()
+        return obs, reward, done, info
+
+    def _record(self) -> None:
+        """Hand a copy of the current frame to the worker thread."""
+        if self._error is not None:
+            raise RuntimeError("The frame writer failed.") from self._error
+        # the "rgb_array" frames are fresh arrays, owned by the queue from now on
+        frame = cast(np.ndarray, self._breakout.render(mode="rgb_array"))
+        if self.policy == DROP_OLDEST:
+            while True:
+                try:
+                    self._queue.put_nowait(frame)
+                    break
+                except queue.Full:
+                    self._drop_oldest()
+        else:
+            try:
+                if self.policy == BLOCK:
+                    self._queue.put(frame, timeout=self.timeout)
+                else:
+                    self._queue.put_nowait(frame)
+            except queue.Full:
+                self.nb_dropped += 1
+                return
+        self.nb_recorded += 1
+
+    def _drop_oldest(self) -> None:
+        """Drop the oldest frame in the queue, if the worker did not take it."""
+        try:
+            self._queue.get_nowait()
+        except queue.Empty:
+            return
+        self._queue.task_done()
+        self.nb_recorded -= 1
+        self.nb_dropped += 1
+
+    def _write_frames(self) -> None:
+        """Write the frames of the queue until the end marker."""
+        while True:
+            frame = self._queue.get()
+            try:
+                if frame is None:
+                    return
+                if self._error is None:
+                    self.writer.write(frame)
+            except Exception as error:  # pylint: disable=broad-except
+                # reported by the game thread; the queue is still drained
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until the frames in the queue are written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write the remaining frames, stop the worker and close the environment."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join()
+            self.writer.close()
+        super().close()
+        if self._error is not None:
+            raise RuntimeError("The frame writer failed.") from self._error
@@ -0,0 +1,180 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Gym registration of the Breakout environments.
+
+Importing the package registers the ids in 'ENV_IDS', so that the environments
+can be built with the standard Gym machinery, e.g.:
+
+    env = gym.make("BreakoutDictSpace-v0", brick_rows=4, fire_enabled=True)
+    envs = gym.vector.make("BreakoutNMultiDiscrete-v0", num_envs=8, copy=False)
+
+The keyword arguments that are fields of 'BreakoutConfiguration' build the game
+configuration, the others go to the environment class (e.g. 'copy' or 'dtype').
+
+The environments implement the old Gym API, where 'reset' returns the observation
+and 'step' returns (obs, reward, done, info); 'gym.make' wraps them in
+'GymApiCompatibility', which implements the API expected by Gym 0.26 and by its
+vector environments.
+"""
+import copy
+import dataclasses
+from typing import Any, Dict, Optional, Tuple, Type, cast
+
+import gym
+import numpy as np
+from gym.envs.registration import load
+
+from gym_breakout_pygame.breakout_env import Breakout, BreakoutConfiguration
+
+ENV_IDS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "BreakoutNDiscrete-v0": (
+        "gym_breakout_pygame.wrappers.normal_space:BreakoutNDiscrete",
+        {},
+    ),
+    "BreakoutNMultiDiscrete-v0": (
+        "gym_breakout_pygame.wrappers.normal_space:BreakoutNMultiDiscrete",
+        {},
+    ),
+    # the brick matrix has the dtype of its MultiBinary space, so that the
+    # observations can be batched by the vector environments
+    "BreakoutDictSpace-v0": (
+        "gym_breakout_pygame.wrappers.dict_space:BreakoutDictSpace",
+        {"dtype": np.int8},
+    ),
+    "BreakoutPixels-v0": ("gym_breakout_pygame.wrappers.pixels:BreakoutPixels", {}),
+}
+
+_CONFIG_FIELDS = frozenset(
+    field.name for field in dataclasses.fields(BreakoutConfiguration)
+)
+
+
+class GymApiCompatibility(gym.Wrapper):
+    """
+    Expose a Breakout environment with the API of Gym 0.26.
+
+    'reset' returns (obs, info) and 'step' returns (obs, reward, terminated,
+    truncated, info); an episode is truncated when it ends only because the
+    horizon of the configuration is reached.
+
+    When the environment returns borrowed observations ('copy=False'), the last
+    observation of an episode is copied, so that it survives the automatic reset
+    of the vector environments, which keep it in 'info["final_observation"]'.
+    """
+
+    def __init__(self, env: Breakout, render_mode: Optional[str] = None) -> None:
+        """
+        Initialize the wrapper.
+
+        :param env: the Breakout environment.
+        :param render_mode: the mode of 'render', "human" or "rgb_array".
+        """
+        super().__init__(env)
+        env.render_mode = render_mode
+        self._breakout = env
+        self._copy_final_observation = not getattr(env, "copy", True)
+
+    def reset(  # pylint: disable=arguments-differ
+        self, seed: Optional[int] = None, options: Optional[dict] = None
+    ) -> Tuple[Any, dict]:
+        """
+        Reset the environment.
+
+        :param seed: the seed of the random number generator of the game.
+        :param options: the options of the Gym API; unused.
+        :return: the initial observation, and an empty info dictionary.
+        """
+        del options
+        obs = self._breakout.reset(seed=seed)
+        if self.render_mode == "human":
+            self.render()
+        return obs, {}
+
+    def step(self, action: int) -> Tuple[Any, float, bool, bool, dict]:
+        """Do a step in the environment."""
+        obs, reward, done, info = self._breakout.step(action)
+        if self.render_mode == "human":
+            self.render()
+        if not done:
+            return obs, reward, False, False, info
+        if self._copy_final_observation:
+            obs = copy.deepcopy(obs)
+        truncated = not self._breakout.state.is_terminated()
+        return obs, reward, not truncated, truncated, info
+
+    def render(self, *args, **kwargs) -> Any:
+        """Render the environment, by default in the mode given at construction."""
+        if args or kwargs:
+            return self._breakout.render(*args, **kwargs)
+        return self._breakout.render(mode=self.render_mode or "human")
+
+
+def make_env(
+    env_class: str,
+    config: Optional[BreakoutConfiguration] = None,
+    render_mode: Optional[str] = None,
+    **kwargs: Any,
+) -> GymApiCompatibility:
+    """
+    Build a registered environment; this is the entry point of 'gym.make'.
+
+    :param env_class: the environment class, as 'module:name'.
+    :param config: the game configuration; by default, built from the kwargs.
+        With configuration fields in the kwargs, its horizon is derived again
+        from the new fields, unless 'horizon' is among them.
+    :param render_mode: the mode of 'render', "human" or "rgb_array".
+    :param kwargs: the fields of the configuration to set, and the keyword
+        arguments of the environment class.
+    :return: the environment, with the API of Gym 0.26.
+    """
+    config_kwargs = {
+        key: kwargs.pop(key) for key in list(kwargs) if key in _CONFIG_FIELDS
+    }
+    if config is None:
+        config = BreakoutConfiguration(**config_kwargs)
+    elif config_kwargs:
+        # the horizon of the given configuration may be derived from its grid
+        # size: it is derived again, unless it is set explicitly
+        fields = {
+            field.name: getattr(config, field.name)
+            for field in dataclasses.fields(config)
+        }
+        fields["horizon"] = None
+        config = BreakoutConfiguration(**{**fields, **config_kwargs})
+    env_cls = cast(Type[Breakout], load(env_class))
+    env = env_cls(config, **kwargs)
+    return GymApiCompatibility(env, render_mode=render_mode)
+
+
+def register_envs() -> None:
+    """Register the ids in 'ENV_IDS' in the Gym registry, if not done yet."""
+    for env_id, (env_class, kwargs) in ENV_IDS.items():
+        if env_id in gym.envs.registry:
+            continue
+        gym.register(
+            id=env_id,
+            entry_point="gym_breakout_pygame.registration:make_env",
+            kwargs={"env_class": env_class, **kwargs},
+        )
@@ -0,0 +1,231 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+A headless renderer that rasterizes the Breakout state with NumPy.
+
+The renderer does not need Pygame, an SDL display nor fonts: the game objects
+are drawn directly into a reusable (height, width, 3) uint8 buffer, with the
+same pixel coverage of the Pygame drawing primitives used by the game objects.
+The score and last command labels are not drawn.
+
+The renderer can also draw directly at a reduced resolution, optionally in
+grayscale, e.g. for pixel observations: the coordinates of the game objects are
+scaled, and each object covers at least one pixel.
+"""
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from gym_breakout_pygame.breakout_env import (
+    BreakoutConfiguration,
+    BreakoutState,
+    brick_position,
+    grey,
+    orange,
+    red,
+    white,
+)
+
+
+def circle_mask(radius: int) -> np.ndarray:
+    """
+    Compute the pixels covered by a filled circle, as drawn by 'pygame.draw.circle'.
+
+    The mask has shape (2 * radius, 2 * radius); its top-left pixel corresponds
+    to the offset (-radius, -radius) from the center of the circle.
+
+    :param radius: the radius of the circle.
+    :return: the boolean mask of the circle.
+    """
+    mask = np.zeros((2 * radius, 2 * radius), dtype=bool)
+    # same midpoint algorithm of Pygame, with the center in (radius, radius)
+    decision = 1 - radius
+    dd_f_x = 0
+    dd_f_y = -2 * radius
+    offset_x = 0
+    offset_y = radius
+    while offset_x < offset_y:
+        if decision >= 0:
+            offset_y -= 1
+            dd_f_y += 2
+            decision += dd_f_y
+        offset_x += 1
+        dd_f_x += 2
+        decision += dd_f_x + 1
+        if decision >= 0:
+            mask[radius + offset_y - 1, radius - offset_x : radius + offset_x] = True
+            mask[radius - offset_y, radius - offset_x : radius + offset_x] = True
+        mask[radius + offset_x - 1, radius - offset_y : radius + offset_y] = True
+        mask[radius - offset_x, radius - offset_y : radius + offset_y] = True
+    return mask
+
+
+def ellipse_mask(radius_x: int, radius_y: int) -> np.ndarray:
+    """
+    Compute the pixels whose center is inside an ellipse.
+
+    The mask has shape (2 * radius_y, 2 * radius_x), like 'circle_mask'.
+
+    :param radius_x: the horizontal radius of the ellipse.
+    :param radius_y: the vertical radius of the ellipse.
+    :return: the boolean mask of the ellipse.
+    """
+    rows = (np.arange(2 * radius_y) + 0.5 - radius_y) / radius_y
+    cols = (np.arange(2 * radius_x) + 0.5 - radius_x) / radius_x
+    return rows[:, np.newaxis] ** 2 + cols[np.newaxis, :] ** 2 <= 1.0
+
+
+def to_grayscale(color: Sequence[int]) -> int:
+    """
+    Convert an RGB color to a gray level, with the ITU-R BT.601 luma weights.
+
+    :param color: the RGB color.
+    :return: the gray level.
+    """
+    red_level, green_level, blue_level = color
+    return round(0.299 * red_level + 0.587 * green_level + 0.114 * blue_level)
+
+
+class ArrayRenderer:  # pylint: disable=too-many-instance-attributes
+    """Render the Breakout state into a NumPy array, without Pygame."""
+
+    def __init__(
+        self,
+        breakout_config: BreakoutConfiguration,
+        size: Optional[Tuple[int, int]] = None,
+        grayscale: bool = False,
+    ) -> None:
+        """
+        Initialize the renderer.
+
+        :param breakout_config: the game configuration.
+        :param size: the (height, width) of the frames; by default, the size of
+            the window, with the same pixels of Pygame.
+        :param grayscale: whether the frames have one gray channel instead of RGB.
+        """
+        self.config = breakout_config
+        height, width = (
+            (self.config.win_height, self.config.win_width) if size is None else size
+        )
+        self._scale_x = width / self.config.win_width
+        self._scale_y = height / self.config.win_height
+        self._scaled = size is not None
+        self._frame = np.empty(
+            (height, width) if grayscale else (height, width, 3), dtype=np.uint8
+        )
+        self._colors = {
+            name: to_grayscale(color) if grayscale else color
+            for name, color in [
+                ("white", white),
+                ("grey", grey),
+                ("orange", orange),
+                ("red", red),
+            ]
+        }
+        # copying a full background is much faster than broadcasting a color
+        self._background = np.empty_like(self._frame)
+        self._background[:] = self._colors["white"]
+        radius = self.config.ball_radius
+        if self._scaled:
+            self._ball_radius_x = max(1, round(radius * self._scale_x))
+            self._ball_radius_y = max(1, round(radius * self._scale_y))
+            self._ball_mask = ellipse_mask(self._ball_radius_x, self._ball_radius_y)
+        else:
+            self._ball_radius_x = self._ball_radius_y = radius
+            self._ball_mask = circle_mask(radius)
+
+    @property
+    def frame(self) -> np.ndarray:
+        """Get the buffer of the last rendered frame."""
+        return self._frame
+
+    def render(self, state: BreakoutState) -> np.ndarray:
+        """
+        Render a frame of the game.
+
+        The returned array is the internal buffer of the renderer, and it is
+        overwritten at the next call.
+
+        :param state: the state of the game.
+        :return: the (height, width, 3) uint8 frame, or (height, width) in grayscale.
+        """
+        np.copyto(self._frame, self._background)
+        brick_color = self._colors["grey"]
+        grid = state.brick_grid
+        width, height = grid.brick_width, grid.brick_height
+        for i, j in grid.positions():
+            x_pos, y_pos = brick_position(i, j, width, height, grid.brick_xdistance)
+            self._draw_rect(x_pos, y_pos, width, height, brick_color)
+        paddle = state.paddle
+        self._draw_rect(paddle.x, paddle.y, paddle.width, paddle.height, brick_color)
+        ball = state.ball
+        if ball.radius > 0:
+            self._draw_ball(ball.x, ball.y)
+        bullet = state.bullet
+        if bullet.speed_y < 0:
+            self._draw_rect(
+                bullet.x, bullet.y, bullet.width, bullet.height, self._colors["red"]
+            )
+        return self._frame
+
+    def _draw_rect(  # pylint: disable=too-many-arguments
+        self,
+        x_pos: float,
+        y_pos: float,
+        width: int,
+        height: int,
+        color: Union[int, list],
+    ) -> None:
+        """Draw a filled rectangle; coordinates are truncated as in 'pygame.Rect'."""
+        if self._scaled:
+            left = int(x_pos * self._scale_x)
+            top = int(y_pos * self._scale_y)
+            right = max(int((x_pos + width) * self._scale_x), left + 1)
+            bottom = max(int((y_pos + height) * self._scale_y), top + 1)
+        else:
+            left, top = int(x_pos), int(y_pos)
+            right, bottom = left + width, top + height
+        clip_left, clip_top = max(left, 0), max(top, 0)
+        clip_right = min(right, self._frame.shape[1])
+        clip_bottom = min(bottom, self._frame.shape[0])
+        if clip_left < clip_right and clip_top < clip_bottom:
+            self._frame[clip_top:clip_bottom, clip_left:clip_right] = color
+
+    def _draw_ball(self, x_pos: float, y_pos: float) -> None:
+        """Draw the ball centered in (x_pos, y_pos)."""
+        if self._scaled:
+            x_pos, y_pos = x_pos * self._scale_x, y_pos * self._scale_y
+        center_x, center_y = int(x_pos), int(y_pos)
+        left, top = center_x - self._ball_radius_x, center_y - self._ball_radius_y
+        clip_left, clip_top = max(left, 0), max(top, 0)
+        clip_right = min(center_x + self._ball_radius_x, self._frame.shape[1])
+        clip_bottom = min(center_y + self._ball_radius_y, self._frame.shape[0])
+        if clip_left >= clip_right or clip_top >= clip_bottom:
+            return
+        mask = self._ball_mask[
+            clip_top - top : clip_bottom - top, clip_left - left : clip_right - left
+        ]
+        self._frame[clip_top:clip_bottom, clip_left:clip_right][mask] = self._colors[
+            "orange"
+        ]
@@ -0,0 +1,222 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Headless rollouts of the environments, in parallel across processes.
+
+'benchmark_rollouts' plays episodes under a uniformly random policy, without
+rendering, and measures the throughput of the environment together with the
+latency of each step. The episodes are split in contiguous shards of seeds,
+one per worker process; the episode of seed 'seed' is fully determined by it,
+so the returns do not depend on the number of workers.
+"""
+import dataclasses
+import functools
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, cast
+
+import numpy as np
+from gym.spaces import Discrete
+
+from gym_breakout_pygame.breakout_env import Breakout, BreakoutConfiguration
+from gym_breakout_pygame.utils import map_shards
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import (
+    BreakoutNDiscrete,
+    BreakoutNMultiDiscrete,
+)
+
+# the environments, by their name on the command line
+ENV_CLASSES: Dict[str, Type[Breakout]] = {
+    "ndiscrete": BreakoutNDiscrete,
+    "multidiscrete": BreakoutNMultiDiscrete,
+    "dict": BreakoutDictSpace,
+}
+PERCENTILES = (50.0, 90.0, 99.0)
+
+# the returns, the lengths and the step latencies in nanoseconds of a shard
+_ShardResult = Tuple[List[float], List[int], np.ndarray]
+
+
+@dataclasses.dataclass(frozen=True)
+class RolloutStats:  # pylint: disable=too-many-instance-attributes
+    """Statistics of a run of rollouts."""
+
+    env: str
+    episodes: int
+    workers: int
+    steps: int
+    seconds: float
+    mean_return: float
+    mean_length: float
+    # the percentiles of the step latency, in microseconds
+    latency_us: Dict[str, float]
+
+    @property
+    def steps_per_second(self) -> float:
+        """Get the number of environment steps per second of wall time."""
+        return self.steps / self.seconds
+
+    @property
+    def episodes_per_second(self) -> float:
+        """Get the number of episodes per second of wall time."""
+        return self.episodes / self.seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the statistics as a dictionary.
+
+        :return: the fields and the throughputs.
+        """
+        return {
+            **dataclasses.asdict(self),
+            "steps_per_second": self.steps_per_second,
+            "episodes_per_second": self.episodes_per_second,
+        }
+
+    def format_table(self) -> str:
+        """
+        Format the statistics as a table.
+
+        :return: the table.
+        """
+        rows = [
+            ("steps/s", self.steps_per_second, "steps/s"),
+            ("episodes/s", self.episodes_per_second, "episodes/s"),
+            ("mean return", self.mean_return, ""),
+            ("mean length", self.mean_length, "steps"),
+            *(
+                (f"latency {name}", value, "us")
+                for name, value in self.latency_us.items()
+            ),
+        ]
+        header = (
+            f"{self.env}: {self.episodes} episodes, {self.steps} steps,"
+            f" {self.workers} workers, {self.seconds:.2f} s"
+        )
+        width = max(len(name) for name, _, _ in rows)
+        return "\n".join(
+            [header]
+            + [
+                f"{name:<{width}}  {value:>12.2f} {unit}".rstrip()
+                for name, value, unit in rows
+            ]
+        )
+
+
+def run_episodes(
+    env_name: str, config: BreakoutConfiguration, seeds: Sequence[int]
+) -> _ShardResult:
+    """
+    Play an episode under a random policy for each seed, timing every step.
+
+    The seed is used both for the environment and for the actions.
+
+    :param env_name: the name of the environment, a key of 'ENV_CLASSES'.
+    :param config: the game configuration.
+    :param seeds: the seeds of the episodes.
+    :return: the returns and the lengths of the episodes, and the latencies of
+        all the steps, in nanoseconds.
+    """
+    env = ENV_CLASSES[env_name](config)
+    nb_actions = int(cast(Discrete, env.action_space).n)
+    returns: List[float] = []
+    lengths: List[int] = []
+    latencies: List[int] = []
+    clock = time.perf_counter_ns
+    for seed in seeds:
+        env.reset(seed=seed)
+        rng = np.random.default_rng(seed)
+        # draw the actions in chunks, to keep the sampling out of the timings
+        actions: List[int] = []
+        total_reward = 0.0
+        done = False
+        nb_steps = 0
+        while not done:
+            if nb_steps == len(actions):
+                actions.extend(rng.integers(nb_actions, size=256).tolist())
+            start = clock()
+            _, reward, done, _ = env.step(actions[nb_steps])
+            latencies.append(clock() - start)
+            total_reward += reward
+            nb_steps += 1
+        returns.append(total_reward)
+        lengths.append(nb_steps)
+    env.close()
+    return returns, lengths, np.array(latencies, dtype=np.int64)
+
+
+def benchmark_rollouts(
+    env_name: str,
+    config: Optional[BreakoutConfiguration] = None,
+    episodes: int = 100,
+    workers: Optional[int] = 1,
+    seed: int = 0,
+) -> RolloutStats:
+    """
+    Play episodes under a random policy in parallel, and measure them.
+
+    The wall time includes the start of the worker processes.
+
+    :param env_name: the name of the environment, a key of 'ENV_CLASSES'.
+    :param config: the game configuration; by default, the default one.
+    :param episodes: the number of episodes, with seeds from 'seed' onward.
+    :param workers: the number of processes; None for one per CPU, 1 to play
+        in the current process.
+    :param seed: the seed of the first episode.
+    :return: the statistics of the rollouts.
+    """
+    if env_name not in ENV_CLASSES:
+        raise ValueError(
+            f"Unknown environment {env_name!r}, expected one of {sorted(ENV_CLASSES)}."
+        )
+    if episodes <= 0:
+        raise ValueError(f"The number of episodes must be positive, got {episodes}.")
+    config = BreakoutConfiguration() if config is None else config
+    workers = min(workers or os.cpu_count() or 1, episodes)
+    start = time.perf_counter()
+    results = map_shards(
+        functools.partial(run_episodes, env_name, config),
+        range(seed, seed + episodes),
+        workers,
+    )
+    seconds = time.perf_counter() - start
+
+    returns = [value for shard_returns, _, _ in results for value in shard_returns]
+    lengths = [value for _, shard_lengths, _ in results for value in shard_lengths]
+    latencies = np.concatenate([shard_latencies for _, _, shard_latencies in results])
+    percentiles = np.percentile(latencies, PERCENTILES) / 1000.0
+    return RolloutStats(
+        env=env_name,
+        episodes=episodes,
+        workers=workers,
+        steps=int(latencies.size),
+        seconds=seconds,
+        mean_return=float(np.mean(returns)),
+        mean_length=float(np.mean(lengths)),
+        latency_us={
+            f"p{percentile:g}": float(value)
+            for percentile, value in zip(PERCENTILES, percentiles)
+        },
+    )
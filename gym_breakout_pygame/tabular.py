@@ -0,0 +1,532 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Exact transition model of 'BreakoutNDiscrete', for tabular reinforcement learning.
+
+The model is built by enumerating the game states reachable from the reset,
+with the same steps of the environment (i.e. including the skipper). The states
+are the underlying game states, labelled with their encoded observation; the
+episode end is an absorbing terminal state.
+
+Only deterministic configurations are supported. The only random event left,
+the direction of a vertical ball bouncing on the top wall, is enumerated with
+its probabilities. The horizon of the configuration is ignored: the steps
+counter would make every state unique.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
+
+import numpy as np
+from gym.spaces import Discrete
+
+from gym_breakout_pygame.breakout_env import (
+    BreakoutConfiguration,
+    BreakoutState,
+    RandomEventGenerator,
+    snapshot_dtype,
+)
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNDiscrete
+
+MODEL_VERSION = 1
+TERMINAL_OBSERVATION = -1
+# a horizon that is never reached
+_NO_HORIZON = 2**62
+# the snapshot fields that do not affect the dynamics
+_IGNORED_FIELDS = (
+    "score",
+    "steps",
+    "last_command",
+    "rng_state",
+    "rng_inc",
+    "rng_has_uint32",
+    "rng_uinteger",
+)
+
+# (action, probability, reward, done, next state key)
+Outcome = Tuple[int, float, float, bool, bytes]
+
+
+def default_cache_dir() -> Path:
+    """Get the default directory of the cached models."""
+    return Path.home() / ".cache" / "gym_breakout_pygame" / "models"
+
+
+class _WallHitChoices(RandomEventGenerator):
+    """A random event generator that follows a given sequence of wall-hit choices."""
+
+    def __init__(self) -> None:
+        """Initialize the generator."""
+        super().__init__(0)
+        self.choices: List[float] = []
+        self.nb_calls = 0
+
+    def perturbate_ball_speed_after_wall_hit(self, state: BreakoutState) -> None:
+        """Set the horizontal direction of the ball to the next choice, right by default."""
+        choice = (
+            self.choices[self.nb_calls] if self.nb_calls < len(self.choices) else 1.0
+        )
+        self.nb_calls += 1
+        state.ball.speed_x = choice
+
+
+class _Expander:
+    """Compute the outcomes of the actions from a game state."""
+
+    def __init__(self, config: BreakoutConfiguration) -> None:
+        """Initialize the expander."""
+        self.config = _model_config(config)
+        self.env = BreakoutNDiscrete(self.config)
+        self.generator = _WallHitChoices()
+        self.env.state = BreakoutState(self.config, self.generator)
+        self.nb_actions = int(cast(Discrete, self.env.action_space).n)
+        self.dtype = snapshot_dtype(self.config)
+
+    def initial_key(self) -> bytes:
+        """Get the key of the game state after the reset."""
+        self.env.state = BreakoutState(self.config, self.generator)
+        return _state_key(self.env.get_state())
+
+    def expand(self, key: bytes) -> Tuple[int, List[Outcome]]:
+        """
+        Get the observation of a state, and the outcomes of every action.
+
+        :param key: the key of the state.
+        :return: the encoded observation, and the outcomes.
+        """
+        record = np.frombuffer(key, dtype=self.dtype)[0]
+        self.env.set_state(record)
+        observation = self.env.observe(self.env.state)
+        outcomes: List[Outcome] = []
+        for action in range(self.nb_actions):
+            self._expand_choices(record, action, [], outcomes)
+        return observation, outcomes
+
+    def _expand_choices(
+        self,
+        record: np.ndarray,
+        action: int,
+        prefix: List[float],
+        outcomes: List[Outcome],
+    ) -> None:
+        """Step with every sequence of wall-hit choices starting with a prefix."""
+        generator = self.generator
+        generator.choices = prefix
+        generator.nb_calls = 0
+        self.env.set_state(record)
+        _, reward, done, _ = self.env.step(action)
+        nb_calls = generator.nb_calls
+        next_key = b"" if done else _state_key(self.env.get_state())
+        outcomes.append((action, 0.5**nb_calls, reward, done, next_key))
+        choices = prefix + [1.0] * (nb_calls - len(prefix))
+        for index in range(len(prefix), nb_calls):
+            self._expand_choices(record, action, choices[:index] + [-1.0], outcomes)
+
+
+_EXPANDER: Optional[_Expander] = None
+
+
+def _init_worker(config: BreakoutConfiguration) -> None:
+    """Initialize the expander of a worker process."""
+    global _EXPANDER  # pylint: disable=global-statement
+    _EXPANDER = _Expander(config)
+
+
+def _expand_batch(keys: List[bytes]) -> List[Tuple[int, List[Outcome]]]:
+    """Expand a batch of states in a worker process."""
+    assert _EXPANDER is not None, "Worker not initialized."
+    return [_EXPANDER.expand(key) for key in keys]
+
+
+def _model_config(config: BreakoutConfiguration) -> BreakoutConfiguration:
+    """Check the configuration, and remove the horizon."""
+    assert config.deterministic, "Only deterministic configurations are supported."
+    # without the ball, the skipper never ends a step
+    assert config.ball_enabled, "The ball must be enabled."
+    return dataclasses.replace(config, horizon=_NO_HORIZON)
+
+
+def _state_key(record: np.ndarray) -> bytes:
+    """Get the key of a game state, without the fields that do not affect the dynamics."""
+    record = record.copy()
+    for name in _IGNORED_FIELDS:
+        record[name] = 0
+    return record.tobytes()
+
+
+@dataclasses.dataclass
+class TransitionModel:  # pylint: disable=too-many-instance-attributes
+    """
+    The transition model of 'BreakoutNDiscrete', in coordinate format.
+
+    The entry k of the transition arrays is the transition from the state
+    'sources[k]' to the state 'targets[k]' with the action 'actions[k]', with
+    probability 'probabilities[k]' and expected reward 'rewards[k]'.
+    """
+
+    config: BreakoutConfiguration
+    states: np.ndarray
+    observations: np.ndarray
+    initial_state: int
+    terminal_state: int
+    nb_actions: int
+    sources: np.ndarray
+    actions: np.ndarray
+    targets: np.ndarray
+    probabilities: np.ndarray
+    rewards: np.ndarray
+
+    @property
+    def nb_states(self) -> int:
+        """Get the number of states, terminal state included."""
+        return len(self.observations)
+
+    def expected_rewards(self) -> np.ndarray:
+        """
+        Get the expected reward of each state and action.
+
+        :return: the (nb_states, nb_actions) array of expected rewards.
+        """
+        return np.bincount(
+            self.sources * self.nb_actions + self.actions,
+            weights=self.probabilities * self.rewards,
+            minlength=self.nb_states * self.nb_actions,
+        ).reshape(self.nb_states, self.nb_actions)
+
+    def to_csr(self) -> List[Any]:
+        """
+        Get the transition matrices in the SciPy CSR format (SciPy is required).
+
+        :return: for each action, the (nb_states, nb_states) transition matrix.
+        """
+        from scipy import sparse  # pylint: disable=import-outside-toplevel
+
+        result = []
+        for action in range(self.nb_actions):
+            mask = self.actions == action
+            result.append(
+                sparse.csr_matrix(
+                    (
+                        self.probabilities[mask],
+                        (self.sources[mask], self.targets[mask]),
+                    ),
+                    shape=(self.nb_states, self.nb_states),
+                )
+            )
+        return result
+
+    def observation_groups(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Group the states by encoded observation.
+
+        :return: the distinct observations, and the group index of each state.
+        """
+        return np.unique(self.observations, return_inverse=True)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save the model in a NumPy '.npz' file.
+
+        :param path: the path of the file.
+        """
+        arrays = {
+            field.name: getattr(self, field.name)
+            for field in dataclasses.fields(self)
+            if field.name != "config"
+        }
+        np.savez(
+            path,
+            config=np.array(json.dumps(dataclasses.asdict(self.config))),
+            **arrays,
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TransitionModel":
+        """
+        Load a model saved with 'save'.
+
+        :param path: the path of the file.
+        :return: the model.
+        """
+        with np.load(path) as data:
+            arrays: Dict[str, Any] = {name: data[name] for name in data.files}
+        config = BreakoutConfiguration(**json.loads(str(arrays.pop("config"))))
+        for name in ("initial_state", "terminal_state", "nb_actions"):
+            arrays[name] = int(arrays[name])
+        return cls(config=config, **arrays)
+
+
+class _Enumeration:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """The states and transitions enumerated so far."""
+
+    def __init__(self, initial_key: bytes) -> None:
+        """Initialize the enumeration from the initial state."""
+        self.indices: Dict[bytes, int] = {initial_key: 0}
+        self.keys = [initial_key]
+        self.observations: List[int] = []
+        self.sources: List[int] = []
+        self.actions: List[int] = []
+        self.target_keys: List[bytes] = []
+        self.probabilities: List[float] = []
+        self.rewards: List[float] = []
+
+    def add(self, observation: int, outcomes: List[Outcome]) -> List[bytes]:
+        """
+        Add the next expanded state, in order of discovery.
+
+        :param observation: the encoded observation of the state.
+        :param outcomes: the outcomes of the actions from the state.
+        :return: the keys of the newly discovered states.
+        """
+        source = len(self.observations)
+        self.observations.append(observation)
+        new_keys = []
+        # merge the outcomes with the same action and next state
+        merged: Dict[Tuple[int, bytes], List[float]] = {}
+        for action, probability, reward, done, next_key in outcomes:
+            entry = merged.setdefault((action, next_key), [0.0, 0.0])
+            entry[0] += probability
+            entry[1] += probability * reward
+            if not done and next_key not in self.indices:
+                self.indices[next_key] = len(self.keys)
+                self.keys.append(next_key)
+                new_keys.append(next_key)
+        for (action, next_key), (probability, total_reward) in merged.items():
+            self.sources.append(source)
+            self.actions.append(action)
+            self.target_keys.append(next_key)
+            self.probabilities.append(probability)
+            self.rewards.append(total_reward / probability)
+        return new_keys
+
+    def to_model(
+        self, config: BreakoutConfiguration, expander: _Expander
+    ) -> TransitionModel:
+        """
+        Build the model, with the terminal state after the enumerated ones.
+
+        :param config: the game configuration.
+        :param expander: the expander used in the enumeration.
+        :return: the transition model.
+        """
+        terminal_state = len(self.keys)
+        nb_actions = expander.nb_actions
+        terminal_loop = [terminal_state] * nb_actions
+        targets = [self.indices.get(key, terminal_state) for key in self.target_keys]
+        return TransitionModel(
+            config=config,
+            states=np.frombuffer(b"".join(self.keys), dtype=expander.dtype).copy(),
+            observations=np.array(
+                self.observations + [TERMINAL_OBSERVATION], dtype=np.int64
+            ),
+            initial_state=0,
+            terminal_state=terminal_state,
+            nb_actions=nb_actions,
+            sources=np.array(self.sources + terminal_loop, dtype=np.int64),
+            actions=np.array(self.actions + list(range(nb_actions)), dtype=np.int64),
+            targets=np.array(targets + terminal_loop, dtype=np.int64),
+            probabilities=np.array(self.probabilities + [1.0] * nb_actions),
+            rewards=np.array(self.rewards + [0.0] * nb_actions),
+        )
+
+
+def build_transition_model(
+    config: BreakoutConfiguration,
+    num_workers: Optional[int] = 1,
+    batch_size: int = 512,
+) -> TransitionModel:
+    """
+    Build the transition model by enumerating the reachable states.
+
+    The states are explored breadth-first; the states of each level are
+    expanded in parallel by a pool of processes.
+
+    :param config: the game configuration; it must be deterministic.
+    :param num_workers: the number of processes; None for one per CPU, 1 to
+        expand the states in the current process.
+    :param batch_size: the number of states sent to a process at a time.
+    :return: the transition model.
+    """
+    expander = _Expander(config)
+    num_workers = num_workers or os.cpu_count() or 1
+    executor = (
+        ProcessPoolExecutor(num_workers, initializer=_init_worker, initargs=(config,))
+        if num_workers > 1
+        else None
+    )
+    enumeration = _Enumeration(expander.initial_key())
+    frontier = list(enumeration.keys)
+    try:
+        while len(frontier) > 0:
+            batches = [
+                frontier[start : start + batch_size]
+                for start in range(0, len(frontier), batch_size)
+            ]
+            results = (
+                executor.map(_expand_batch, batches)
+                if executor is not None
+                else ([expander.expand(key) for key in batch] for batch in batches)
+            )
+            frontier = [
+                new_key
+                for batch_results in results
+                for observation, outcomes in batch_results
+                for new_key in enumeration.add(observation, outcomes)
+            ]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return enumeration.to_model(config, expander)
+
+
+def cache_key(config: BreakoutConfiguration) -> str:
+    """
+    Get the key of the cached model of a configuration.
+
+    :param config: the game configuration.
+    :return: a hexadecimal digest of the configuration, horizon excluded.
+    """
+    fields = dataclasses.asdict(config)
+    fields.pop("horizon")
+    fields["model_version"] = MODEL_VERSION
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+def load_or_build_transition_model(
+    config: BreakoutConfiguration,
+    cache_dir: Optional[Union[str, Path]] = None,
+    num_workers: Optional[int] = None,
+) -> TransitionModel:
+    """
+    Load the transition model of a configuration from the cache, or build it.
+
+    :param config: the game configuration.
+    :param cache_dir: the cache directory; by default, 'default_cache_dir()'.
+    :param num_workers: the number of processes used to build the model.
+    :return: the transition model.
+    """
+    cache_dir = default_cache_dir() if cache_dir is None else Path(cache_dir)
+    path = cache_dir / f"{cache_key(config)}.npz"
+    if path.exists():
+        return TransitionModel.load(path)
+    model = build_transition_model(config, num_workers=num_workers)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # write to a temporary file first, so that concurrent builds do not clash
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    model.save(tmp_path)
+    os.replace(tmp_path, path)
+    return model
+
+
+def _q_values(model: TransitionModel, values: np.ndarray, gamma: float) -> np.ndarray:
+    """Compute the action values of each state, given the state values."""
+    flat_indices = model.sources * model.nb_actions + model.actions
+    future = np.bincount(
+        flat_indices,
+        weights=model.probabilities * values[model.targets],
+        minlength=model.nb_states * model.nb_actions,
+    ).reshape(model.nb_states, model.nb_actions)
+    return model.expected_rewards() + gamma * future
+
+
+def value_iteration(
+    model: TransitionModel,
+    gamma: float = 0.99,
+    tolerance: float = 1e-8,
+    max_iterations: int = 100000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve the model with value iteration.
+
+    :param model: the transition model.
+    :param gamma: the discount factor.
+    :param tolerance: the maximum change of the values at convergence.
+    :param max_iterations: the maximum number of iterations.
+    :return: the optimal values and a greedy policy, for each state.
+    """
+    flat_indices = model.sources * model.nb_actions + model.actions
+    expected_rewards = model.expected_rewards()
+    values = np.zeros(model.nb_states)
+    for _ in range(max_iterations):
+        future = np.bincount(
+            flat_indices,
+            weights=model.probabilities * values[model.targets],
+            minlength=model.nb_states * model.nb_actions,
+        ).reshape(model.nb_states, model.nb_actions)
+        new_values = (expected_rewards + gamma * future).max(axis=1)
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if delta < tolerance:
+            break
+    return values, _q_values(model, values, gamma).argmax(axis=1)
+
+
+def policy_iteration(
+    model: TransitionModel,
+    gamma: float = 0.99,
+    tolerance: float = 1e-8,
+    max_iterations: int = 1000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve the model with policy iteration.
+
+    The policies are evaluated iteratively, up to the given tolerance.
+
+    :param model: the transition model.
+    :param gamma: the discount factor.
+    :param tolerance: the maximum change of the values in the policy evaluation.
+    :param max_iterations: the maximum number of policy improvements.
+    :return: the optimal values and policy, for each state.
+    """
+    expected_rewards = model.expected_rewards()
+    states = np.arange(model.nb_states)
+    policy = np.zeros(model.nb_states, dtype=np.int64)
+    values = np.zeros(model.nb_states)
+    for _ in range(max_iterations):
+        mask = model.actions == policy[model.sources]
+        sources = model.sources[mask]
+        targets = model.targets[mask]
+        probabilities = model.probabilities[mask]
+        policy_rewards = expected_rewards[states, policy]
+        while True:
+            new_values = policy_rewards + gamma * np.bincount(
+                sources,
+                weights=probabilities * values[targets],
+                minlength=model.nb_states,
+            )
+            delta = np.abs(new_values - values).max()
+            values = new_values
+            if delta < tolerance:
+                break
+        q_values = _q_values(model, values, gamma)
+        # keep the current action on ties, so that the iteration terminates
+        improved = q_values.max(axis=1) > q_values[states, policy] + tolerance
+        if not improved.any():
+            break
+        policy = np.where(improved, q_values.argmax(axis=1), policy)
+    return values, policy
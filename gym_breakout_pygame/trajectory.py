@@ -0,0 +1,376 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Record the episodes played in a Breakout environment, and replay them.
+
+A recording is a directory with a 'meta.json' file, with the configuration of
+the game, the environment class and its number of stacked frames, and a
+sequence of chunks. Each chunk is a directory of '.npy' files, one for each
+column, that can be memory-mapped:
+
+- one row per environment step: the action, the reward, the done flag, the
+  episode index and the scalar state of the game after the step (the fields of
+  the snapshot records, see 'BreakoutState.snapshot', without the bricks);
+- the brick removal events: the row and the flat index (column * brick_rows + row)
+  of each removed brick;
+- the bricks at the start of the chunk, packed in a bitmap;
+- the episodes starting in the chunk: their index, first row, seed and the
+  snapshot of the game after the reset.
+
+The state of the game at any step is restored from a single chunk, without
+simulating the episode from the start.
+"""
+import dataclasses
+import importlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
+
+import gym
+import numpy as np
+
+from gym_breakout_pygame.breakout_env import (
+    Breakout,
+    BreakoutConfiguration,
+    BreakoutState,
+    snapshot_dtype,
+)
+
+FORMAT_VERSION = 1
+META_FILENAME = "meta.json"
+CHUNK_PREFIX = "chunk_"
+NO_SEED = -1
+
+# the per-step columns, besides the scalar fields of the snapshot records
+STEP_FIELDS = [
+    ("action", "<i8"),
+    ("reward", "<f8"),
+    ("done", "?"),
+    ("episode", "<i8"),
+]
+
+
+def row_dtype(config: BreakoutConfiguration) -> np.dtype:
+    """
+    Get the dtype of the per-step rows of a recording.
+
+    :param config: the game configuration.
+    :return: the structured dtype; each field is stored as a column.
+    """
+    state_fields = [
+        field for field in snapshot_dtype(config).descr if field[0] != "bricks"
+    ]
+    return np.dtype(state_fields + STEP_FIELDS)
+
+
+class TrajectoryRecorder(gym.Wrapper):  # pylint: disable=too-many-instance-attributes
+    """Record the episodes played in a Breakout environment."""
+
+    def __init__(
+        self, env: Breakout, directory: Union[str, Path], chunk_size: int = 4096
+    ) -> None:
+        """
+        Initialize the recorder.
+
+        :param env: the Breakout environment to record.
+        :param directory: the directory of the recording; it must not exist, or be empty.
+        :param chunk_size: the number of steps of each chunk.
+        """
+        super().__init__(env)
+        assert chunk_size > 0, "The chunk size must be positive."
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        assert not any(self.directory.iterdir()), "The directory is not empty."
+        self.chunk_size = chunk_size
+
+        breakout = cast(Breakout, env.unwrapped)
+        self._breakout = breakout
+        self._rows = np.zeros(chunk_size, dtype=row_dtype(breakout.config))
+        self._nb_rows = 0
+        self._nb_chunks = 0
+        self._event_rows: List[int] = []
+        self._event_bricks: List[int] = []
+        self._episodes: List[Tuple[int, int, int, np.ndarray]] = []
+        self._nb_episodes = 0
+        self._chunk_start_bricks = np.zeros(0, dtype=np.uint8)
+        self._bricks = np.zeros(0, dtype=np.uint8)
+        self._closed = False
+
+        meta = {
+            "version": FORMAT_VERSION,
+            "env": f"{type(breakout).__module__}:{type(breakout).__qualname__}",
+            "config": dataclasses.asdict(breakout.config),
+            "chunk_size": chunk_size,
+            "frame_stack": getattr(breakout, "frame_stack", 1),
+        }
+        (self.directory / META_FILENAME).write_text(json.dumps(meta, indent=2))
+
+    def reset(self, **kwargs) -> Any:
+        """Reset the environment, and start recording a new episode."""
+        obs = self.env.reset(**kwargs)
+        seed = kwargs.get("seed")
+        snapshot = self._breakout.get_state()
+        self._episodes.append(
+            (
+                self._nb_episodes,
+                self._nb_rows,
+                NO_SEED if seed is None else seed,
+                snapshot,
+            )
+        )
+        self._nb_episodes += 1
+        self._bricks = snapshot["bricks"].copy()
+        return obs
+
+    def step(self, action: int) -> Tuple[Any, float, bool, Any]:
+        """Do a step in the environment, and record it."""
+        assert self._nb_episodes > 0, "Reset the environment before stepping."
+        obs, reward, done, info = self.env.step(action)
+        snapshot = self._breakout.get_state()
+        bricks = snapshot["bricks"]
+        if not np.array_equal(bricks, self._bricks):
+            removed = np.unpackbits(self._bricks & ~bricks)
+            self._event_bricks.extend(np.flatnonzero(removed).tolist())
+            self._event_rows.extend([self._nb_rows] * int(removed.sum()))
+            self._bricks = bricks.copy()
+
+        self._rows[self._nb_rows % self.chunk_size] = (
+            *snapshot.item()[:-1],
+            action,
+            reward,
+            done,
+            self._nb_episodes - 1,
+        )
+        self._nb_rows += 1
+        if self._nb_rows % self.chunk_size == 0:
+            self._flush()
+            self._chunk_start_bricks = self._bricks
+        return obs, reward, done, info
+
+    def _flush(self) -> None:
+        """Write the current chunk."""
+        nb_chunk_rows = self._nb_rows - self._nb_chunks * self.chunk_size
+        if nb_chunk_rows == 0 and len(self._episodes) == 0:
+            return
+        chunk_dir = self.directory / f"{CHUNK_PREFIX}{self._nb_chunks:06d}"
+        chunk_dir.mkdir()
+        rows = self._rows[:nb_chunk_rows]
+        for name, *_ in rows.dtype.descr:
+            np.save(chunk_dir / f"{name}.npy", rows[name])
+        np.save(chunk_dir / "event_row.npy", np.array(self._event_rows, dtype="<i8"))
+        np.save(
+            chunk_dir / "event_brick.npy", np.array(self._event_bricks, dtype="<i4")
+        )
+        np.save(chunk_dir / "start_bricks.npy", self._chunk_start_bricks)
+        episodes = self._episodes
+        np.save(
+            chunk_dir / "episode_index.npy",
+            np.array([episode[0] for episode in episodes], dtype="<i8"),
+        )
+        np.save(
+            chunk_dir / "episode_start.npy",
+            np.array([episode[1] for episode in episodes], dtype="<i8"),
+        )
+        np.save(
+            chunk_dir / "episode_seed.npy",
+            np.array([episode[2] for episode in episodes], dtype="<i8"),
+        )
+        np.save(
+            chunk_dir / "episode_snapshot.npy",
+            np.array(
+                [episode[3] for episode in episodes],
+                dtype=snapshot_dtype(self._breakout.config),
+            ),
+        )
+        self._nb_chunks += 1
+        self._event_rows = []
+        self._event_bricks = []
+        self._episodes = []
+
+    def close(self) -> None:
+        """Write the last chunk, and close the environment."""
+        if not self._closed:
+            self._flush()
+            self._closed = True
+        super().close()
+
+
+class TrajectoryReplayer:  # pylint: disable=too-many-instance-attributes
+    """Read a recording made with 'TrajectoryRecorder'."""
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        """
+        Open a recording.
+
+        :param directory: the directory of the recording.
+        """
+        self.directory = Path(directory)
+        meta = json.loads((self.directory / META_FILENAME).read_text())
+        assert meta["version"] == FORMAT_VERSION, "Unsupported recording format."
+        self.config = BreakoutConfiguration(**meta["config"])
+        module_name, class_name = meta["env"].split(":")
+        self.env_cls = getattr(importlib.import_module(module_name), class_name)
+        self.chunk_size: int = meta["chunk_size"]
+        self.frame_stack: int = meta.get("frame_stack", 1)
+
+        self._chunk_dirs = sorted(self.directory.glob(f"{CHUNK_PREFIX}*"))
+        self._chunks: Dict[int, Dict[str, np.ndarray]] = {}
+        self._env: Optional[Breakout] = None
+
+        self.nb_rows = 0
+        episode_starts = [np.zeros(0, dtype="<i8")]
+        episode_seeds = [np.zeros(0, dtype="<i8")]
+        episode_snapshots = [np.zeros(0, dtype=snapshot_dtype(self.config))]
+        for index in range(len(self._chunk_dirs)):
+            chunk = self.chunk(index)
+            self.nb_rows += len(chunk["action"])
+            episode_starts.append(chunk["episode_start"])
+            episode_seeds.append(chunk["episode_seed"])
+            episode_snapshots.append(chunk["episode_snapshot"])
+        self.episode_starts = np.concatenate(episode_starts)
+        self.episode_seeds = np.concatenate(episode_seeds)
+        self._episode_snapshots = np.concatenate(episode_snapshots)
+
+    @property
+    def nb_episodes(self) -> int:
+        """Get the number of recorded episodes."""
+        return len(self.episode_starts)
+
+    def __len__(self) -> int:
+        """Get the number of recorded steps."""
+        return self.nb_rows
+
+    def chunk(self, index: int) -> Dict[str, np.ndarray]:
+        """
+        Get the columns of a chunk, memory-mapped.
+
+        :param index: the index of the chunk.
+        :return: the columns of the chunk, by name.
+        """
+        if index not in self._chunks:
+            self._chunks[index] = {
+                path.stem: np.load(path, mmap_mode="r")
+                for path in self._chunk_dirs[index].glob("*.npy")
+            }
+        return self._chunks[index]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get a per-step column of all the recording.
+
+        :param name: the name of the column, e.g. 'action' or 'reward'.
+        :return: the column, concatenated across the chunks.
+        """
+        return np.concatenate(
+            [self.chunk(index)[name] for index in range(len(self._chunk_dirs))]
+        )
+
+    def episode_length(self, episode: int) -> int:
+        """
+        Get the number of steps of an episode.
+
+        :param episode: the index of the episode.
+        :return: the number of recorded steps.
+        """
+        end = (
+            self.episode_starts[episode + 1]
+            if episode + 1 < self.nb_episodes
+            else self.nb_rows
+        )
+        return int(end - self.episode_starts[episode])
+
+    def get_snapshot(self, episode: int, step: int) -> np.ndarray:
+        """
+        Get the snapshot of the game at a step of an episode.
+
+        :param episode: the index of the episode.
+        :param step: the number of steps since the reset; 0 is the state after the reset.
+        :return: the snapshot record, see 'BreakoutState.snapshot'.
+        """
+        if not 0 <= step <= self.episode_length(episode):
+            raise IndexError(f"Step {step} out of the range of episode {episode}.")
+        initial = self._episode_snapshots[episode]
+        if step == 0:
+            return initial.copy()
+
+        episode_start = int(self.episode_starts[episode])
+        row = episode_start + step - 1
+        chunk_index, offset = divmod(row, self.chunk_size)
+        chunk = self.chunk(chunk_index)
+        chunk_start = chunk_index * self.chunk_size
+        if episode_start >= chunk_start:
+            bricks = initial["bricks"]
+            first_row = episode_start
+        else:
+            bricks = chunk["start_bricks"]
+            first_row = chunk_start
+
+        nb_bricks = self.config.brick_cols * self.config.brick_rows
+        present = np.unpackbits(bricks, count=nb_bricks)
+        event_rows = chunk["event_row"]
+        events = slice(
+            np.searchsorted(event_rows, first_row, side="left"),
+            np.searchsorted(event_rows, row, side="right"),
+        )
+        present[chunk["event_brick"][events]] = 0
+
+        record = np.zeros((), dtype=snapshot_dtype(self.config))
+        for name, *_ in record.dtype.descr:
+            if name != "bricks":
+                record[name] = chunk[name][offset]
+        record["bricks"] = np.packbits(present)
+        return record
+
+    def get_state(self, episode: int, step: int) -> BreakoutState:
+        """
+        Get the state of the game at a step of an episode.
+
+        :param episode: the index of the episode.
+        :param step: the number of steps since the reset; 0 is the state after the reset.
+        :return: a new game state.
+        """
+        state = BreakoutState(self.config)
+        state.restore(self.get_snapshot(episode, step))
+        return state
+
+    def get_observation(self, episode: int, step: int) -> Any:
+        """
+        Get the observation of the recorded environment at a step of an episode.
+
+        :param episode: the index of the episode.
+        :param step: the number of steps since the reset; 0 is the state after the reset.
+        :return: the observation.
+        :raises ValueError: if the observations stack several frames, as they
+            depend on the previous steps.
+        """
+        if self.frame_stack > 1:
+            raise ValueError(
+                f"The observations stack {self.frame_stack} frames, that depend on"
+                " the previous steps: they cannot be replayed at random access;"
+                " use 'get_state' instead."
+            )
+        if self._env is None:
+            self._env = self.env_cls(self.config)
+        env = cast(Breakout, self._env)
+        return env.observe(self.get_state(episode, step))
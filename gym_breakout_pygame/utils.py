@@ -22,8 +22,45 @@
 #
 
 """This module contains utility functions."""
-from functools import reduce
-from typing import List
+import functools
+import operator
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+_INT64_MAX = np.iinfo(np.int64).max
+
+_Result = TypeVar("_Result")
+
+
+@functools.lru_cache(maxsize=None)
+def _int_strides(spaces: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Get the strides of the encoding as Python integers."""
+    return tuple(
+        functools.reduce(operator.mul, spaces[:index], 1)
+        for index in range(len(spaces))
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def strides(spaces: Tuple[int, ...]) -> np.ndarray:
+    """
+    Get the strides of the encoding of a list of gym.Discrete spaces.
+
+    The code of an observation is its dot product with the strides. If the
+    codes do not fit in 64-bit integers, the strides are Python integers in
+    an array of objects: the array functions still work, but more slowly.
+
+    :param spaces: the sizes of the gym.Discrete spaces, as a tuple.
+    :return: the read-only array of strides.
+    """
+    result = np.array(_int_strides(spaces), dtype=object)
+    if functools.reduce(operator.mul, spaces, 1) - 1 <= _INT64_MAX:
+        result = result.astype(np.int64)
+    result.flags.writeable = False
+    return result
 
 
 def encode(obs: List[int], spaces: List[int]) -> int:
@@ -35,14 +72,7 @@ def encode(obs: List[int], spaces: List[int]) -> int:
     :return: the encoded observation.
     """
     assert len(obs) == len(spaces)
-    sizes = spaces
-    result = obs[0]
-    shift = sizes[0]
-    for observation, size in list(zip(obs, sizes))[1:]:
-        result += observation * shift
-        shift *= size
-
-    return result
+    return sum(map(operator.mul, obs, _int_strides(tuple(spaces))))
 
 
 def decode(obs: int, spaces: List[int]) -> List[int]:
@@ -55,14 +85,108 @@ def decode(obs: int, spaces: List[int]) -> List[int]:
     :param spaces: the list of gym.Discrete spaces from where the observation is observed.
     :return: the decoded observation.
     """
-    result = []
-    sizes = spaces[::-1]
-    shift = reduce(lambda x, y: x * y, sizes) // sizes[0]
-    for size in sizes[1:]:
-        quotient = obs // shift
-        result.append(quotient)
-        obs %= shift
-        shift //= size
-
-    result.append(obs)
-    return result[::-1]
+    *first_strides, last_stride = _int_strides(tuple(spaces))
+    result = [obs // stride % size for stride, size in zip(first_strides, spaces)]
+    result.append(obs // last_stride)
+    return result
+
+
+def encode_batch(obs: np.ndarray, spaces: Sequence[int]) -> np.ndarray:
+    """
+    Encode a batch of observations, as 'encode' does for each of them.
+
+    :param obs: the (N, k) array of observations, or a single (k,) observation.
+    :param spaces: the sizes of the k gym.Discrete spaces.
+    :return: the (N,) array of codes, int64 or object if they overflow int64.
+    """
+    obs = np.asarray(obs)
+    assert obs.shape[-1] == len(spaces)
+    spaces_strides = strides(tuple(spaces))
+    return obs.astype(spaces_strides.dtype, copy=False) @ spaces_strides
+
+
+def decode_batch(codes: np.ndarray, spaces: Sequence[int]) -> np.ndarray:
+    """
+    Decode a batch of codes, as 'decode' does for each of them.
+
+    :param codes: the (N,) array of codes.
+    :param spaces: the sizes of the k gym.Discrete spaces.
+    :return: the (N, k) array of observations, int64 or object if the codes overflow int64.
+    """
+    spaces_strides = strides(tuple(spaces))
+    codes = np.asarray(codes).astype(spaces_strides.dtype, copy=False)
+    result = codes[..., np.newaxis] // spaces_strides
+    result[..., :-1] %= np.array(spaces[:-1], dtype=spaces_strides.dtype)
+    return result
+
+
+def copy_observation(observation: Any) -> Any:
+    """
+    Copy an observation, e.g. one that is a buffer owned by the environment.
+
+    :param observation: a number, an array or a dictionary of them.
+    :return: an array, or a dictionary of arrays.
+    """
+    if isinstance(observation, dict):
+        return {key: np.array(value) for key, value in observation.items()}
+    return np.array(observation)
+
+
+def stack_observations(observations: Sequence[Any]) -> Any:
+    """
+    Stack several observations in a batch.
+
+    :param observations: the observations, all of the same environment class.
+    :return: an array with a leading batch dimension, or a dictionary of such
+        arrays for dictionary observations.
+    """
+    if isinstance(observations[0], dict):
+        return {
+            key: np.stack([observation[key] for observation in observations])
+            for key in observations[0]
+        }
+    return np.stack([np.asarray(observation) for observation in observations])
+
+
+def map_shards(  # pylint: disable=too-many-arguments
+    function: Callable[[List[int]], _Result],
+    items: Sequence[int],
+    num_workers: Optional[int] = 1,
+    shards_per_worker: int = 1,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple = (),
+) -> List[_Result]:
+    """
+    Apply a function to contiguous shards of integers, in a pool of processes.
+
+    With a single worker, the current process is the worker: the initializer
+    and the function are called in it, on a single shard.
+
+    :param function: the function, called with a list of integers; with more
+        than one worker, it must be picklable, e.g. a module-level function.
+    :param items: the integers, e.g. seeds.
+    :param num_workers: the number of processes; None for one per CPU. There
+        are never more processes than items.
+    :param shards_per_worker: the number of shards per process, with more than
+        one process, to balance the load when the shards take different times.
+    :param initializer: a function called once in each process, if any.
+    :param initargs: the arguments of the initializer.
+    :return: the results of the shards, in the order of the items.
+    """
+    num_workers = min(num_workers or os.cpu_count() or 1, len(items))
+    # a single worker has no load to balance
+    nb_shards = (
+        min(num_workers * shards_per_worker, len(items)) if num_workers > 1 else 1
+    )
+    shards = [
+        shard.tolist()
+        for shard in np.array_split(np.asarray(items, dtype=np.int64), nb_shards)
+    ]
+    if num_workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [function(shard) for shard in shards]
+    with ProcessPoolExecutor(
+        num_workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        return list(executor.map(function, shards))
@@ -0,0 +1,513 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+A batched Breakout simulator that advances N games with NumPy operations.
+
+The state of the games is stored as a structure of arrays, and every frame is
+computed for the whole batch at once. The dynamics replicate
+'BreakoutState.step', and the observations are batched versions of the ones
+of 'BreakoutNMultiDiscrete', 'BreakoutNDiscrete' and 'BreakoutDictSpace'
+(including the skipping of the frames that do not change the observation).
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, cast
+
+import gym
+import numpy as np
+from gym.spaces import Discrete, MultiBinary, MultiDiscrete
+from gym.utils.seeding import np_random
+
+from gym_breakout_pygame.breakout_env import (
+    BRICK_YDISTANCE,
+    BRICK_YOFFSET,
+    BreakoutConfiguration,
+    Command,
+)
+
+MULTIDISCRETE = "multidiscrete"
+DISCRETE = "discrete"
+DICT = "dict"
+OBSERVATION_TYPES = (MULTIDISCRETE, DISCRETE, DICT)
+
+_BULLET_SIZE = 5
+
+
+class BreakoutVecEnv:  # pylint: disable=too-many-instance-attributes
+    """
+    Run N Breakout games in lockstep.
+
+    The interface follows the usual vectorized environment conventions:
+
+    - 'reset' returns the batch of initial observations;
+    - 'step' takes one action per game and returns the batch of observations,
+      rewards, done flags and a list of info dictionaries;
+    - finished games are reset automatically, and their last observation is
+      stored in the 'terminal_observation' key of the info dictionary.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        breakout_config: Optional[BreakoutConfiguration] = None,
+        observation_type: str = MULTIDISCRETE,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the vectorized environment.
+
+        :param num_envs: the number of games simulated in parallel.
+        :param breakout_config: the configuration shared by all the games.
+        :param observation_type: one of 'multidiscrete', 'discrete' or 'dict'.
+        :param seed: the seed of the random number generator.
+        """
+        assert num_envs >= 1, "The number of environments must be positive."
+        assert (
+            observation_type in OBSERVATION_TYPES
+        ), f"Observation type must be one of {OBSERVATION_TYPES}."
+        self.num_envs = num_envs
+        self.config = (
+            BreakoutConfiguration() if breakout_config is None else breakout_config
+        )
+        self.observation_type = observation_type
+        self._rng = np_random(seed)[0]
+
+        config = self.config
+        self.action_space = Discrete(
+            len(Command) if config.fire_enabled else len(Command) - 1
+        )
+        self._dims = np.asarray(
+            [
+                config.n_paddle_x,
+                config.n_ball_x,
+                config.n_ball_y,
+                config.n_ball_x_speed,
+                config.n_ball_y_speed,
+            ],
+            dtype=np.int64,
+        )
+        self._strides = np.concatenate(([1], np.cumprod(self._dims[:-1])))
+        self.observation_space = self._make_observation_space()
+
+        self._ball_radius = config.ball_radius if config.ball_enabled else 0
+        self._paddle_y = config.win_height - 20
+        self._brick_x = (config.brick_width + config.brick_xdistance) * np.arange(
+            config.brick_cols
+        ) + config.brick_xdistance
+        self._brick_y = BRICK_YOFFSET + (
+            config.brick_height + BRICK_YDISTANCE
+        ) * np.arange(config.brick_rows)
+
+        n = num_envs
+        self.ball_x = np.zeros(n, dtype=np.float64)
+        self.ball_y = np.zeros(n, dtype=np.float64)
+        self.ball_speed_x = np.zeros(n, dtype=np.float64)
+        self.ball_speed_y = np.zeros(n, dtype=np.float64)
+        self.paddle_x = np.zeros(n, dtype=np.int64)
+        self.bullet_x = np.zeros(n, dtype=np.float64)
+        self.bullet_y = np.zeros(n, dtype=np.float64)
+        self.bullet_speed_y = np.zeros(n, dtype=np.float64)
+        self.bricks = np.zeros((n, config.brick_cols, config.brick_rows), dtype=bool)
+        self.brick_count = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.float64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.last_command = np.zeros(n, dtype=np.int64)
+        self._previous_key = np.zeros((n, len(self._dims)), dtype=np.int64)
+        self._actions = np.zeros(n, dtype=np.int64)
+
+    def _make_observation_space(self) -> gym.Space:
+        """Build the observation space of a single game."""
+        config = self.config
+        if self.observation_type == MULTIDISCRETE:
+            return MultiDiscrete(self._dims.tolist())
+        if self.observation_type == DISCRETE:
+            return Discrete(int(np.prod(self._dims)))
+        spaces: Dict[str, gym.Space] = {"paddle_x": Discrete(config.n_paddle_x)}
+        if config.ball_enabled:
+            spaces["ball_x"] = Discrete(config.n_ball_x)
+            spaces["ball_y"] = Discrete(config.n_ball_y)
+            # the speed values are swapped, as in 'BreakoutState.to_dict'
+            spaces["ball_x_speed"] = Discrete(config.n_ball_y_speed)
+            spaces["ball_y_speed"] = Discrete(config.n_ball_x_speed)
+        spaces["bricks_matrix"] = MultiBinary((config.brick_cols, config.brick_rows))
+        return gym.spaces.Dict(spaces)
+
+    def seed(self, seed: Optional[int] = None) -> None:
+        """Set the seed of the random number generator."""
+        self._rng = np_random(seed)[0]
+
+    def reset(self, seed: Optional[int] = None) -> Any:
+        """Reset all the games and return the batch of initial observations."""
+        if seed is not None:
+            self.seed(seed)
+        envs = np.arange(self.num_envs)
+        self._reset_envs(envs)
+        return self._observe(envs)
+
+    def step_async(self, actions: Union[Sequence[int], np.ndarray]) -> None:
+        """Store the actions to execute at the next call of 'step_wait'."""
+        self._actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def step_wait(self) -> Tuple[Any, np.ndarray, np.ndarray, List[Dict]]:
+        """Execute the stored actions on all the games."""
+        envs = np.arange(self.num_envs)
+        commands = self._actions
+        rewards, dones = self._frame(envs, commands)
+        if self.observation_type != DICT:
+            # keep simulating the games whose observation did not change,
+            # as done by 'BreakoutSkipper'
+            key = self._observation_key(envs)
+            repeat = (key == self._previous_key).all(axis=1) & ~dones
+            while repeat.any():
+                active = np.flatnonzero(repeat)
+                next_rewards, next_dones = self._frame(active, commands[active])
+                rewards[active] += next_rewards
+                dones[active] |= next_dones
+                key[active] = self._observation_key(active)
+                repeat[active] = (key[active] == self._previous_key[active]).all(
+                    axis=1
+                ) & ~dones[active]
+            self._previous_key[:] = key
+
+        observations = self._observe(envs)
+        infos: List[Dict] = [{} for _ in range(self.num_envs)]
+        finished = np.flatnonzero(dones)
+        if len(finished) > 0:
+            for env_index in finished:
+                infos[env_index]["terminal_observation"] = self._get_single(
+                    observations, env_index
+                )
+            self._reset_envs(finished)
+            self._set_observations(observations, finished, self._observe(finished))
+        return observations, rewards, dones, infos
+
+    def step(
+        self, actions: Union[Sequence[int], np.ndarray]
+    ) -> Tuple[Any, np.ndarray, np.ndarray, List[Dict]]:
+        """Do a simulation step in all the games."""
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self) -> None:
+        """Close the environment."""
+
+    def _reset_envs(self, envs: np.ndarray) -> None:
+        """Reset the games at the given indices."""
+        config = self.config
+        if config.ball_enabled:
+            self.ball_x[envs] = config.win_width // 2
+            self.ball_y[envs] = config.win_height - 100 - config.ball_radius
+            self.ball_speed_x[envs] = config.init_ball_speed_x
+            self.ball_speed_y[envs] = config.init_ball_speed_y
+        else:
+            self.ball_x[envs] = 0.0
+            self.ball_y[envs] = 0.0
+            self.ball_speed_x[envs] = 0.0
+            self.ball_speed_y[envs] = 0.0
+        self.paddle_x[envs] = config.win_width // 2
+        self.bullet_x[envs] = 0.0
+        self.bullet_y[envs] = 0.0
+        self.bullet_speed_y[envs] = 0.0
+        self.bricks[envs] = True
+        self.brick_count[envs] = config.brick_cols * config.brick_rows
+        self.score[envs] = 0.0
+        self.steps[envs] = 0
+        self.last_command[envs] = Command.NOP.value
+        self._previous_key[envs] = self._observation_key(envs)
+
+    def _frame(  # pylint: disable=too-many-locals,too-many-statements
+        self, envs: np.ndarray, commands: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Simulate one frame of the games at the given indices.
+
+        :param envs: the indices of the games to simulate.
+        :param commands: the command values, one for each game.
+        :return: the rewards and the done flags of the simulated games.
+        """
+        config = self.config
+        radius = self._ball_radius
+        paddle_width = config.paddle_width
+        paddle_height = config.paddle_height
+
+        steps = self.steps[envs] + 1
+
+        # update of the objects
+        paddle_x = self.paddle_x[envs]
+        paddle_x = np.where(
+            commands == Command.LEFT.value, paddle_x - config.paddle_speed, paddle_x
+        )
+        paddle_x = np.where(
+            commands == Command.RIGHT.value, paddle_x + config.paddle_speed, paddle_x
+        )
+        paddle_x = np.minimum(np.maximum(paddle_x, 0), config.win_width - paddle_width)
+        ball_x = self.ball_x[envs] + self.ball_speed_x[envs]
+        ball_y = self.ball_y[envs] + self.ball_speed_y[envs]
+        speed_x = self.ball_speed_x[envs]
+        speed_y = self.ball_speed_y[envs]
+        bullet_speed_y = self.bullet_speed_y[envs]
+        bullet_y = self.bullet_y[envs] + bullet_speed_y
+        bullet_out = bullet_y < 5
+        bullet_x = np.where(bullet_out, 0.0, self.bullet_x[envs])
+        bullet_y = np.where(bullet_out, 0.0, bullet_y)
+        bullet_speed_y = np.where(bullet_out, 0.0, bullet_speed_y)
+
+        # collision boxes, truncated to integers as 'pygame.Rect' does
+        ball_rect_x = np.trunc(ball_x - radius).astype(np.int64)
+        ball_rect_y = np.trunc(ball_y - radius).astype(np.int64)
+        bullet_rect_x = np.trunc(bullet_x).astype(np.int64)
+        bullet_rect_y = np.trunc(bullet_y).astype(np.int64)
+
+        # for screen border
+        top = ball_y < radius
+        ball_y = np.where(top, radius, ball_y)
+        speed_y = np.where(top, -speed_y, speed_y)
+        random_dir = top & np.isclose(speed_x, 0.0)
+        if random_dir.any():
+            speed_x[random_dir] = 1.0 * self._rng.choice(
+                [-1.0, 1.0], size=int(random_dir.sum())
+            )
+        left = ball_x < radius
+        ball_x = np.where(left, radius, ball_x)
+        speed_x = np.where(left, -speed_x, speed_x)
+        right = ball_x > config.win_width - radius
+        ball_x = np.where(right, config.win_width - radius, ball_x)
+        speed_x = np.where(right, -speed_x, speed_x)
+
+        # for paddle
+        if radius > 0:
+            bump = (
+                (ball_rect_x < paddle_x + paddle_width)
+                & (ball_rect_x + 2 * radius > paddle_x)
+                & (ball_rect_y < self._paddle_y + paddle_height)
+                & (ball_rect_y + 2 * radius > self._paddle_y)
+            )
+            if bump.any():
+                speed_x = self._bump(bump, ball_x, paddle_x, speed_x)
+                speed_y = np.where(bump, -np.abs(speed_y), speed_y)
+
+        rewards = np.zeros(len(envs), dtype=np.float64)
+        score = self.score[envs]
+        brick_count = self.brick_count[envs]
+
+        # for bricks
+        if radius > 0:
+            hit, brick_i, brick_j = self._first_hit(
+                envs, ball_rect_x, ball_rect_y, 2 * radius
+            )
+            if hit.any():
+                self._remove_bricks(envs[hit], brick_i[hit], brick_j[hit])
+                score = np.where(hit, score + config.brick_reward, score)
+                brick_count = np.where(hit, brick_count - 1, brick_count)
+                speed_y = np.where(hit, -speed_y, speed_y)
+                rewards = np.where(hit, rewards + config.brick_reward, rewards)
+
+        # fire
+        fire = (commands == Command.FIRE.value) & ~(bullet_speed_y < 0.0)
+        bullet_x = np.where(fire, paddle_x + paddle_width / 2, bullet_x)
+        bullet_y = np.where(fire, self._paddle_y, bullet_y)
+        bullet_speed_y = np.where(fire, -10.0, bullet_speed_y)
+        bullet_out = bullet_y < 5
+        bullet_x = np.where(bullet_out, 0.0, bullet_x)
+        bullet_y = np.where(bullet_out, 0.0, bullet_y)
+        bullet_speed_y = np.where(bullet_out, 0.0, bullet_speed_y)
+
+        hit, brick_i, brick_j = self._first_hit(
+            envs, bullet_rect_x, bullet_rect_y, _BULLET_SIZE
+        )
+        if hit.any():
+            self._remove_bricks(envs[hit], brick_i[hit], brick_j[hit])
+            rewards = np.where(hit, rewards + config.brick_reward, rewards)
+            score = np.where(hit, score + config.brick_reward, score)
+            brick_count = np.where(hit, brick_count - 1, brick_count)
+            bullet_x = np.where(hit, 0.0, bullet_x)
+            bullet_y = np.where(hit, 0.0, bullet_y)
+            bullet_speed_y = np.where(hit, 0.0, bullet_speed_y)
+
+        rewards += config.step_reward
+        ball_out = ball_y > config.win_height - radius
+        timeout = steps > cast(int, config.horizon)
+        rewards += np.where(ball_out, config.game_over_reward, 0.0)
+        rewards += np.where(timeout, config.game_over_reward, 0.0)
+        dones = ball_out | (brick_count == 0) | timeout
+
+        self.ball_x[envs] = ball_x
+        self.ball_y[envs] = ball_y
+        self.ball_speed_x[envs] = speed_x
+        self.ball_speed_y[envs] = speed_y
+        self.paddle_x[envs] = paddle_x
+        self.bullet_x[envs] = bullet_x
+        self.bullet_y[envs] = bullet_y
+        self.bullet_speed_y[envs] = bullet_speed_y
+        self.score[envs] = score
+        self.brick_count[envs] = brick_count
+        self.steps[envs] = steps
+        self.last_command[envs] = commands
+        return rewards, dones
+
+    def _bump(
+        self,
+        bump: np.ndarray,
+        ball_x: np.ndarray,
+        paddle_x: np.ndarray,
+        speed_x: np.ndarray,
+    ) -> np.ndarray:
+        """Compute the x-speed of the ball after a collision with the paddle."""
+        paddle_width = self.config.paddle_width
+        dbp_center = np.abs(ball_x - (paddle_x + paddle_width / 2))
+        if self.config.complex_bump:
+            center = bump & (dbp_center < 20)
+            speed_x = np.where(
+                center,
+                np.select(
+                    [speed_x < -5, speed_x > 5, speed_x <= -0.5, speed_x >= 0.5],
+                    [speed_x + 2, speed_x - 2, speed_x + 0.5, speed_x - 0.5],
+                    speed_x,
+                ),
+                speed_x,
+            )
+            left = bump & (np.abs(ball_x - paddle_x) < 10)
+            speed_x = np.where(left, -np.abs(speed_x) - 1, speed_x)
+            right = bump & (np.abs(ball_x - (paddle_x + paddle_width)) < 10)
+            speed_x = np.where(right, np.abs(speed_x) + 1, speed_x)
+            return speed_x
+
+        center = bump & (dbp_center < 20) & (speed_x != 0)
+        speed_x = np.where(
+            center, 2 * np.abs(speed_x) / np.where(center, speed_x, 1.0), speed_x
+        )
+        left = bump & (np.abs(ball_x - paddle_x) < 20)
+        speed_x = np.where(left, -5.0, speed_x)
+        speed_x = self._perturbate_after_paddle_hit(left, speed_x)
+        right = bump & (np.abs(ball_x - (paddle_x + paddle_width)) < 20)
+        speed_x = np.where(right, 5.0, speed_x)
+        speed_x = self._perturbate_after_paddle_hit(right, speed_x)
+        return speed_x
+
+    def _perturbate_after_paddle_hit(
+        self, mask: np.ndarray, speed_x: np.ndarray
+    ) -> np.ndarray:
+        """Vectorized version of 'perturbate_ball_speed_after_paddle_hit'."""
+        if self.config.deterministic or not mask.any():
+            return speed_x
+        ran = np.full(len(speed_x), 0.5)
+        ran[mask] = self._rng.uniform(0.0, 1.0, size=int(mask.sum()))
+        perturbed = np.where(ran < 0.1, speed_x * 0.75, speed_x)
+        perturbed = np.where(ran > 0.9, perturbed * 1.5, perturbed)
+        sign = perturbed / np.abs(np.where(mask, perturbed, 1.0))
+        perturbed = np.minimum(perturbed, 6) * sign
+        perturbed = np.maximum(perturbed, 0.5) * sign
+        return np.where(mask, perturbed, speed_x)
+
+    def _first_hit(
+        self, envs: np.ndarray, rect_x: np.ndarray, rect_y: np.ndarray, size: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find the first brick hit by a square box in each game.
+
+        The bricks are scanned column by column, i.e. in the same order of
+        the brick dictionary of 'BrickGrid'.
+
+        :param envs: the indices of the games.
+        :param rect_x: the x-coordinates of the boxes.
+        :param rect_y: the y-coordinates of the boxes.
+        :param size: the side of the boxes.
+        :return: the hit flags and the column and row indices of the hit bricks.
+        """
+        config = self.config
+        overlap_x = (rect_x[:, None] < self._brick_x + config.brick_width) & (
+            rect_x[:, None] + size > self._brick_x
+        )
+        overlap_y = (rect_y[:, None] < self._brick_y + config.brick_height) & (
+            rect_y[:, None] + size > self._brick_y
+        )
+        candidates = self.bricks[envs] & overlap_x[:, :, None] & overlap_y[:, None, :]
+        flat = candidates.reshape(len(envs), -1)
+        hit = flat.any(axis=1)
+        first = flat.argmax(axis=1)
+        return hit, first // config.brick_rows, first % config.brick_rows
+
+    def _remove_bricks(
+        self, envs: np.ndarray, brick_i: np.ndarray, brick_j: np.ndarray
+    ) -> None:
+        """Remove the bricks at the given positions."""
+        self.bricks[envs, brick_i, brick_j] = False
+
+    def _observation_key(self, envs: np.ndarray) -> np.ndarray:
+        """Compute the multi-discrete features of the games at the given indices."""
+        config = self.config
+        speed_x = self.ball_speed_x[envs]
+        key = np.empty((len(envs), len(self._dims)), dtype=np.int64)
+        key[:, 0] = self.paddle_x[envs] // config.resolution_x
+        key[:, 1] = np.floor_divide(self.ball_x[envs], config.resolution_x)
+        key[:, 2] = np.floor_divide(self.ball_y[envs], config.resolution_y)
+        key[:, 3] = np.select(
+            [speed_x < -2.5, speed_x < 0, speed_x == 0, speed_x < 2.5], [0, 1, 2, 3], 4
+        )
+        key[:, 4] = self.ball_speed_y[envs] > 0
+        return key
+
+    def _observe(self, envs: np.ndarray) -> Any:
+        """Compute the observations of the games at the given indices."""
+        if self.observation_type == MULTIDISCRETE:
+            return self._observation_key(envs)
+        if self.observation_type == DISCRETE:
+            return self._observation_key(envs) @ self._strides
+        config = self.config
+        observation = {
+            "paddle_x": self.paddle_x[envs] // config.resolution_x,
+        }
+        if config.ball_enabled:
+            speed_x = self.ball_speed_x[envs]
+            observation["ball_x"] = (
+                np.trunc(self.ball_x[envs]).astype(np.int64) // config.resolution_x
+            )
+            observation["ball_y"] = (
+                np.trunc(self.ball_y[envs]).astype(np.int64) // config.resolution_y
+            )
+            # the speed keys are swapped, as in 'BreakoutState.to_dict'
+            observation["ball_x_speed"] = (self.ball_speed_y[envs] > 0).astype(np.int64)
+            observation["ball_y_speed"] = np.select(
+                [speed_x < -2.5, speed_x < 0, speed_x == 0, speed_x < 2.5],
+                [0, 1, 2, 3],
+                4,
+            )
+        observation["bricks_matrix"] = self.bricks[envs].astype(np.float64)
+        return observation
+
+    def _get_single(self, observations: Any, env_index: int) -> Any:
+        """Extract the observation of one game from a batch of observations."""
+        if self.observation_type == DICT:
+            return {
+                key: np.copy(value[env_index]) for key, value in observations.items()
+            }
+        return np.copy(observations[env_index])
+
+    def _set_observations(
+        self, observations: Any, envs: np.ndarray, values: Any
+    ) -> None:
+        """Overwrite the observations of the games at the given indices."""
+        if self.observation_type == DICT:
+            for key, value in values.items():
+                observations[key][envs] = value
+        else:
+            observations[envs] = values
@@ -0,0 +1,413 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+A vectorized environment that runs Breakout games in worker processes.
+
+Each worker owns a slice of the environments. Observations, rewards and done
+flags are written directly into 'multiprocessing.shared_memory' arrays, so
+that no observation is pickled at each step; the processes only exchange
+short control messages.
+"""
+import multiprocessing
+import os
+import pickle  # nosec
+import traceback
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+import numpy as np
+
+from gym_breakout_pygame.breakout_env import Breakout, BreakoutConfiguration
+
+_STEP = b"s"
+_DONE = b"d"
+_RESET = "reset"
+_CLOSE = "close"
+_ERROR = "error"
+
+# name of the buffer when the observation is not a dictionary
+_SINGLE_KEY = ""
+
+BufferSpec = Dict[str, Tuple[Tuple[int, ...], str]]
+
+
+def _observation_to_arrays(observation: Any) -> Dict[str, np.ndarray]:
+    """Split an observation in named arrays."""
+    if isinstance(observation, dict):
+        return {key: np.asarray(value) for key, value in observation.items()}
+    return {_SINGLE_KEY: np.asarray(observation)}
+
+
+class _SharedBuffers:
+    """A set of NumPy arrays backed by shared memory blocks."""
+
+    def __init__(
+        self,
+        spec: BufferSpec,
+        names: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Create (or attach to) the shared memory blocks.
+
+        :param spec: the shape and the dtype of each array.
+        :param names: the names of the blocks to attach to; if None, new blocks are created.
+        """
+        self.spec = spec
+        self._blocks: Dict[str, SharedMemory] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+        for key, (shape, dtype) in spec.items():
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            if names is None:
+                block = SharedMemory(create=True, size=size)
+            else:
+                block = SharedMemory(name=names[key])
+            self._blocks[key] = block
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    @property
+    def names(self) -> Dict[str, str]:
+        """Get the names of the shared memory blocks."""
+        return {key: block.name for key, block in self._blocks.items()}
+
+    def close(self, unlink: bool = False, unmap: bool = True) -> None:
+        """
+        Release the shared memory blocks.
+
+        :param unlink: whether to destroy the blocks (only their creator should).
+        :param unmap: whether to unmap the blocks now, invalidating all the views.
+            If False, the memory is unmapped when this object is garbage collected.
+        """
+        if unmap:
+            self.arrays = {}
+        for block in self._blocks.values():
+            if unmap:
+                block.close()
+            if unlink:
+                block.unlink()
+        if unmap:
+            self._blocks = {}
+
+
+class _Worker:
+    """The environments owned by a worker process."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        env_cls: Type[Breakout],
+        breakout_config: BreakoutConfiguration,
+        indices: Sequence[int],
+        spec: BufferSpec,
+        names: Dict[str, str],
+    ) -> None:
+        """
+        Initialize the environments of the worker.
+
+        :param env_cls: the environment class.
+        :param breakout_config: the configuration of the environments.
+        :param indices: the indices of the environments owned by the worker.
+        :param spec: the specification of the shared buffers.
+        :param names: the names of the shared memory blocks.
+        """
+        self._buffers = _SharedBuffers(spec, names)
+        self._envs = {index: env_cls(breakout_config) for index in indices}
+
+    def step(self) -> None:
+        """Step the environments, resetting the finished ones."""
+        arrays = self._buffers.arrays
+        actions, rewards, dones = arrays["actions"], arrays["rewards"], arrays["dones"]
+        for index, env in self._envs.items():
+            observation, reward, done, _info = env.step(int(actions[index]))
+            rewards[index] = reward
+            dones[index] = done
+            if done:
+                self._write("terminal/", index, observation)
+                observation = env.reset()
+            self._write("obs/", index, observation)
+
+    def reset(self, seed: Optional[int]) -> None:
+        """Reset the environments."""
+        for index, env in self._envs.items():
+            env_seed = None if seed is None else seed + index
+            self._write("obs/", index, env.reset(seed=env_seed))
+
+    def close(self) -> None:
+        """Close the environments and detach from the shared memory."""
+        for env in self._envs.values():
+            env.close()
+        self._buffers.close()
+
+    def _write(self, prefix: str, index: int, observation: Any) -> None:
+        """Write an observation in the shared buffers."""
+        arrays = self._buffers.arrays
+        for key, value in _observation_to_arrays(observation).items():
+            arrays[prefix + key][index] = value
+
+
+def _run_worker(conn: Connection, *args: Any) -> None:
+    """
+    Serve the requests of the main process.
+
+    :param conn: the connection with the main process.
+    :param args: the arguments to build the '_Worker' instance.
+    """
+    worker: Optional[_Worker] = None
+    try:
+        worker = _Worker(*args)
+        while True:
+            message = conn.recv_bytes()
+            if message == _STEP:
+                worker.step()
+                conn.send_bytes(_DONE)
+                continue
+            command, data = pickle.loads(message)  # nosec
+            if command == _CLOSE:
+                break
+            worker.reset(data)
+            conn.send_bytes(_DONE)
+    except KeyboardInterrupt:
+        pass
+    except Exception:  # pylint: disable=broad-except
+        conn.send_bytes(pickle.dumps((_ERROR, traceback.format_exc())))
+    finally:
+        if worker is not None:
+            worker.close()
+        conn.close()
+
+
+class SharedMemoryVecEnv:  # pylint: disable=too-many-instance-attributes
+    """
+    Run Breakout environments in a pool of worker processes.
+
+    The interface is the same of 'BreakoutVecEnv': finished episodes are reset
+    automatically, and their last observation is stored in the
+    'terminal_observation' key of the info dictionary. Stepping can be split
+    in 'step_async' and 'step_wait' to overlap the simulation with other work.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        env_cls: Type[Breakout],
+        num_envs: int,
+        breakout_config: Optional[BreakoutConfiguration] = None,
+        num_workers: Optional[int] = None,
+        context: Optional[str] = None,
+        copy: bool = True,
+    ) -> None:
+        """
+        Initialize the vectorized environment.
+
+        :param env_cls: a concrete subclass of 'Breakout', e.g. 'BreakoutNDiscrete'.
+        :param num_envs: the number of environments.
+        :param breakout_config: the configuration shared by all the environments.
+        :param num_workers: the number of processes; by default, one per CPU.
+        :param context: the multiprocessing start method (e.g. 'fork', 'spawn').
+        :param copy: if False, the observations returned by 'step_wait' and
+            'reset' are views of the shared buffers, overwritten at the next step;
+            the views must not outlive this object.
+        """
+        assert num_envs >= 1, "The number of environments must be positive."
+        self.num_envs = num_envs
+        self.config = (
+            BreakoutConfiguration() if breakout_config is None else breakout_config
+        )
+        self.copy = copy
+        num_workers = min(num_workers or os.cpu_count() or 1, num_envs)
+
+        probe = env_cls(self.config)
+        self.observation_space = probe.observation_space
+        self.action_space = probe.action_space
+        probe_arrays = _observation_to_arrays(probe.reset())
+        probe.close()
+        self._is_dict = _SINGLE_KEY not in probe_arrays
+
+        spec: BufferSpec = {
+            "actions": ((num_envs,), "int64"),
+            "rewards": ((num_envs,), "float64"),
+            "dones": ((num_envs,), "bool"),
+        }
+        for prefix in ["obs/", "terminal/"]:
+            for key, value in probe_arrays.items():
+                spec[prefix + key] = ((num_envs,) + value.shape, value.dtype.str)
+        self._buffers = _SharedBuffers(spec)
+
+        ctx = multiprocessing.get_context(context)
+        self._connections: List[Connection] = []
+        self._processes = []
+        for indices in np.array_split(np.arange(num_envs), num_workers):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(  # type: ignore
+                target=_run_worker,
+                args=(
+                    child_conn,
+                    env_cls,
+                    self.config,
+                    indices.tolist(),
+                    spec,
+                    self._buffers.names,
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+        self._waiting = False
+        # the errors of the workers, once one of them failed
+        self._error: Optional[str] = None
+        self.closed = False
+
+    def reset(self, seed: Optional[int] = None) -> Any:
+        """
+        Reset all the environments.
+
+        :param seed: if not None, the i-th environment is reset with seed 'seed + i'.
+        :return: the batch of initial observations.
+        """
+        self._check_usable()
+        self._send_workers(pickle.dumps((_RESET, seed)))
+        self._wait_workers()
+        return self._get_observations("obs/")
+
+    def step_async(self, actions: Union[Sequence[int], np.ndarray]) -> None:
+        """Send the actions to the workers, without waiting for the results."""
+        self._check_usable()
+        assert not self._waiting, "Already waiting for the results of a step."
+        self._buffers.arrays["actions"][:] = np.asarray(actions).reshape(self.num_envs)
+        self._send_workers(_STEP)
+        self._waiting = True
+
+    def step_wait(self) -> Tuple[Any, np.ndarray, np.ndarray, List[Dict]]:
+        """Wait for the results of the step started with 'step_async'."""
+        self._check_usable()
+        assert self._waiting, "No step in progress; call 'step_async' first."
+        self._waiting = False
+        self._wait_workers()
+        arrays = self._buffers.arrays
+        dones = arrays["dones"].copy()
+        infos: List[Dict] = [{} for _ in range(self.num_envs)]
+        for index in np.flatnonzero(dones):
+            infos[index]["terminal_observation"] = self._get_single("terminal/", index)
+        return self._get_observations("obs/"), arrays["rewards"].copy(), dones, infos
+
+    def step(
+        self, actions: Union[Sequence[int], np.ndarray]
+    ) -> Tuple[Any, np.ndarray, np.ndarray, List[Dict]]:
+        """Do a simulation step in all the environments."""
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self) -> None:
+        """Stop the workers and release the shared memory."""
+        if self.closed:
+            return
+        message = pickle.dumps((_CLOSE, None))
+        for conn in self._connections:
+            try:
+                if self._waiting:
+                    conn.recv_bytes()
+                conn.send_bytes(message)
+            except (EOFError, OSError):
+                # the worker already terminated
+                pass
+        self._waiting = False
+        for process in self._processes:
+            process.join()
+        for conn in self._connections:
+            conn.close()
+        # the memory of borrowed views is unmapped only when this object is collected
+        self._buffers.close(unlink=True, unmap=self.copy)
+        self.closed = True
+
+    def __del__(self) -> None:
+        """Close the environment when garbage collected."""
+        if not getattr(self, "closed", True):
+            self.close()
+
+    def _check_usable(self) -> None:
+        """Raise an error if the environment is closed, or a worker failed."""
+        if self.closed:
+            raise RuntimeError("The environment is closed.")
+        if self._error is not None:
+            raise RuntimeError(
+                "A worker process failed, the environment must be closed:\n"
+                + self._error
+            )
+
+    def _send_workers(self, message: bytes) -> None:
+        """
+        Send a message to all the workers.
+
+        A worker that already failed has closed its end of the connection:
+        its error is reported by '_wait_workers'.
+
+        :param message: the message to send.
+        """
+        for conn in self._connections:
+            try:
+                conn.send_bytes(message)
+            except OSError:
+                pass
+
+    def _wait_workers(self) -> None:
+        """
+        Wait for the acknowledgment of all the workers.
+
+        After an error, the environment can only be closed.
+
+        :raises RuntimeError: if a worker failed.
+        """
+        errors = []
+        for conn in self._connections:
+            try:
+                message = conn.recv_bytes()
+            except (EOFError, OSError):
+                errors.append("The worker process terminated unexpectedly.")
+                continue
+            if message != _DONE:
+                _command, error = pickle.loads(message)  # nosec
+                errors.append(error)
+        if errors:
+            self._error = "\n".join(errors)
+            raise RuntimeError("Error in worker process:\n" + self._error)
+
+    def _get_observations(self, prefix: str) -> Any:
+        """Get the batch of observations from the buffers with a given prefix."""
+        arrays = self._buffers.arrays
+        result = {
+            key[len(prefix) :]: array.copy() if self.copy else array
+            for key, array in arrays.items()
+            if key.startswith(prefix)
+        }
+        return result if self._is_dict else result[_SINGLE_KEY]
+
+    def _get_single(self, prefix: str, index: int) -> Any:
+        """Get a copy of the observation of one environment."""
+        arrays = self._buffers.arrays
+        result = {
+            key[len(prefix) :]: array[index].copy()
+            for key, array in arrays.items()
+            if key.startswith(prefix)
+        }
+        return result if self._is_dict else result[_SINGLE_KEY]
@@ -0,0 +1,186 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+The Pygame viewer of the Breakout game.
+
+The bricks are drawn once on a background layer, and only the removed or added
+bricks are updated. At each frame, the areas covered by the moving objects and
+the labels in the previous frame are restored from the background, the moving
+objects and the labels are drawn again in a fixed order, and only the changed
+areas of the display are updated.
+
+The labels are rendered by the font only when their text changes: the rendered
+surfaces are kept in a bounded LRU cache, keyed by text and color.
+"""
+import functools
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from gym_breakout_pygame.breakout_env import (
+    BreakoutState,
+    PygameDrawable,
+    _AbstractPygameViewer,
+    white,
+)
+
+# the default number of rendered labels kept in the cache
+LABEL_CACHE_SIZE = 256
+
+Color = Tuple[int, int, int]
+# the label colors, as hashable tuples
+_BLACK: Color = (0, 0, 0)
+_BROWN: Color = (165, 42, 42)
+
+
+class PygameViewer(
+    _AbstractPygameViewer
+):  # pylint: disable=too-many-instance-attributes
+    """A concrete Pygame viewer class."""
+
+    def __init__(
+        self, breakout_state: BreakoutState, label_cache_size: int = LABEL_CACHE_SIZE
+    ) -> None:
+        """
+        Initialize the Pygame viewer object.
+
+        :param breakout_state: the state of the game.
+        :param label_cache_size: the maximum number of rendered labels kept in
+            the cache; 0 to render the labels at every frame.
+        """
+        self.state = breakout_state
+
+        pygame.init()  # pylint: disable=no-member
+        pygame.display.set_caption("Breakout")
+        self.screen = pygame.display.set_mode(
+            [self.state.config.win_width, self.state.config.win_height]
+        )
+        self.myfont = pygame.font.SysFont("Arial", 30)
+        self.label_cache_size = label_cache_size
+        self._render_label: Callable[
+            [str, Color], pygame.Surface
+        ] = functools.lru_cache(maxsize=label_cache_size)(self._render_text)
+        self._score: Optional[float] = None
+        self._score_label: Optional[pygame.Surface] = None
+        self.background = pygame.Surface(self.screen.get_size())
+        self.drawables = self._init_drawables()
+        self._background_bricks = np.zeros(0, dtype=np.uint8)
+        self._previous_rects: List[pygame.Rect] = []
+        self._full_update = True
+        self._init_background()
+
+    def reset(self, breakout_state: BreakoutState) -> None:
+        """Reset the viewer."""
+        self.state = breakout_state
+        self.drawables = self._init_drawables()
+        self._init_background()
+
+    def _init_drawables(self) -> List[PygameDrawable]:
+        """Initialize the moving objects, in drawing order."""
+        return [self.state.paddle, self.state.ball, self.state.bullet]
+
+    def _init_background(self) -> None:
+        """Draw the bricks on the background, and schedule a full redraw."""
+        self.background.fill(white)
+        self.state.brick_grid.draw_on_screen(self.background)
+        self._background_bricks = self.state.brick_grid.bricksgrid.copy()
+        self._previous_rects = []
+        self.screen.blit(self.background, (0, 0))
+        self._full_update = True
+
+    def render(self, mode="human") -> Optional[np.ndarray]:
+        """Render a frame of the game."""
+        dirty_rects = self._update_background()
+        self._previous_rects.extend(dirty_rects)
+        for rect in self._previous_rects:
+            self.screen.blit(self.background, rect, rect)
+        rects = [
+            self._draw_score_label(),
+            self._draw_last_command(),
+            *self._draw_game_objects(),
+        ]
+
+        if mode == "human":
+            if self._full_update:
+                pygame.display.update()
+            else:
+                pygame.display.update(self._previous_rects + rects)
+        self._full_update = False
+        self._previous_rects = rects
+        if mode == "rgb_array":
+            screen = pygame.surfarray.array3d(self.screen)
+            # swap width with height
+            return screen.swapaxes(0, 1)
+        return None
+
+    def _update_background(self) -> List[pygame.Rect]:
+        """Erase the removed bricks and draw the added ones on the background."""
+        brick_grid = self.state.brick_grid
+        bricks = brick_grid.bricksgrid
+        if np.array_equal(bricks, self._background_bricks):
+            return []
+        rects = []
+        for i, j in zip(*np.nonzero(bricks != self._background_bricks)):
+            brick = brick_grid.brick(int(i), int(j))
+            if bricks[i, j]:
+                rects.append(brick.draw_on_screen(self.background))
+            else:
+                rects.append(self.background.fill(white, tuple(brick.rect)))
+        np.copyto(self._background_bricks, bricks)
+        return rects
+
+    def _render_text(self, text: str, color: Color) -> pygame.Surface:
+        """Render a label with the font."""
+        return self.myfont.render(text, 100, color)
+
+    def _draw_score_label(self) -> pygame.Rect:
+        """Draw the score label, rendered again only when the score changes."""
+        score = self.state.score
+        if score != self._score or self._score_label is None:
+            self._score_label = self._render_label(str(score), _BLACK)
+            # without cache, the label is rendered at every frame
+            self._score = score if self.label_cache_size > 0 else None
+        return self.screen.blit(self._score_label, (50, 10))
+
+    def _draw_last_command(self) -> pygame.Rect:
+        """Draw the last command executed."""
+        cmd = self.state.last_command
+        cmd_to_string = str(cmd)
+        count_label = self._render_label(cmd_to_string, _BROWN)
+        return self.screen.blit(count_label, (20, 10))
+
+    def _draw_game_objects(self) -> List[pygame.Rect]:
+        """Draw the moving objects, and get the rectangles they cover."""
+        rects = []
+        for drawable in self.drawables:
+            rect = drawable.draw_on_screen(self.screen)
+            if rect is not None:
+                rects.append(rect)
+        return rects
+
+    def close(self) -> None:
+        """Close the viewer."""
+        pygame.display.quit()
+        pygame.quit()  # pylint: disable=no-member
@@ -0,0 +1,195 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Bounded visitation counts of the game states, for count-based exploration.
+
+The states are identified by 'BreakoutState.state_hash'. Two bounded tables
+count the visits:
+
+- 'LRUVisitCounts': exact counts of the most recently visited states; the least
+  recently visited state is evicted when the table is full;
+- 'CountMinSketch': approximate counts of all the states in a fixed-size array;
+  the counts are never underestimated.
+
+The 'VisitationCounter' wrapper counts the states visited by a Breakout
+environment, and reports the count of the current state in the step info.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Tuple, cast
+
+import gym
+import numpy as np
+
+from gym_breakout_pygame.breakout_env import Breakout
+
+VISIT_COUNT_KEY = "visit_count"
+
+
+class VisitCounts(ABC):
+    """Counts of the visits of 64-bit keys, with bounded memory."""
+
+    @abstractmethod
+    def increment(self, key: int) -> int:
+        """
+        Count a visit of a key.
+
+        :param key: the key, an integer in [0, 2**64).
+        :return: the count of the key, this visit included.
+        """
+
+    @abstractmethod
+    def count(self, key: int) -> int:
+        """
+        Get the count of a key.
+
+        :param key: the key, an integer in [0, 2**64).
+        :return: the number of visits of the key.
+        """
+
+
+class LRUVisitCounts(VisitCounts):
+    """Exact counts of the most recently visited keys."""
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Initialize the table.
+
+        :param capacity: the maximum number of keys in the table.
+        """
+        assert capacity > 0, "The capacity must be positive."
+        self.capacity = capacity
+        self._counts: "OrderedDict[int, int]" = OrderedDict()
+
+    def increment(self, key: int) -> int:
+        """Count a visit of a key, evicting the least recently visited key if full."""
+        counts = self._counts
+        count = counts.pop(key, 0) + 1
+        counts[key] = count
+        if len(counts) > self.capacity:
+            counts.popitem(last=False)
+        return count
+
+    def count(self, key: int) -> int:
+        """Get the count of a key; 0 if it was never visited or evicted."""
+        return self._counts.get(key, 0)
+
+    def __len__(self) -> int:
+        """Get the number of keys in the table."""
+        return len(self._counts)
+
+
+class CountMinSketch(VisitCounts):
+    """
+    Approximate counts of all the keys, in a (depth, width) array of counters.
+
+    Each row maps a key to a counter with its own multiply-shift hash; the count
+    of a key is the minimum of its counters. With conservative updates, only the
+    minimal counters are incremented, which reduces the overestimation.
+    """
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4, seed: int = 0) -> None:
+        """
+        Initialize the sketch.
+
+        :param width: the number of counters of each row, a power of two.
+        :param depth: the number of rows.
+        :param seed: the seed of the hash functions.
+        """
+        assert (
+            width > 1 and width & (width - 1) == 0
+        ), "The width must be a power of two."
+        assert depth > 0, "The depth must be positive."
+        self.width = width
+        self.depth = depth
+        self._shift = 64 - width.bit_length() + 1
+        self._multipliers = [
+            int(multiplier) | 1
+            for multiplier in np.random.default_rng(seed).integers(
+                0, np.iinfo(np.uint64).max, size=depth, dtype=np.uint64
+            )
+        ]
+        self._counters = np.zeros((depth, width), dtype=np.uint32)
+        self._rows = list(self._counters)
+
+    def _columns(self, key: int) -> list:
+        """Get the counter of a key in each row."""
+        shift = self._shift
+        return [
+            (key * multiplier & 0xFFFFFFFFFFFFFFFF) >> shift
+            for multiplier in self._multipliers
+        ]
+
+    def increment(self, key: int) -> int:
+        """Count a visit of a key, with a conservative update."""
+        cells = list(zip(self._rows, self._columns(key)))
+        count = min(int(row[column]) for row, column in cells) + 1
+        for row, column in cells:
+            if row[column] < count:
+                row[column] = count
+        return count
+
+    def count(self, key: int) -> int:
+        """Get an upper bound of the count of a key."""
+        return min(
+            int(row[column]) for row, column in zip(self._rows, self._columns(key))
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Get the memory of the counters, in bytes."""
+        return self._counters.nbytes
+
+
+class VisitationCounter(gym.Wrapper):
+    """
+    Count the visits of the states of a Breakout environment.
+
+    The state reached by each reset and step is counted in the table, and the
+    count is added to the step info under 'visit_count'.
+    """
+
+    def __init__(self, env: gym.Env, counts: VisitCounts) -> None:
+        """
+        Initialize the wrapper.
+
+        :param env: the Breakout environment, possibly wrapped.
+        :param counts: the table of the counts, possibly shared by several envs.
+        """
+        super().__init__(env)
+        self.counts = counts
+        self._breakout = cast(Breakout, env.unwrapped)
+        self.last_count = 0
+
+    def reset(self, **kwargs) -> Any:
+        """Reset the environment, and count the initial state."""
+        obs = self.env.reset(**kwargs)
+        self.last_count = self.counts.increment(self._breakout.state.state_hash())
+        return obs
+
+    def step(self, action: int) -> Tuple[Any, float, bool, Any]:
+        """Do a step in the environment, and count the reached state."""
+        obs, reward, done, info = self.env.step(action)
+        self.last_count = self.counts.increment(self._breakout.state.state_hash())
+        return obs, reward, done, {**info, VISIT_COUNT_KEY: self.last_count}
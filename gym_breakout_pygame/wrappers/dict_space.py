@@ -23,14 +23,21 @@
 
 
 """Breakout environments using a "dict" state space."""
+from typing import Any
+from typing import Dict as DictType
+from typing import List, Tuple, cast
 
-from gym.spaces import Dict
+import numpy as np
+from gym.spaces import Box, Dict, Discrete, Space
+from numpy.typing import DTypeLike
 
 from gym_breakout_pygame.breakout_env import BreakoutState
 from gym_breakout_pygame.wrappers.skipper import BreakoutSkipper
 
 
-class BreakoutDictSpace(BreakoutSkipper):
+class BreakoutDictSpace(
+    BreakoutSkipper
+):  # pylint: disable=too-many-instance-attributes
     """
     A Breakout environment with a dictionary state space.
 
@@ -40,42 +47,142 @@ class BreakoutDictSpace(BreakoutSkipper):
     - Ball y coordinate (Discrete)
     - Ball horizontal speed (Discrete)
     - Ball vertical speed (Discrete)
-    - Brick matrix (MultiBinary)
+    - Brick matrix (MultiBinary), indexed by column, then by row
+
+    The observations are written in a dictionary owned by the environment. By
+    default, a copy of the dictionary and of its brick matrix is returned; with
+    'copy=False', the dictionary itself is returned, and it is overwritten by
+    the next observation.
+
+    With 'packed_bricks=True', the brick matrix is bit-packed in a uint8 array,
+    as 'np.packbits' of the (cols, rows) matrix; see 'unpack_bricks'. The method
+    'hashable_key' maps an observation to an integer, e.g. to use it as the key of
+    a table of values or counts.
     """
 
-    def __init__(self, *args, **kwargs) -> None:
-        """Initialize the environment."""
+    # the observations never compare equal, see 'compare'
+    skip_frames = False
+
+    def __init__(
+        self,
+        *args,
+        dtype: DTypeLike = np.float64,
+        copy: bool = True,
+        packed_bricks: bool = False,
+        **kwargs,
+    ) -> None:
+        """
+        Initialize the environment.
+
+        :param args: the positional arguments of 'Breakout'.
+        :param dtype: the dtype of the brick matrix; ignored if packed.
+        :param copy: if False, the observations are the dictionary of the
+            environment, overwritten by the next observation.
+        :param packed_bricks: if True, the brick matrix is bit-packed.
+        :param kwargs: the keyword arguments of 'Breakout'.
+        """
         super().__init__(*args, **kwargs)
+        self.copy = copy
+        self.packed_bricks = packed_bricks
+        self._buffer = self.state.to_dict()
+        if packed_bricks:
+            self._buffer["bricks_matrix"] = np.packbits(
+                self.state.brick_grid.bricksgrid
+            )
+            nb_bytes = self._buffer["bricks_matrix"].size
+            bricks_space: Space = Box(0, 255, (nb_bytes,), dtype=np.uint8)
+        else:
+            self._buffer["bricks_matrix"] = self._buffer["bricks_matrix"].astype(dtype)
+            bricks_space = self._bricks_matrix_space
 
         if self.config.ball_enabled:
+            # the speed values are swapped, see 'BreakoutState.to_dict'
             self.observation_space = Dict(
                 {
                     "paddle_x": self._paddle_x_space,
                     "ball_x": self._ball_x_space,
                     "ball_y": self._ball_y_space,
-                    "ball_x_speed": self._ball_x_speed_space,
-                    "ball_y_speed": self._ball_y_speed_space,
-                    "bricks_matrix": self._bricks_matrix_space,
+                    "ball_x_speed": self._ball_y_speed_space,
+                    "ball_y_speed": self._ball_x_speed_space,
+                    "bricks_matrix": bricks_space,
                 }
             )
         else:
             self.observation_space = Dict(
                 {
                     "paddle_x": self._paddle_x_space,
-                    "bricks_matrix": self._bricks_matrix_space,
+                    "bricks_matrix": bricks_space,
                 }
             )
 
+        self._obs = dict(self._buffer)
+        if not self.config.ball_enabled:
+            self._obs.pop("ball_x")
+            self._obs.pop("ball_y")
+            self._obs.pop("ball_x_speed")
+            self._obs.pop("ball_y_speed")
+
+        # the features of the key, with their number of values
+        self._key_features: List[Tuple[str, int]] = [
+            (name, int(cast(Discrete, space).n))
+            for name, space in self.observation_space.spaces.items()
+            if name != "bricks_matrix"
+        ]
+        self._nb_brick_bits = 8 * (
+            (self.config.brick_cols * self.config.brick_rows + 7) // 8
+        )
+
     def observe(self, state: BreakoutState):
         """Observe the state."""
-        dictionary = state.to_dict()
-        if not self.config.ball_enabled:
-            dictionary.pop("ball_x")
-            dictionary.pop("ball_y")
-            dictionary.pop("ball_x_speed")
-            dictionary.pop("ball_y_speed")
+        if self.packed_bricks:
+            values = state.to_dict()
+            values["bricks_matrix"] = np.packbits(state.brick_grid.bricksgrid)
+            if not self.copy:
+                np.copyto(self._buffer["bricks_matrix"], values["bricks_matrix"])
+                values["bricks_matrix"] = self._buffer["bricks_matrix"]
+        else:
+            values = state.to_dict(self._buffer)
+        if not self.copy:
+            obs = self._obs
+            for key in obs:
+                obs[key] = values[key]
+            return obs
+        dictionary = {key: values[key] for key in self._obs}
+        if not self.packed_bricks:
+            dictionary["bricks_matrix"] = values["bricks_matrix"].copy()
         return dictionary
 
+    def unpack_bricks(self, packed: np.ndarray) -> np.ndarray:
+        """
+        Unpack a bit-packed brick matrix.
+
+        :param packed: the packed brick matrix of an observation.
+        :return: the (cols, rows) uint8 brick matrix.
+        """
+        config = self.config
+        return np.unpackbits(
+            packed, count=config.brick_cols * config.brick_rows
+        ).reshape(config.brick_cols, config.brick_rows)
+
+    def hashable_key(self, obs: DictType[str, Any]) -> int:
+        """
+        Map an observation to an integer, distinct for distinct observations.
+
+        The features are encoded in mixed radix, followed by the bits of the
+        bricks; with packed bricks, the key costs a single conversion of the
+        packed bytes.
+
+        :param obs: an observation of the environment, in its observation space.
+        :return: the key.
+        """
+        key = 0
+        for name, size in self._key_features:
+            key = key * size + int(obs[name])
+        bricks = obs["bricks_matrix"]
+        if not self.packed_bricks:
+            bricks = np.packbits(np.not_equal(bricks, 0))
+        return key << self._nb_brick_bits | int.from_bytes(bricks.tobytes(), "big")
+
     @classmethod
     def compare(cls, obs1, obs2) -> bool:
         """Compare two observations."""
@@ -30,18 +30,32 @@ Two types:
 - BreakoutNDiscrete: the observation state is Discrete.
 """
 
-from typing import Optional
+import math
+import operator
+from typing import Hashable, Optional, Tuple
 
-import gym
 import numpy as np
 from gym.spaces import Discrete, MultiDiscrete
-from numpy._typing import NDArray
+from numpy.typing import DTypeLike
 
 from gym_breakout_pygame.breakout_env import BreakoutConfiguration, BreakoutState
-from gym_breakout_pygame.utils import encode
+from gym_breakout_pygame.utils import strides
 from gym_breakout_pygame.wrappers.skipper import BreakoutSkipper
 
 
+def _quantized_features(state: BreakoutState) -> Tuple:
+    """Get the features of 'observe_multidiscrete', without building an array."""
+    config = state.config
+    ball = state.ball
+    return (
+        state.paddle.x // config.resolution_x,
+        ball.x // config.resolution_x,
+        ball.y // config.resolution_y,
+        ball.speed_x_norm,
+        ball.speed_y_norm,
+    )
+
+
 class BreakoutNMultiDiscrete(BreakoutSkipper):
     """
     Breakout with multi-discrete state space.
@@ -52,11 +66,28 @@ class BreakoutNMultiDiscrete(BreakoutSkipper):
     - ball x position
     - ball y position
     - ball direction
+
+    The observations are written in a buffer owned by the environment. By
+    default, a copy of the buffer is returned; with 'copy=False', the buffer
+    itself is returned, and it is overwritten by the next observation.
     """
 
-    def __init__(self, config: Optional[BreakoutConfiguration] = None) -> None:
-        """Initialize the environment."""
+    def __init__(
+        self,
+        config: Optional[BreakoutConfiguration] = None,
+        dtype: DTypeLike = np.int64,
+        copy: bool = True,
+    ) -> None:
+        """
+        Initialize the environment.
+
+        :param config: the game configuration.
+        :param dtype: the integer dtype of the observations.
+        :param copy: if False, the observations are views of the buffer of the
+            environment, overwritten by the next observation.
+        """
         super().__init__(config)
+        self.copy = copy
         self.observation_space = MultiDiscrete(
             [
                 self._paddle_x_space.n,
@@ -64,21 +95,41 @@ class BreakoutNMultiDiscrete(BreakoutSkipper):
                 self._ball_y_space.n,
                 self._ball_x_speed_space.n,
                 self._ball_y_speed_space.n,
-            ]
+            ],
+            dtype=dtype,
         )
+        self._buffer = np.zeros(self.observation_space.shape, dtype=dtype)
 
     @classmethod
     def compare(cls, obs1: np.ndarray, obs2: np.ndarray) -> bool:
         """Compare two observations."""
         return (obs1 == obs2).all()
 
-    def observe(self, state: BreakoutState) -> gym.Space:  # pylint: disable=no-self-use
+    def observation_key(self, state: BreakoutState) -> Hashable:
+        """Get the features of the observation, as a tuple."""
+        return _quantized_features(state)
+
+    def observe(self, state: BreakoutState) -> np.ndarray:
         """Return a vectorized observation."""
-        return self.observe_multidiscrete(state)
+        obs = self.observe_multidiscrete(state, out=self._buffer)
+        return obs.copy() if self.copy else obs
 
     @staticmethod
-    def observe_multidiscrete(state: BreakoutState) -> NDArray[np.int]:
-        """Observe from state a multidiscrete set of features."""
+    def observe_multidiscrete(
+        state: BreakoutState, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Observe from state a multidiscrete set of features.
+
+        :param state: the game state.
+        :param out: the array of 5 integers where to write the features;
+            by default, a new array.
+        :return: the array of features.
+        """
+        if out is not None:
+            for index, value in enumerate(_quantized_features(state)):
+                out[index] = value
+            return out
         paddle_x = state.paddle.x // state.config.resolution_x
         ball_x = state.ball.x // state.config.resolution_x
         ball_y = state.ball.y // state.config.resolution_y
@@ -99,28 +150,26 @@ class BreakoutNDiscrete(BreakoutSkipper):
     def __init__(self, config: Optional[BreakoutConfiguration] = None) -> None:
         """Initialize the environment."""
         super().__init__(config)
-        self.observation_space = Discrete(
-            self.config.n_paddle_x
-            * self.config.n_ball_x
-            * self.config.n_ball_y
-            * self.config.n_ball_x_speed
-            * self.config.n_ball_y_speed
+        self.dims = (
+            self.config.n_paddle_x,
+            self.config.n_ball_x,
+            self.config.n_ball_y,
+            self.config.n_ball_x_speed,
+            self.config.n_ball_y_speed,
         )
+        self._strides = strides(self.dims).tolist()
+        self.observation_space = Discrete(math.prod(self.dims))
 
     def observe(self, state: BreakoutState) -> int:
         """Do an observation of the environment state."""
-        obs = list(map(int, BreakoutNMultiDiscrete.observe_multidiscrete(state)))
-        dims = [
-            state.config.n_paddle_x,
-            state.config.n_ball_x,
-            state.config.n_ball_y,
-            state.config.n_ball_x_speed,
-            state.config.n_ball_y_speed,
-        ]
-        result = encode(list(obs), dims)
-        return result
+        features = map(int, _quantized_features(state))
+        return sum(map(operator.mul, features, self._strides))
 
     @classmethod
     def compare(cls, obs1, obs2) -> bool:
         """Compare two observations."""
         return obs1 == obs2
+
+    def observation_key(self, state: BreakoutState) -> Hashable:
+        """Get the features of the encoded observation, as a tuple."""
+        return _quantized_features(state)
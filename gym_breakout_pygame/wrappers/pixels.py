@@ -0,0 +1,119 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""
+Breakout environment with pixel observations.
+
+The frames are rasterized with NumPy directly at the observation resolution,
+without drawing the full window and resizing it. The last k frames can be
+stacked: they are kept in a ring buffer where each frame is written twice, at
+index i and i + k, so that the stack is always a contiguous view of the buffer.
+"""
+from typing import Any, Optional
+
+import numpy as np
+from gym.spaces import Box
+
+from gym_breakout_pygame.breakout_env import (
+    Breakout,
+    BreakoutConfiguration,
+    BreakoutState,
+)
+from gym_breakout_pygame.rendering import ArrayRenderer
+
+
+class BreakoutPixels(Breakout):
+    """
+    A Breakout environment whose observations are frames of the game.
+
+    The observation is a (height, width) grayscale or (height, width, 3) RGB
+    uint8 frame; with frame stacking, the last k frames are stacked along a new
+    first axis, from the oldest to the newest. After a reset, the stack is
+    filled with the initial frame.
+
+    By default, a copy of the observation is returned; with 'copy=False', a view
+    of the internal buffer is returned, and it is overwritten by the next steps.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        config: Optional[BreakoutConfiguration] = None,
+        height: int = 84,
+        width: int = 84,
+        grayscale: bool = True,
+        frame_stack: int = 1,
+        copy: bool = True,
+    ) -> None:
+        """
+        Initialize the environment.
+
+        :param config: the game configuration.
+        :param height: the height of the frames.
+        :param width: the width of the frames.
+        :param grayscale: whether the frames are grayscale or RGB.
+        :param frame_stack: the number of stacked frames; 1 for no stacking.
+        :param copy: if False, the observations are views of the buffer of the
+            environment, overwritten by the next steps.
+        """
+        super().__init__(config)
+        assert frame_stack >= 1, "The number of stacked frames must be positive."
+        self.frame_stack = frame_stack
+        self.copy = copy
+        self._stateful_observe = frame_stack > 1
+        self._pixel_renderer = ArrayRenderer(
+            self.config, size=(height, width), grayscale=grayscale
+        )
+        frame_shape = self._pixel_renderer.frame.shape
+        self._frames = np.zeros((2 * frame_stack, *frame_shape), dtype=np.uint8)
+        self._next_index = 0
+        self.observation_space = Box(
+            0,
+            255,
+            frame_shape if frame_stack == 1 else (frame_stack, *frame_shape),
+            dtype=np.uint8,
+        )
+
+    def observe(self, state: BreakoutState) -> np.ndarray:
+        """Render the state, and push the frame in the stack."""
+        frame = self._pixel_renderer.render(state)
+        if self.frame_stack == 1:
+            return frame.copy() if self.copy else frame
+        index = self._next_index
+        self._frames[index] = frame
+        self._frames[index + self.frame_stack] = frame
+        self._next_index = (index + 1) % self.frame_stack
+        return self._stack()
+
+    def reset(self, seed: Optional[int] = None, **kwargs) -> Any:
+        """Reset the environment, and fill the stack with the initial frame."""
+        obs = super().reset(seed=seed, **kwargs)
+        if self.frame_stack == 1:
+            return obs
+        self._frames[:] = self._pixel_renderer.frame
+        return self._stack()
+
+    def _stack(self) -> np.ndarray:
+        """Get the last frames, from the oldest to the newest."""
+        start = self._next_index
+        stack = self._frames[start : start + self.frame_stack]
+        return stack.copy() if self.copy else stack
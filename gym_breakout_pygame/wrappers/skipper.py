@@ -22,20 +22,41 @@
 #
 
 
-"""A Gym wrapper that repeats the same action until the observation does not change."""
+"""
+A Gym wrapper that repeats the same action until the observation does not change.
+
+The subclasses whose observation is a quantization of the game state can
+override 'observation_key'. The skipper then advances the game frame by frame
+comparing the cheap keys, and only builds the observation of the last frame.
+The subclasses whose observations never compare equal set 'skip_frames' to
+False: a step is then a single frame, without comparing the observations.
+"""
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Tuple
+from typing import Any, Hashable, Optional, Tuple, Union
+
+import numpy as np
 
-from gym_breakout_pygame.breakout_env import Breakout, BreakoutConfiguration
+from gym_breakout_pygame.breakout_env import (
+    Breakout,
+    BreakoutConfiguration,
+    BreakoutState,
+    Command,
+)
+from gym_breakout_pygame.utils import copy_observation
 
 
 class BreakoutSkipper(Breakout, ABC):
     """Repeat same step until a different observation is obtained."""
 
+    # False for the subclasses whose 'compare' is always false: a step is then
+    # a single frame, and the observations are not compared
+    skip_frames = True
+
     def __init__(self, breakout_config: Optional[BreakoutConfiguration] = None):
         """Initialize the environment."""
         super().__init__(breakout_config)
         self._previous_obs = None  # type: Any
+        self._previous_key: Optional[Hashable] = None
 
     @classmethod
     @abstractmethod
@@ -43,21 +64,111 @@ class BreakoutSkipper(Breakout, ABC):
         """Compare two observations."""
         return False
 
+    def observation_key(  # pylint: disable=no-self-use,unused-argument
+        self, state: BreakoutState
+    ) -> Optional[Hashable]:
+        """
+        Get a cheap key of the observation of a state.
+
+        Two states must have equal keys if and only if 'compare' is true on
+        their observations. By default there is no key, and the full
+        observations are compared.
+
+        :param state: the game state.
+        :return: the key, or None if the observations must be compared.
+        """
+        return None
+
     def reset(self, seed: Optional[int] = None, **kwargs) -> Any:
         """Reset the environment."""
         obs = super().reset(seed=seed, **kwargs)
-        self._previous_obs = obs
+        # pylint: disable-next=assignment-from-none
+        self._previous_key = self.observation_key(self.state)
+        self._keep_previous_obs(obs)
         return obs
 
+    def set_state(self, snapshot: Union[np.ndarray, bytes]) -> None:
+        """Restore the game state from a snapshot taken with 'get_state'."""
+        super().set_state(snapshot)
+        # pylint: disable-next=assignment-from-none
+        self._previous_key = self.observation_key(self.state)
+        self._keep_previous_obs(self.observe(self.state))
+
     def step(self, action: int) -> Tuple[Any, float, bool, Any]:
         """Do a simulation step in the environment."""
+        if not self.skip_frames:
+            if self._profiler is not None:
+                self._profiler.record_skipper_iterations(1)
+            return super().step(action)
+        if self._previous_key is not None:
+            return self._fast_forward(action)
         obs, reward, is_finished, info = super().step(action)
+        iterations = 1
         while self.compare(obs, self._previous_obs) and not is_finished:
+            iterations += 1
             next_obs, next_reward, next_is_finished, next_info = super().step(action)
             obs = next_obs
             reward += next_reward
             is_finished = is_finished or next_is_finished
             info.update(next_info)
 
-        self._previous_obs = obs
+        if self._profiler is not None:
+            self._profiler.record_skipper_iterations(iterations)
+        self._keep_previous_obs(obs)
         return obs, reward, is_finished, info
+
+    def _keep_previous_obs(self, obs: Any) -> None:
+        """
+        Keep the observation to compare with the next ones.
+
+        Without an observation key, the observations are compared: the kept
+        one is a copy, since an observation can be a buffer that the next
+        steps overwrite (e.g. with 'copy=False').
+
+        :param obs: the observation.
+        """
+        self._previous_obs = (
+            obs if self._previous_key is not None else copy_observation(obs)
+        )
+
+    def _fast_forward(self, action: int) -> Tuple[Any, float, bool, Any]:
+        """Repeat the action until the observation key changes, then observe."""
+        reward, is_finished = self._skip(Command(action))
+        obs = self._observe_current_state()
+        self._previous_obs = obs
+        return obs, reward, is_finished, {}
+
+    def _advance(self, command: Command) -> Tuple[float, bool]:
+        """
+        Do the simulation steps of 'step', without observing if possible.
+
+        :param command: the command.
+        :return: the reward, and whether the game is finished.
+        """
+        if not self.skip_frames:
+            if self._profiler is not None:
+                self._profiler.record_skipper_iterations(1)
+            return super()._advance(command)
+        if self._previous_key is None:
+            _, reward, is_finished, _ = self.step(command.value)
+            return reward, is_finished
+        return self._skip(command)
+
+    def _skip(self, command: Command) -> Tuple[float, bool]:
+        """Repeat a command until the observation key changes."""
+        state = self.state
+        previous_key = self._previous_key
+        reward = state.step(command)
+        is_finished = state.is_finished()
+        key = self.observation_key(state)  # pylint: disable=assignment-from-none
+        iterations = 1
+        while key == previous_key and not is_finished:
+            iterations += 1
+            reward += state.step(command)
+            is_finished = state.is_finished()
+            key = self.observation_key(state)  # pylint: disable=assignment-from-none
+
+        if self._profiler is not None:
+            self._profiler.record_skipper_iterations(iterations)
+        self._previous_key = key
+        return reward, is_finished
@@ -97,6 +97,7 @@ if __name__ == "__main__":
             Path("gym_breakout_pygame").glob("**/*.py"),
             Path("tests").glob("**/*.py"),
             Path("scripts").glob("**/*.py"),
+            Path("benchmarks").glob("**/*.py"),
         ),
     )
 
@@ -20,3 +20,45 @@ _.observation_space  # unused attribute (gym_breakout_pygame/wrappers/normal_spa
 cls  # unused variable (gym_breakout_pygame/wrappers/normal_space.py:98)
 cls  # unused variable (gym_breakout_pygame/wrappers/normal_space.py:111)
 cls  # unused variable (gym_breakout_pygame/wrappers/skipper.py:43)
+__getattr__  # unused function (gym_breakout_pygame/breakout_env.py:1060)
+BreakoutVecEnv  # unused class (gym_breakout_pygame/vector/batched.py:55)
+_.frame  # unused property (gym_breakout_pygame/rendering.py:88)
+SharedMemoryVecEnv  # unused class (gym_breakout_pygame/vector/shared_memory.py:197)
+_.clone  # unused method (gym_breakout_pygame/breakout_env.py:810)
+TrajectoryRecorder  # unused class (gym_breakout_pygame/trajectory.py:88)
+TrajectoryReplayer  # unused class (gym_breakout_pygame/trajectory.py:219)
+_.column  # unused method (gym_breakout_pygame/trajectory.py:277)
+_.get_observation  # unused method (gym_breakout_pygame/trajectory.py:356)
+TransitionModel  # unused class (gym_breakout_pygame/tabular.py)
+_.to_csr  # unused method (gym_breakout_pygame/tabular.py)
+_.observation_groups  # unused method (gym_breakout_pygame/tabular.py)
+load_or_build_transition_model  # unused function (gym_breakout_pygame/tabular.py)
+value_iteration  # unused function (gym_breakout_pygame/tabular.py)
+policy_iteration  # unused function (gym_breakout_pygame/tabular.py)
+_.initial_state  # unused attribute (gym_breakout_pygame/tabular.py)
+_.writeable  # unused attribute (gym_breakout_pygame/utils.py)
+encode_batch  # unused function (gym_breakout_pygame/utils.py)
+decode_batch  # unused function (gym_breakout_pygame/utils.py)
+BreakoutNMultiDiscrete  # unused class (gym_breakout_pygame/wrappers/normal_space.py)
+BreakoutPixels  # unused class (gym_breakout_pygame/wrappers/pixels.py)
+play_with_keyboard  # unused function (gym_breakout_pygame/breakout_env.py)
+load_raw_frames  # unused function (gym_breakout_pygame/recording.py)
+FrameRecorder  # unused class (gym_breakout_pygame/recording.py)
+_.nb_recorded  # unused attribute (gym_breakout_pygame/recording.py)
+_.nb_dropped  # unused attribute (gym_breakout_pygame/recording.py)
+_.flush  # unused method (gym_breakout_pygame/recording.py)
+_.play  # unused method (gym_breakout_pygame/breakout_env.py)
+make_env  # unused function (gym_breakout_pygame/registration.py)
+GymApiCompatibility  # unused class (gym_breakout_pygame/registration.py)
+_.is_truncated  # unused method (gym_breakout_pygame/breakout_env.py)
+options  # unused variable (gym_breakout_pygame/registration.py)
+_.unpack_bricks  # unused method (gym_breakout_pygame/wrappers/dict_space.py)
+_.hashable_key  # unused method (gym_breakout_pygame/wrappers/dict_space.py)
+VisitationCounter  # unused class (gym_breakout_pygame/visitation.py)
+LRUVisitCounts  # unused class (gym_breakout_pygame/visitation.py)
+CountMinSketch  # unused class (gym_breakout_pygame/visitation.py)
+_.state_hash  # unused method (gym_breakout_pygame/breakout_env.py)
+_.nbytes  # unused property (gym_breakout_pygame/visitation.py)
+evaluate  # unused function (gym_breakout_pygame/evaluation.py)
+_.rollout  # unused method (gym_breakout_pygame/breakout_env.py)
+_.step_many  # unused method (gym_breakout_pygame/breakout_env.py)
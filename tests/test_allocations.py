@@ -0,0 +1,112 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests that check that the simulation hot path does not allocate memory."""
+import tracemalloc
+
+import pytest
+
+from gym_breakout_pygame import breakout_env
+from gym_breakout_pygame.breakout_env import (
+    BreakoutConfiguration,
+    BreakoutState,
+    Command,
+)
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import (
+    BreakoutNDiscrete,
+    BreakoutNMultiDiscrete,
+)
+
+# bounds that do not depend on the number of simulated steps
+MAX_TRANSIENT_BYTES = 1024
+MAX_RETAINED_BYTES = 256
+
+
+def _follow_the_ball(state: BreakoutState) -> Command:
+    """Move the paddle toward the ball and fire."""
+    paddle_center = state.paddle.x + state.paddle.width / 2
+    if paddle_center < state.ball.x - 5:
+        return Command.RIGHT
+    if paddle_center > state.ball.x + 5:
+        return Command.LEFT
+    return Command.FIRE
+
+
+@pytest.fixture(name="_tracemalloc")
+def tracemalloc_fixture():
+    """Trace the memory allocations during the test."""
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+def test_steady_state_step_does_not_allocate(_tracemalloc) -> None:
+    """Test that the memory used by a step does not grow with the number of steps."""
+    config = BreakoutConfiguration(
+        brick_cols=10, brick_rows=5, fire_enabled=True, horizon=100000
+    )
+    state = BreakoutState(config)
+    for _ in range(100):
+        state.step(_follow_the_ball(state))
+
+    snapshot_before = tracemalloc.take_snapshot()
+    start, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(2000):
+        state.step(_follow_the_ball(state))
+        if state.is_finished():
+            break
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot_after = tracemalloc.take_snapshot()
+
+    assert peak - start < MAX_TRANSIENT_BYTES
+    module_filter = [tracemalloc.Filter(True, breakout_env.__file__)]
+    differences = snapshot_after.filter_traces(module_filter).compare_to(
+        snapshot_before.filter_traces(module_filter), "lineno"
+    )
+    # only the values held by the state (e.g. the step counter) may change size
+    assert sum(stat.size_diff for stat in differences) < MAX_RETAINED_BYTES
+
+
+@pytest.mark.parametrize(
+    "breakout_env_cls", [BreakoutNMultiDiscrete, BreakoutNDiscrete, BreakoutDictSpace]
+)
+def test_borrowed_observations_do_not_allocate(_tracemalloc, breakout_env_cls) -> None:
+    """Test that the steps of the environments do not allocate arrays."""
+    config = BreakoutConfiguration(brick_cols=10, brick_rows=5, horizon=100000)
+    kwargs = {} if breakout_env_cls is BreakoutNDiscrete else {"copy": False}
+    env = breakout_env_cls(config, **kwargs)
+    env.reset(seed=0)
+    for _ in range(100):
+        env.step(_follow_the_ball(env.state))
+
+    start, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(1000):
+        _, _, done, _ = env.step(_follow_the_ball(env.state))
+        if done:
+            break
+    _, peak = tracemalloc.get_traced_memory()
+
+    assert peak - start < MAX_TRANSIENT_BYTES
@@ -0,0 +1,85 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the benchmark suite."""
+import pytest
+
+from benchmarks.suite import (
+    Metric,
+    compare_results,
+    load_results,
+    make_cases,
+    measure_viewer,
+    run_suite,
+    save_results,
+)
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNDiscrete
+
+
+def test_run_and_save_results(tmp_path) -> None:
+    """Test a short run of the suite, saved and loaded back."""
+    cases = make_cases([BreakoutNDiscrete], [(3, 3)])
+    results = run_suite(cases, nb_steps=50, nb_resets=5, nb_frames=5, repeat=1)
+    assert len(results) == 3 * len(cases) + 1
+    assert all(metric.value > 0 for metric in results.values())
+    assert results["skipper/" + cases[0].name].value >= 1.0
+
+    path = tmp_path / "results.json"
+    save_results(results, path)
+    assert load_results(path) == results
+
+
+def test_compare_results() -> None:
+    """Test that the comparison flags only the changes for the worse."""
+    baseline = {
+        "step/faster": Metric(100.0, "steps/s", True),
+        "step/slower": Metric(100.0, "steps/s", True),
+        "reset/faster": Metric(10.0, "us", False),
+        "reset/slower": Metric(10.0, "us", False),
+        "reset/within": Metric(10.0, "us", False),
+        "reset/removed": Metric(10.0, "us", False),
+    }
+    current = {
+        "step/faster": Metric(150.0, "steps/s", True),
+        "step/slower": Metric(80.0, "steps/s", True),
+        "reset/faster": Metric(5.0, "us", False),
+        "reset/slower": Metric(12.0, "us", False),
+        "reset/within": Metric(10.5, "us", False),
+    }
+    comparisons = compare_results(baseline, current, threshold=0.1)
+    assert {
+        comparison.name: comparison.is_regression for comparison in comparisons
+    } == {
+        "step/faster": False,
+        "step/slower": True,
+        "reset/faster": False,
+        "reset/slower": True,
+        "reset/within": False,
+    }
+
+
+@pytest.mark.usefixtures("_patch_pygame_videodriver")
+def test_measure_viewer() -> None:
+    """Test the measure of the Pygame viewer."""
+    case = make_cases([BreakoutNDiscrete], [(3, 3)])[0]
+    assert measure_viewer(case, nb_frames=5, repeat=1, label_cache_size=0) > 0
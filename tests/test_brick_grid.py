@@ -0,0 +1,95 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the brick grid."""
+import numpy as np
+import pygame
+import pytest
+
+from gym_breakout_pygame.breakout_env import BrickGrid
+
+
+def _find_colliding_brick_by_scan(brick_grid: BrickGrid, rect: pygame.Rect):
+    """Find the first colliding brick by scanning all the bricks."""
+    for brick in brick_grid.bricks.values():
+        if brick.rect.colliderect(rect):
+            return brick
+    return None
+
+
+@pytest.mark.parametrize(
+    "cols,rows,width,height,xdistance",
+    [(3, 3, 60, 12, 20), (20, 10, 30, 12, 5), (7, 4, 10, 30, 0), (5, 2, 40, 8, 50)],
+)
+def test_find_colliding_brick(cols, rows, width, height, xdistance) -> None:
+    """Test that the lookup finds the same brick of a linear scan."""
+    brick_grid = BrickGrid(cols, rows, width, height, xdistance)
+    rng = np.random.default_rng(0)
+    for position in list(brick_grid.bricks):
+        if rng.uniform() < 0.3:
+            brick_grid.remove_brick_at_position(position)
+
+    win_width = (width + xdistance) * cols + xdistance
+    for _ in range(5000):
+        rect = pygame.Rect(
+            int(rng.integers(-30, win_width + 30)),
+            int(rng.integers(-30, 480)),
+            int(rng.integers(0, 40)),
+            int(rng.integers(0, 40)),
+        )
+        expected = _find_colliding_brick_by_scan(brick_grid, rect)
+        brick = brick_grid.find_colliding_brick(*rect)
+        if expected is None:
+            assert brick is None
+        else:
+            assert (brick.i, brick.j) == (expected.i, expected.j)
+
+
+def test_counter_and_positions() -> None:
+    """Test that the grid counts the bricks, and derives their geometry."""
+    brick_grid = BrickGrid(4, 2, 60, 12, 20)
+    assert brick_grid.nb_bricks == 8
+    brick_grid.remove_brick_at_position((1, 1))
+    brick_grid.remove_brick_at_position((3, 0))
+    with pytest.raises(KeyError):
+        brick_grid.remove_brick_at_position((1, 1))
+    assert brick_grid.nb_bricks == 6
+    assert brick_grid.positions() == [
+        (0, 0),
+        (0, 1),
+        (1, 0),
+        (2, 0),
+        (2, 1),
+        (3, 1),
+    ]
+    assert list(brick_grid.bricks) == brick_grid.positions()
+    brick = brick_grid.bricks[(2, 1)]
+    assert (brick.x, brick.y) == (180, 90)
+    assert tuple(brick.rect) == (180, 90, 60, 12)
+
+    brick_grid.set_bricks(np.eye(4, 2))
+    assert brick_grid.nb_bricks == 2
+    assert brick_grid.positions() == [(0, 0), (1, 1)]
+    brick_grid.remove_brick_at_position((0, 0))
+    brick_grid.remove_brick_at_position((1, 1))
+    assert brick_grid.is_empty()
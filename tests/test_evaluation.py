@@ -0,0 +1,88 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the parallel evaluation of policies."""
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.evaluation import evaluate
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNDiscrete
+
+CONFIG = BreakoutConfiguration(
+    brick_cols=4, brick_rows=2, fire_enabled=True, deterministic=False
+)
+
+
+def follow_ball(observations: np.ndarray) -> np.ndarray:
+    """Move the paddle toward the ball, with mistakes depending on the observation."""
+    paddle_x, ball_x = observations[:, 0], observations[:, 1]
+    actions = np.where(paddle_x < ball_x, 2, np.where(paddle_x > ball_x, 1, 3))
+    mistakes = observations.sum(axis=1) % 4 == 0
+    return np.where(mistakes, 0, actions)
+
+
+def stay(observations: dict) -> np.ndarray:
+    """Never move the paddle."""
+    return np.zeros(len(observations["paddle_x"]), dtype=np.int64)
+
+
+def test_results_do_not_depend_on_workers_and_batch_size() -> None:
+    """Test that the results are bit-identical whatever the parallelism."""
+    seeds = range(10, 30)
+    serial = evaluate(follow_ball, CONFIG, seeds, num_workers=1, batch_size=1)
+    batched = evaluate(follow_ball, CONFIG, seeds, num_workers=1, batch_size=7)
+    pooled = evaluate(follow_ball, CONFIG, seeds, num_workers=3, batch_size=4)
+    for result in (batched, pooled):
+        assert np.array_equal(result.seeds, np.arange(10, 30))
+        assert result.returns.tobytes() == serial.returns.tobytes()
+        assert np.array_equal(result.lengths, serial.lengths)
+        assert result.mean_return == serial.mean_return
+    assert len(set(serial.returns.tolist())) > 1
+
+
+def test_results_follow_the_seeds() -> None:
+    """Test that the result of each episode is the one of a serial loop."""
+    env = BreakoutDictSpace(CONFIG)
+    expected = []
+    for seed in [5, 3, 5]:
+        env.reset(seed=seed)
+        done, total = False, 0.0
+        while not done:
+            _, reward, done, _ = env.step(0)
+            total += reward
+        expected.append(total)
+    result = evaluate(stay, CONFIG, [5, 3, 5], BreakoutDictSpace, batch_size=2)
+    assert result.returns.tolist() == expected
+    assert result.to_dict()["seeds"] == [5, 3, 5]
+
+
+def test_evaluation_errors() -> None:
+    """Test the validation of the arguments and of the policy outputs."""
+    with pytest.raises(ValueError, match="At least one seed"):
+        evaluate(follow_ball, CONFIG, [])
+    with pytest.raises(ValueError, match="batch size"):
+        evaluate(follow_ball, CONFIG, batch_size=0)
+    with pytest.raises(ValueError, match="actions"):
+        evaluate(lambda obs: [0], CONFIG, range(3), BreakoutNDiscrete, batch_size=2)
@@ -0,0 +1,101 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests on the import of the package: Pygame must be imported only when needed."""
+import subprocess
+import sys
+
+import pytest
+
+# budget for the cumulative import time of the package modules, in microseconds,
+# excluding the third-party dependencies (e.g. NumPy and Gym).
+IMPORT_TIME_BUDGET_US = 100_000
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    """Run a Python interpreter in a subprocess."""
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True
+    )
+
+
+def _self_import_times(stderr: str) -> dict:
+    """Parse the output of '-X importtime' into a mapping from modules to self times."""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, module = line[len("import time:") :].split("|")
+        result[module.strip()] = int(self_time)
+    return result
+
+
+@pytest.mark.parametrize(
+    "module,env_class",
+    [
+        ("gym_breakout_pygame.wrappers.normal_space", "BreakoutNMultiDiscrete"),
+        ("gym_breakout_pygame.wrappers.normal_space", "BreakoutNDiscrete"),
+        ("gym_breakout_pygame.wrappers.dict_space", "BreakoutDictSpace"),
+    ],
+)
+def test_simulation_does_not_import_pygame(module, env_class) -> None:
+    """Test that stepping and rendering to an array do not import Pygame."""
+    code = (
+        "import sys\n"
+        f"from {module} import {env_class}\n"
+        f"env = {env_class}()\n"
+        "env.reset()\n"
+        "for _ in range(100):\n"
+        "    env.step(env.action_space.sample())\n"
+        "env.render('rgb_array')\n"
+        "print('pygame' in sys.modules)\n"
+    )
+    assert _run_python("-c", code).stdout.strip() == "False"
+
+
+def test_viewer_imports_pygame() -> None:
+    """Test that the Pygame viewer is still accessible from the env module."""
+    code = (
+        "import sys\n"
+        "from gym_breakout_pygame.breakout_env import PygameViewer\n"
+        "print(PygameViewer.__module__, 'pygame' in sys.modules)\n"
+    )
+    assert _run_python("-c", code).stdout.split() == [
+        "gym_breakout_pygame.viewer",
+        "True",
+    ]
+
+
+def test_import_time_budget() -> None:
+    """Test the import time of the package modules needed for training."""
+    process = _run_python(
+        "-X", "importtime", "-c", "import gym_breakout_pygame.wrappers.normal_space"
+    )
+    self_times = _self_import_times(process.stderr)
+    assert "pygame" not in self_times
+    package_time = sum(
+        self_time
+        for module, self_time in self_times.items()
+        if module.split(".")[0] == "gym_breakout_pygame"
+    )
+    assert 0 < package_time < IMPORT_TIME_BUDGET_US
@@ -0,0 +1,128 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the ownership and the dtype of the observations."""
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.utils import copy_observation
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNMultiDiscrete
+from tests.helpers import assert_observation_equal
+
+
+def _array(obs) -> np.ndarray:
+    """Get the array of an observation."""
+    return obs["bricks_matrix"] if isinstance(obs, dict) else obs
+
+
+@pytest.mark.parametrize("ball_enabled", [True, False])
+@pytest.mark.parametrize(
+    "breakout_env_cls,dtype",
+    [(BreakoutNMultiDiscrete, np.int16), (BreakoutDictSpace, np.int8)],
+)
+def test_ownership(breakout_env_cls, dtype, ball_enabled) -> None:
+    """Test that the copied observations are kept, and the borrowed ones are reused."""
+    config = BreakoutConfiguration(ball_enabled=ball_enabled, fire_enabled=True)
+    env = breakout_env_cls(config, dtype=dtype)
+    borrowing_env = breakout_env_cls(config, dtype=dtype, copy=False)
+    initial_obs = env.reset(seed=0)
+    expected_initial_obs = copy_observation(initial_obs)
+    borrowed = borrowing_env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        action = int(rng.integers(0, env.action_space.n))
+        obs, _, done, _ = env.step(action)
+        assert borrowing_env.step(action)[0] is borrowed
+        assert_observation_equal(obs, borrowed)
+        assert _array(obs).dtype == dtype
+        if done:
+            break
+
+    if breakout_env_cls is BreakoutNMultiDiscrete:
+        assert env.observation_space.contains(obs)
+    assert_observation_equal(expected_initial_obs, initial_obs)
+    assert not np.shares_memory(_array(initial_obs), _array(obs))
+    assert not np.shares_memory(_array(obs), _array(env.observe(env.state)))
+
+
+def test_observe_multidiscrete_out() -> None:
+    """Test that the features are written in the given array."""
+    env = BreakoutNMultiDiscrete()
+    env.reset(seed=0)
+    out = np.full(5, -1, dtype=np.int32)
+    assert BreakoutNMultiDiscrete.observe_multidiscrete(env.state, out=out) is out
+    np.testing.assert_array_equal(
+        out, BreakoutNMultiDiscrete.observe_multidiscrete(env.state)
+    )
+
+
+def test_to_dict_out() -> None:
+    """Test that a dictionary of the game is updated in place, bricks included."""
+    env = BreakoutDictSpace()
+    env.reset(seed=0)
+    state = env.state
+    out = state.to_dict()
+    out["bricks_matrix"] = out["bricks_matrix"].copy()
+    bricks = out["bricks_matrix"]
+    state.brick_grid.remove_brick_at_position((0, 0))
+    assert state.to_dict(out) is out
+    assert out["bricks_matrix"] is bricks
+    assert_observation_equal(out, state.to_dict())
+
+
+@pytest.mark.parametrize("copy", [True, False])
+@pytest.mark.parametrize("ball_enabled", [True, False])
+def test_packed_bricks(copy, ball_enabled) -> None:
+    """Test that the packed observations and the keys match the plain observations."""
+    config = BreakoutConfiguration(
+        brick_cols=7, brick_rows=3, ball_enabled=ball_enabled, fire_enabled=True
+    )
+    env = BreakoutDictSpace(config)
+    packing_env = BreakoutDictSpace(config, packed_bricks=True, copy=copy)
+    obs = env.reset(seed=0)
+    packed = packing_env.reset(seed=0)
+    keys = {}
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        assert packing_env.observation_space.contains(packed)
+        assert packed["bricks_matrix"].shape == (3,)
+        assert packed.keys() == obs.keys()
+        np.testing.assert_array_equal(
+            packing_env.unpack_bricks(packed["bricks_matrix"]), obs["bricks_matrix"]
+        )
+        key = packing_env.hashable_key(packed)
+        assert key == env.hashable_key(obs)
+        observation = tuple(
+            (name, np.asarray(value).tobytes()) for name, value in sorted(obs.items())
+        )
+        # equal keys if and only if equal observations
+        assert keys.setdefault(key, observation) == observation
+        assert len(set(keys.values())) == len(keys)
+        action = int(rng.integers(0, env.action_space.n))
+        obs, _, done, _ = env.step(action)
+        packed, _, _, _ = packing_env.step(action)
+        if done:
+            break
+    assert len(keys) > 5
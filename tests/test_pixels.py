@@ -0,0 +1,74 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the environment with pixel observations."""
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration, grey, white
+from gym_breakout_pygame.rendering import to_grayscale
+from gym_breakout_pygame.wrappers.pixels import BreakoutPixels
+
+CONFIG = BreakoutConfiguration(fire_enabled=True)
+
+
+@pytest.mark.parametrize("grayscale", [True, False])
+def test_frames(grayscale) -> None:
+    """Test that the frames are drawn at the requested size."""
+    env = BreakoutPixels(CONFIG, height=84, width=64, grayscale=grayscale)
+    obs = env.reset(seed=0)
+    assert obs.shape == ((84, 64) if grayscale else (84, 64, 3))
+    assert obs.dtype == np.uint8
+    assert env.observation_space.contains(obs)
+    background = to_grayscale(white) if grayscale else white
+    brick = to_grayscale(grey) if grayscale else grey
+    # the bricks are at the top, the paddle at the bottom
+    assert (obs[:42] == brick).any()
+    assert (obs[-10:] == brick).any()
+    assert (obs == background).any()
+
+
+@pytest.mark.parametrize("copy", [True, False])
+def test_frame_stack(copy) -> None:
+    """Test that the stack holds the last frames, from the oldest to the newest."""
+    nb_frames = 4
+    env = BreakoutPixels(CONFIG)
+    stacking_env = BreakoutPixels(CONFIG, frame_stack=nb_frames, copy=copy)
+    frames = [env.reset(seed=0)] * nb_frames
+    obs = stacking_env.reset(seed=0)
+    assert obs.shape == (nb_frames, 84, 84)
+    np.testing.assert_array_equal(obs, np.stack(frames))
+    rng = np.random.default_rng(0)
+    previous_obs = obs
+    for _ in range(50):
+        action = int(rng.integers(0, env.action_space.n))
+        frame, _, done, _ = env.step(action)
+        obs, _, _, _ = stacking_env.step(action)
+        frames.append(frame)
+        np.testing.assert_array_equal(obs, np.stack(frames[-nb_frames:]))
+        assert stacking_env.observation_space.contains(obs)
+        # the borrowed stacks are views of the same buffer
+        assert np.shares_memory(obs, previous_obs) != copy
+        previous_obs = obs
+        if done:
+            break
@@ -0,0 +1,100 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the profiling of the simulation."""
+import json
+
+import numpy as np
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration, BreakoutState
+from gym_breakout_pygame.profiling import OBSERVE, PHASES, Profiler
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNMultiDiscrete
+
+CONFIG = BreakoutConfiguration(fire_enabled=True)
+
+
+def test_profiled_step_has_same_dynamics() -> None:
+    """Test that the profiled step reproduces the plain one."""
+    env = BreakoutNMultiDiscrete(CONFIG)
+    profiled_env = BreakoutNMultiDiscrete(CONFIG)
+    profiled_env.enable_profiling()
+    env.reset(seed=0)
+    profiled_env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        action = int(rng.integers(0, env.action_space.n))
+        obs, reward, done, _ = env.step(action)
+        profiled_obs, profiled_reward, profiled_done, _ = profiled_env.step(action)
+        assert np.array_equal(obs, profiled_obs)
+        assert (reward, done) == (profiled_reward, profiled_done)
+        assert env.get_state().tobytes() == profiled_env.get_state().tobytes()
+        if done:
+            env.reset()
+            profiled_env.reset()
+
+
+def test_statistics() -> None:
+    """Test the counters collected while playing, across resets."""
+    env = BreakoutNMultiDiscrete(CONFIG)
+    profiler = env.enable_profiling()
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    nb_steps = 300
+    nb_frames = 0
+    for _ in range(nb_steps):
+        _, _, done, _ = env.step(int(rng.integers(0, env.action_space.n)))
+        if done:
+            nb_frames += int(env.get_state()["steps"])
+            env.reset()
+    nb_frames += int(env.get_state()["steps"])
+
+    snapshot = profiler.snapshot()
+    assert snapshot["frames"] == nb_frames
+    for name in PHASES:
+        stats = snapshot["timers"][name]
+        assert stats["count"] == nb_frames
+        assert sum(stats["histogram"].values()) == nb_frames
+        assert 0 <= stats["min_ns"] <= stats["mean_ns"] <= stats["max_ns"]
+    # the skipper only observes the last frame of each step
+    assert snapshot["timers"][OBSERVE]["count"] == nb_steps
+    iterations = {
+        int(key): count for key, count in snapshot["skipper_iterations"].items()
+    }
+    assert sum(iterations.values()) == nb_steps
+    assert sum(key * count for key, count in iterations.items()) == nb_frames
+
+    env.disable_profiling()
+    env.step(0)
+    assert profiler.snapshot() == snapshot
+
+
+def test_periodic_dump(tmp_path) -> None:
+    """Test that the snapshots are appended to the dump file periodically."""
+    path = tmp_path / "profile.jsonl"
+    state = BreakoutState(CONFIG)
+    state.enable_profiling(Profiler(dump_path=path, dump_every=10))
+    for _ in range(35):
+        state.step(state.last_command)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["frames"] for record in records] == [10, 20, 30]
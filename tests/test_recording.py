@@ -0,0 +1,175 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the background recording of the frames."""
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.recording import (
+    BLOCK,
+    DROP_NEWEST,
+    DROP_OLDEST,
+    FrameRecorder,
+    FrameWriter,
+    ImageioFrameWriter,
+    PngFrameWriter,
+    RawFrameWriter,
+    load_raw_frames,
+)
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNMultiDiscrete
+
+CONFIG = BreakoutConfiguration(fire_enabled=True)
+
+
+class _ListWriter(FrameWriter):
+    """Keep the frames in a list, waiting on an event before each write."""
+
+    def __init__(self, release: threading.Event) -> None:
+        self.release = release
+        self.frames: list = []
+        self.closed = False
+
+    def write(self, frame: np.ndarray) -> None:
+        self.release.wait()
+        self.frames.append(frame)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _FailingWriter(FrameWriter):
+    """Fail at the first write."""
+
+    def write(self, frame: np.ndarray) -> None:
+        raise ValueError("disk full")
+
+
+def _play(env, nb_steps: int) -> list:
+    """Play a few random steps, and return the rendered frames."""
+    rng = np.random.default_rng(0)
+    env.reset(seed=0)
+    frames = [env.unwrapped.render(mode="rgb_array")]
+    for _ in range(nb_steps):
+        env.step(int(rng.integers(0, env.action_space.n)))
+        frames.append(env.unwrapped.render(mode="rgb_array"))
+    return frames
+
+
+@pytest.mark.parametrize("initial_capacity", [1, 256])
+def test_raw_frames(tmp_path, initial_capacity) -> None:
+    """Test that the raw file holds the rendered frames, in order."""
+    writer = RawFrameWriter(tmp_path, initial_capacity=initial_capacity)
+    env = FrameRecorder(
+        BreakoutNMultiDiscrete(CONFIG), writer, policy=BLOCK, timeout=None
+    )
+    frames = _play(env, 20)
+    env.close()
+    assert env.nb_recorded == len(frames)
+    assert env.nb_dropped == 0
+    np.testing.assert_array_equal(load_raw_frames(tmp_path), np.stack(frames))
+
+
+def test_raw_frames_empty(tmp_path) -> None:
+    """Test that closing a writer without frames gives an empty recording."""
+    writer = RawFrameWriter(tmp_path)
+    writer.close()
+    assert load_raw_frames(tmp_path).shape[0] == 0
+
+
+def test_png_frames(tmp_path, _patch_pygame_videodriver) -> None:
+    """Test that the PNG images decode to the rendered frames."""
+    import pygame  # pylint: disable=import-outside-toplevel
+
+    env = FrameRecorder(
+        BreakoutNMultiDiscrete(CONFIG), PngFrameWriter(tmp_path), timeout=None
+    )
+    frames = _play(env, 3)
+    env.close()
+    paths = sorted(tmp_path.glob("*.png"))
+    assert len(paths) == len(frames)
+    for path, frame in zip(paths, frames):
+        decoded = pygame.surfarray.array3d(pygame.image.load(str(path)))
+        np.testing.assert_array_equal(decoded.swapaxes(0, 1), frame)
+
+
+def test_imageio_missing(tmp_path, monkeypatch) -> None:
+    """Test that the video writer explains how to install its dependency."""
+    monkeypatch.setitem(sys.modules, "imageio", None)
+    with pytest.raises(ImportError, match="pip install imageio"):
+        ImageioFrameWriter(tmp_path / "video.gif")
+
+
+@pytest.mark.parametrize("policy", [DROP_NEWEST, BLOCK])
+def test_bounded_latency(policy) -> None:
+    """Test that a stalled writer drops frames instead of stalling the steps."""
+    release = threading.Event()
+    writer = _ListWriter(release)
+    env = FrameRecorder(
+        BreakoutNMultiDiscrete(CONFIG),
+        writer,
+        queue_size=2,
+        policy=policy,
+        timeout=0.001,
+    )
+    start = time.perf_counter()
+    _play(env, 20)
+    assert time.perf_counter() - start < 1.0
+    assert env.nb_dropped > 0
+    assert env.nb_recorded + env.nb_dropped == 21
+    release.set()
+    env.close()
+    assert writer.closed
+    assert len(writer.frames) == env.nb_recorded
+
+
+def test_drop_oldest() -> None:
+    """Test that dropping the oldest frames keeps the last frame."""
+    release = threading.Event()
+    writer = _ListWriter(release)
+    env = FrameRecorder(
+        BreakoutNMultiDiscrete(CONFIG), writer, queue_size=2, policy=DROP_OLDEST
+    )
+    frames = _play(env, 20)
+    release.set()
+    env.close()
+    assert env.nb_dropped > 0
+    assert len(writer.frames) == env.nb_recorded
+    np.testing.assert_array_equal(writer.frames[-1], frames[-1])
+
+
+def test_writer_error() -> None:
+    """Test that the errors of the writer reach the caller."""
+    env = FrameRecorder(BreakoutNMultiDiscrete(CONFIG), _FailingWriter(), timeout=None)
+    env.reset(seed=0)
+    with pytest.raises(RuntimeError, match="writer failed") as error:
+        for _ in range(100):
+            env.step(0)
+            env.flush()
+    assert isinstance(error.value.__cause__, ValueError)
+    with pytest.raises(RuntimeError):
+        env.close()
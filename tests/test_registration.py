@@ -0,0 +1,135 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the Gym registration and the Gym vector environments."""
+
+import gym
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.registration import ENV_IDS
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from tests.helpers import assert_observation_equal
+
+VECTOR_KWARGS = {"brick_rows": 2, "brick_cols": 4, "horizon": 40, "copy": False}
+
+
+@pytest.mark.parametrize("env_id", sorted(ENV_IDS))
+def test_make(env_id) -> None:
+    """Test that the kwargs are split between the configuration and the class."""
+    env = gym.make(env_id, brick_rows=4, fire_enabled=True)
+    assert env.unwrapped.config == BreakoutConfiguration(
+        brick_rows=4, fire_enabled=True
+    )
+    obs, info = env.reset(seed=0)
+    assert info == {}
+    assert env.observation_space.contains(obs)
+    obs, reward, terminated, truncated, info = env.step(env.action_space.sample())
+    assert env.observation_space.contains(obs)
+    assert isinstance(reward, float)
+    assert not terminated and not truncated
+    env.close()
+
+
+def test_make_with_config() -> None:
+    """Test that the configuration fields in the kwargs override the given configuration."""
+    config = BreakoutConfiguration(brick_cols=5)
+    env = gym.make("BreakoutDictSpace-v0", config=config, brick_rows=2, copy=False)
+    assert env.unwrapped.config == BreakoutConfiguration(brick_cols=5, brick_rows=2)
+    assert not env.unwrapped.copy
+    obs, _ = env.reset(seed=0)
+    assert obs["bricks_matrix"].shape == (5, 2)
+
+
+def test_make_with_config_derives_the_horizon() -> None:
+    """Test that the horizon follows the new grid size, unless it is given."""
+    config = BreakoutConfiguration()
+    env = gym.make("BreakoutNDiscrete-v0", config=config, brick_rows=10, brick_cols=10)
+    assert (
+        env.unwrapped.config.horizon
+        == BreakoutConfiguration(brick_rows=10, brick_cols=10).horizon
+    )
+    assert env.unwrapped.config.horizon != config.horizon
+    env = gym.make("BreakoutNDiscrete-v0", config=config, brick_rows=10, horizon=7)
+    assert env.unwrapped.config.horizon == 7
+
+
+def test_terminated_and_truncated() -> None:
+    """Test that the episodes ending at the horizon are truncated, not terminated."""
+    env = gym.make("BreakoutNMultiDiscrete-v0", horizon=10)
+    env.reset(seed=0)
+    terminated = truncated = False
+    while not (terminated or truncated):
+        _, _, terminated, truncated, _ = env.step(0)
+    assert truncated and not terminated
+    assert env.unwrapped.state.is_truncated()
+
+    env = gym.make("BreakoutNMultiDiscrete-v0")
+    env.reset(seed=0)
+    terminated = truncated = False
+    while not (terminated or truncated):
+        _, _, terminated, truncated, _ = env.step(0)
+    assert terminated and not truncated
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_vector_dict(asynchronous) -> None:
+    """Test that the vector environments batch the observations of single games."""
+    nb_envs = 3
+    vec_env = gym.vector.make(
+        "BreakoutDictSpace-v0",
+        num_envs=nb_envs,
+        asynchronous=asynchronous,
+        **VECTOR_KWARGS,
+    )
+    envs = [
+        BreakoutDictSpace(BreakoutConfiguration(brick_rows=2, brick_cols=4, horizon=40))
+        for _ in range(nb_envs)
+    ]
+    observations, _ = vec_env.reset(seed=list(range(nb_envs)))
+    expected = [env.reset(seed=seed) for seed, env in enumerate(envs)]
+    assert observations["bricks_matrix"].shape == (nb_envs, 4, 2)
+    for index, obs in enumerate(expected):
+        assert_observation_equal(
+            {key: value[index] for key, value in observations.items()}, obs
+        )
+    rng = np.random.default_rng(0)
+    nb_final = 0
+    for _ in range(100):
+        actions = rng.integers(0, vec_env.single_action_space.n, size=nb_envs)
+        observations, _, terminated, truncated, infos = vec_env.step(actions)
+        assert vec_env.observation_space.contains(observations)
+        for index, env in enumerate(envs):
+            obs, _, done, _ = env.step(int(actions[index]))
+            assert (terminated[index] or truncated[index]) == done
+            if done:
+                # the final observation is not overwritten by the automatic reset
+                assert_observation_equal(infos["final_observation"][index], obs)
+                obs = env.reset()
+                nb_final += 1
+            assert_observation_equal(
+                {key: value[index] for key, value in observations.items()}, obs
+            )
+    assert nb_final > 0
+    vec_env.close()
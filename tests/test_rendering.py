@@ -0,0 +1,89 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the headless NumPy renderer."""
+import numpy as np
+import pygame
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration, BreakoutState
+from gym_breakout_pygame.rendering import ArrayRenderer, circle_mask
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNMultiDiscrete
+
+
+def _render_with_pygame(state: BreakoutState) -> np.ndarray:
+    """Draw the game objects on an off-screen Pygame surface."""
+    screen = pygame.Surface((state.config.win_width, state.config.win_height))
+    screen.fill((255, 255, 255))
+    for drawable in [state.brick_grid, state.paddle, state.ball, state.bullet]:
+        drawable.draw_on_screen(screen)
+    return pygame.surfarray.array3d(screen).swapaxes(0, 1)
+
+
+@pytest.mark.parametrize("radius", [1, 2, 5, 10, 17])
+def test_circle_mask(radius) -> None:
+    """Test that the circle mask has the same pixels drawn by Pygame."""
+    size = 2 * radius + 4
+    screen = pygame.Surface((size, size))
+    screen.fill((0, 0, 0))
+    pygame.draw.circle(screen, (255, 255, 255), [size // 2, size // 2], radius, 0)
+    expected = pygame.surfarray.array3d(screen)[:, :, 0].T > 0
+    actual = np.zeros((size, size), dtype=bool)
+    start = size // 2 - radius
+    actual[start : start + 2 * radius, start : start + 2 * radius] = circle_mask(radius)
+    assert (expected == actual).all()
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        BreakoutConfiguration(fire_enabled=True),
+        BreakoutConfiguration(brick_cols=5, brick_rows=4, fire_enabled=True),
+        BreakoutConfiguration(fire_enabled=True, ball_enabled=False),
+    ],
+)
+def test_same_pixels_as_pygame(config) -> None:
+    """Test that the renderer draws the same frames of Pygame."""
+    env = BreakoutNMultiDiscrete(config)
+    renderer = ArrayRenderer(config)
+    env.reset(seed=0)
+    env.action_space.seed(0)
+    for _ in range(100):
+        _, _, done, _ = env.step(env.action_space.sample())
+        if done:
+            env.reset()
+        frame = renderer.render(env.state)
+        assert frame.shape == (config.win_height, config.win_width, 3)
+        assert frame.dtype == np.uint8
+        assert (frame == _render_with_pygame(env.state)).all()
+
+
+def test_env_render_rgb_array() -> None:
+    """Test that the environment returns the rendered frame."""
+    config = BreakoutConfiguration()
+    env = BreakoutNMultiDiscrete(config)
+    env.reset()
+    frame = env.render(mode="rgb_array")
+    assert frame is not None
+    assert frame.shape == (config.win_height, config.win_width, 3)
+    assert env.viewer is None
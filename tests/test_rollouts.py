@@ -0,0 +1,80 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the headless rollouts."""
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.rollouts import ENV_CLASSES, benchmark_rollouts, run_episodes
+
+
+@pytest.mark.parametrize("env_name", sorted(ENV_CLASSES))
+def test_run_episodes(env_name) -> None:
+    """Test that an episode is timed at every step, and is determined by its seed."""
+    config = BreakoutConfiguration(brick_cols=4, brick_rows=2)
+    returns, lengths, latencies = run_episodes(env_name, config, [3, 4, 3])
+    assert len(returns) == len(lengths) == 3
+    assert latencies.size == sum(lengths)
+    assert np.all(latencies > 0)
+    assert returns[0] == returns[2] and lengths[0] == lengths[2]
+
+
+def test_results_do_not_depend_on_workers() -> None:
+    """Test that the episodes are the same in a single process and in a pool."""
+    config = BreakoutConfiguration(brick_cols=4, brick_rows=2)
+    single = benchmark_rollouts("ndiscrete", config, episodes=5, workers=1, seed=7)
+    pooled = benchmark_rollouts("ndiscrete", config, episodes=5, workers=2, seed=7)
+    assert pooled.workers == 2
+    assert (single.steps, single.mean_return) == (pooled.steps, pooled.mean_return)
+    assert single.steps_per_second > 0
+    assert list(single.latency_us) == ["p50", "p90", "p99"]
+    assert single.latency_us["p50"] <= single.latency_us["p99"]
+
+
+def test_benchmark_errors() -> None:
+    """Test the validation of the benchmark arguments."""
+    with pytest.raises(ValueError, match="Unknown environment"):
+        benchmark_rollouts("pixels")
+    with pytest.raises(ValueError, match="must be positive"):
+        benchmark_rollouts("dict", episodes=0)
+
+
+def test_command_line() -> None:
+    """Test the benchmark mode of the command line, with JSON output."""
+    output = subprocess.run(
+        [sys.executable, "-m", "gym_breakout_pygame", "--benchmark"]
+        + ["--episodes", "3", "--workers", "2", "--env", "dict", "--json"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    stats = json.loads(output)
+    assert stats["env"] == "dict"
+    assert stats["episodes"] == 3
+    assert stats["steps_per_second"] > 0
+    assert set(stats["latency_us"]) == {"p50", "p90", "p99"}
@@ -0,0 +1,114 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the skipper."""
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration, Command
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import (
+    BreakoutNDiscrete,
+    BreakoutNMultiDiscrete,
+)
+
+
+def _without_key(env_cls):
+    """Get a subclass that compares the full observations at every frame."""
+
+    class _Reference(env_cls):  # pylint: disable=too-few-public-methods
+        """The same environment, without observation keys."""
+
+        def observation_key(self, _state):
+            """Get no key."""
+            return None
+
+    return _Reference
+
+
+@pytest.mark.parametrize(
+    "breakout_env_cls", [BreakoutNMultiDiscrete, BreakoutNDiscrete]
+)
+@pytest.mark.parametrize(
+    "config",
+    [
+        BreakoutConfiguration(deterministic=False),
+        BreakoutConfiguration(resolution_x=80, resolution_y=80, fire_enabled=True),
+        BreakoutConfiguration(resolution_x=5, resolution_y=5, complex_bump=True),
+    ],
+)
+def test_fast_forward(breakout_env_cls, config) -> None:
+    """Test that comparing the keys gives the same steps as comparing the observations."""
+    env = breakout_env_cls(config)
+    reference = _without_key(breakout_env_cls)(config)
+    assert np.array_equal(env.reset(seed=0), reference.reset(seed=0))
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        action = int(rng.integers(0, env.action_space.n))
+        obs, reward, done, info = env.step(action)
+        expected_obs, expected_reward, expected_done, expected_info = reference.step(
+            action
+        )
+        assert np.array_equal(obs, expected_obs)
+        assert (reward, done, info) == (expected_reward, expected_done, expected_info)
+        assert env.get_state().tobytes() == reference.get_state().tobytes()
+        if done:
+            env.reset()
+            reference.reset()
+
+
+def test_compare_buffer_observations() -> None:
+    """Test that comparing observations that are views of a buffer skips the same frames."""
+    config = BreakoutConfiguration(deterministic=False)
+    env = _without_key(BreakoutNMultiDiscrete)(config, copy=False)
+    reference = _without_key(BreakoutNMultiDiscrete)(config)
+    assert np.array_equal(env.reset(seed=0), reference.reset(seed=0))
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        action = int(rng.integers(0, env.action_space.n))
+        obs, reward, done, _ = env.step(action)
+        expected_obs, expected_reward, expected_done, _ = reference.step(action)
+        assert np.array_equal(obs, expected_obs)
+        assert (reward, done) == (expected_reward, expected_done)
+        assert env.get_state().tobytes() == reference.get_state().tobytes()
+        if done:
+            env.reset()
+            reference.reset()
+
+
+def test_no_frame_skipping() -> None:
+    """Test that an environment with 'skip_frames' false steps a frame at a time."""
+    env = BreakoutDictSpace(BreakoutConfiguration(deterministic=False))
+    env.reset(seed=0)
+    profiler = env.enable_profiling()
+    reference = env.state.clone()
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        action = int(rng.integers(0, env.action_space.n))
+        _, reward, done, _ = env.step(action)
+        assert reward == reference.step(Command(action))
+        assert env.get_state().tobytes() == reference.snapshot().tobytes()
+        if done:
+            break
+    snapshot = profiler.snapshot()
+    assert snapshot["skipper_iterations"] == {"1": snapshot["frames"]}
@@ -0,0 +1,129 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the snapshot and restore API of the Breakout state."""
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import (
+    BreakoutConfiguration,
+    BreakoutState,
+    Command,
+    snapshot_dtype,
+)
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNMultiDiscrete
+
+NON_DETERMINISTIC_CONFIG = BreakoutConfiguration(fire_enabled=True, deterministic=False)
+
+
+def _play(state: BreakoutState, commands) -> list:
+    """Play a sequence of commands and collect the trace of the game."""
+    trace = []
+    for command in commands:
+        reward = state.step(command)
+        trace.append(
+            (
+                reward,
+                state.ball.x,
+                state.ball.y,
+                state.ball.speed_x,
+                state.paddle.x,
+                state.bullet.y,
+                state.score,
+                state.brick_grid.bricksgrid.tobytes(),
+                state.is_finished(),
+            )
+        )
+    return trace
+
+
+@pytest.mark.parametrize(
+    "config", [BreakoutConfiguration(fire_enabled=True), NON_DETERMINISTIC_CONFIG]
+)
+def test_restore_continues_identically(config) -> None:
+    """Test that a restored game continues exactly as the original one."""
+    rng = np.random.default_rng(0)
+    state = BreakoutState(config)
+    state.set_seed(42)
+    _play(state, [Command(a) for a in rng.integers(0, 4, size=300)])
+    snapshot = state.snapshot()
+
+    commands = [Command(a) for a in rng.integers(0, 4, size=500)]
+    expected = _play(state, commands)
+
+    state.restore(snapshot)
+    assert _play(state, commands) == expected
+
+    other_state = BreakoutState(config)
+    other_state.restore(snapshot.tobytes())
+    assert _play(other_state, commands) == expected
+
+
+def test_clone_is_independent() -> None:
+    """Test that a cloned game does not share state with the original one."""
+    state = BreakoutState(NON_DETERMINISTIC_CONFIG)
+    clone = state.clone()
+    commands = [Command.RIGHT] * 50 + [Command.FIRE] * 50
+    expected = _play(clone, commands)
+    assert state.brick_grid.bricksgrid.all()
+    assert state.paddle.x != clone.paddle.x
+    assert _play(state, commands) == expected
+
+
+def test_snapshot_has_fixed_size() -> None:
+    """Test that the snapshot size depends only on the configuration."""
+    config = BreakoutConfiguration(brick_cols=10, brick_rows=5)
+    state = BreakoutState(config)
+    size = len(state.snapshot().tobytes())
+    assert size == snapshot_dtype(config).itemsize
+    state.remove_brick_at_position((3, 2))
+    assert len(state.snapshot().tobytes()) == size
+    state.restore(state.snapshot())
+    assert (3, 2) not in state.brick_grid.bricks
+    assert len(state.brick_grid.bricks) == 49
+
+
+@pytest.mark.parametrize(
+    "breakout_env_cls", [BreakoutNMultiDiscrete, BreakoutDictSpace]
+)
+def test_env_get_and_set_state(breakout_env_cls) -> None:
+    """Test that the environment continues identically after 'set_state'."""
+    env = breakout_env_cls(NON_DETERMINISTIC_CONFIG)
+    env.reset(seed=0)
+    for _ in range(30):
+        env.step(2)
+    snapshot = env.get_state()
+
+    actions = [0, 1, 3, 2, 2, 1, 3, 0] * 10
+    expected = [env.step(action)[:3] for action in actions]
+    env.set_state(snapshot)
+    for action, (obs, reward, done) in zip(actions, expected):
+        actual_obs, actual_reward, actual_done, _ = env.step(action)
+        assert actual_reward == reward
+        assert actual_done == done
+        if isinstance(obs, dict):
+            for key, value in obs.items():
+                assert np.array_equal(actual_obs[key], value)
+        else:
+            assert np.array_equal(actual_obs, obs)
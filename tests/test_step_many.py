@@ -0,0 +1,200 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the steps of whole action sequences."""
+import functools
+
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import (
+    BreakoutConfiguration,
+    BreakoutState,
+    Command,
+)
+from gym_breakout_pygame.utils import stack_observations
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import (
+    BreakoutNDiscrete,
+    BreakoutNMultiDiscrete,
+)
+from gym_breakout_pygame.wrappers.pixels import BreakoutPixels
+
+CONFIG = BreakoutConfiguration(
+    brick_cols=4, brick_rows=2, fire_enabled=True, deterministic=False
+)
+ACTIONS = np.random.default_rng(0).integers(0, 4, size=2000)
+
+
+class _NMultiDiscreteWithoutKey(BreakoutNMultiDiscrete):
+    """The environment, comparing the full observations at every frame."""
+
+    def observation_key(self, _state):
+        """Get no key."""
+        return None
+
+
+def _assert_equal(obs, expected) -> None:
+    """Assert that two observations, possibly dictionaries, are equal."""
+    if isinstance(expected, dict):
+        assert obs.keys() == expected.keys()
+        for key, value in expected.items():
+            assert np.array_equal(obs[key], value)
+    else:
+        assert np.array_equal(obs, expected)
+
+
+def _last(observations):
+    """Get the last observation of a stack, possibly of dictionaries."""
+    if isinstance(observations, dict):
+        return {key: value[-1] for key, value in observations.items()}
+    return observations[-1]
+
+
+def _step_loop(env, actions):
+    """Step an action at a time, until done."""
+    observations, rewards, dones = [], [], []
+    for action in actions:
+        obs, reward, done, _ = env.step(int(action))
+        observations.append(obs)
+        rewards.append(reward)
+        dones.append(done)
+        if done:
+            break
+    return stack_observations(observations), rewards, dones
+
+
+@pytest.mark.parametrize(
+    "env_cls",
+    [
+        BreakoutNDiscrete,
+        BreakoutNMultiDiscrete,
+        BreakoutDictSpace,
+        BreakoutPixels,
+        pytest.param(
+            functools.partial(BreakoutPixels, frame_stack=4), id="BreakoutPixels-4"
+        ),
+        _NMultiDiscreteWithoutKey,
+    ],
+)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_step_many_matches_step(env_cls, seed) -> None:
+    """Test that the steps of a sequence are the ones of 'step'."""
+    env = env_cls(CONFIG)
+    env.reset(seed=seed)
+    expected_obs, expected_rewards, expected_dones = _step_loop(env, ACTIONS)
+    assert expected_dones[-1]
+    expected_state = env.get_state().tobytes()
+
+    env.reset(seed=seed)
+    obs, rewards, dones = env.step_many(ACTIONS, observations="all")
+    _assert_equal(obs, expected_obs)
+    assert rewards.tolist() == expected_rewards
+    assert dones.tolist() == expected_dones
+    assert env.get_state().tobytes() == expected_state
+
+    for mode in ["last", "none"]:
+        env.reset(seed=seed)
+        obs, rewards, dones = env.step_many(ACTIONS.tolist(), observations=mode)
+        if mode == "last":
+            _assert_equal(obs, _last(expected_obs))
+        else:
+            assert obs is None
+        assert rewards.tolist() == expected_rewards
+        assert dones.tolist() == expected_dones
+
+
+@pytest.mark.parametrize(
+    "env_cls",
+    [
+        BreakoutNMultiDiscrete,
+        functools.partial(BreakoutPixels, frame_stack=4),
+    ],
+)
+@pytest.mark.parametrize("mode", ["all", "last", "none"])
+def test_step_many_continues_a_game(env_cls, mode) -> None:
+    """Test that 'step_many' leaves the game as 'step' does, before other steps."""
+    env = env_cls(CONFIG)
+    env.reset(seed=3)
+    expected_obs, expected_rewards, expected_dones = _step_loop(env, ACTIONS[:12])
+    assert not any(expected_dones)
+    env.reset(seed=3)
+    _, first, _ = env.step_many(ACTIONS[:5], observations=mode)
+    _, second, dones = env.step_many(ACTIONS[5:11], observations=mode)
+    obs, reward, _, _ = env.step(int(ACTIONS[11]))
+    assert first.tolist() + second.tolist() + [reward] == expected_rewards
+    assert not dones.any()
+    _assert_equal(obs, expected_obs[-1])
+
+
+def test_step_many_copies_the_buffers() -> None:
+    """Test that the observations of all the steps do not share the buffers."""
+    env = BreakoutNMultiDiscrete(CONFIG, copy=False)
+    reference = BreakoutNMultiDiscrete(CONFIG)
+    env.reset(seed=0)
+    reference.reset(seed=0)
+    obs, _, _ = env.step_many(ACTIONS[:20], observations="all")
+    expected, _, _ = reference.step_many(ACTIONS[:20], observations="all")
+    assert np.array_equal(obs, expected)
+    assert len({tuple(row) for row in obs.tolist()}) > 1
+
+
+def test_empty_sequence() -> None:
+    """Test that an empty sequence does no step."""
+    env = BreakoutDictSpace(CONFIG)
+    env.reset(seed=0)
+    for mode in ["all", "last", "none"]:
+        obs, rewards, dones = env.step_many([], observations=mode)
+        assert obs is None
+        assert rewards.shape == dones.shape == (0,)
+
+
+def test_rollout() -> None:
+    """Test that a rollout of the game is the sequence of its steps."""
+    state = BreakoutState(CONFIG)
+    state.set_seed(5)
+    expected = []
+    for action in ACTIONS:
+        expected.append(state.step(Command(int(action))))
+        if state.is_finished():
+            break
+    expected_snapshot = state.snapshot().tobytes()
+
+    state = BreakoutState(CONFIG)
+    state.set_seed(5)
+    rewards, dones = state.rollout(ACTIONS)
+    assert rewards.tolist() == expected
+    assert dones.tolist() == [False] * (len(expected) - 1) + [True]
+    assert state.snapshot().tobytes() == expected_snapshot
+
+
+def test_invalid_arguments() -> None:
+    """Test the errors on an invalid action or observation mode."""
+    env = BreakoutNMultiDiscrete(CONFIG)
+    env.reset(seed=0)
+    with pytest.raises(ValueError, match="Invalid observations"):
+        env.step_many([0], observations="first")
+    with pytest.raises(ValueError, match="Invalid action 4"):
+        env.step_many([0, 4])
+    with pytest.raises(ValueError, match="Invalid action"):
+        env.state.rollout([Command.LEFT])
@@ -0,0 +1,170 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the exact transition model of the game."""
+import dataclasses
+
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.tabular import (
+    TERMINAL_OBSERVATION,
+    TransitionModel,
+    build_transition_model,
+    load_or_build_transition_model,
+    policy_iteration,
+    value_iteration,
+)
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNDiscrete
+
+# a vertical initial ball, so that the top wall hits are random
+SMALL_CONFIG = BreakoutConfiguration(
+    brick_cols=3,
+    brick_rows=1,
+    paddle_width=240,
+    paddle_speed=10,
+    resolution_x=40,
+    resolution_y=40,
+    init_ball_speed_x=0,
+    init_ball_speed_y=10,
+    complex_bump=True,
+)
+
+
+@pytest.fixture(name="model", scope="module")
+def model_fixture() -> TransitionModel:
+    """Build the model of the small configuration."""
+    return build_transition_model(SMALL_CONFIG)
+
+
+def _assert_models_equal(model1: TransitionModel, model2: TransitionModel) -> None:
+    """Check that two models are equal."""
+    for field in dataclasses.fields(TransitionModel):
+        value1 = getattr(model1, field.name)
+        value2 = getattr(model2, field.name)
+        if isinstance(value1, np.ndarray):
+            np.testing.assert_array_equal(value1, value2)
+        else:
+            assert value1 == value2
+
+
+def test_probabilities(model) -> None:
+    """Test that the transition probabilities of each state and action sum to one."""
+    totals = np.bincount(
+        model.sources * model.nb_actions + model.actions,
+        weights=model.probabilities,
+        minlength=model.nb_states * model.nb_actions,
+    )
+    np.testing.assert_allclose(totals, 1.0)
+    # the random wall hits are enumerated
+    assert (model.probabilities < 1.0).any()
+    assert model.observations[model.terminal_state] == TERMINAL_OBSERVATION
+
+
+def test_transitions_match_env(model) -> None:
+    """Test that the steps of the environment are transitions of the model."""
+    env = BreakoutNDiscrete(dataclasses.replace(SMALL_CONFIG, horizon=2**62))
+    env.reset(seed=0)
+    keys = {record.tobytes(): index for index, record in enumerate(model.states)}
+    for source, record in enumerate(model.states):
+        env.set_state(record)
+        assert env.observe(env.state) == model.observations[source]
+        for action in range(model.nb_actions):
+            env.set_state(record)
+            _, reward, done, _ = env.step(action)
+            next_record = env.get_state()
+            for name in ("score", "steps", "last_command"):
+                next_record[name] = 0
+            next_record["rng_state"] = next_record["rng_inc"] = 0
+            next_record["rng_has_uint32"] = next_record["rng_uinteger"] = 0
+            target = model.terminal_state if done else keys[next_record.tobytes()]
+            (entries,) = np.nonzero(
+                (model.sources == source)
+                & (model.actions == action)
+                & (model.targets == target)
+            )
+            assert len(entries) == 1
+            assert model.probabilities[entries[0]] > 0.0
+            assert model.rewards[entries[0]] == pytest.approx(reward)
+
+
+def test_initial_state(model) -> None:
+    """Test that the initial state is the state after the reset."""
+    env = BreakoutNDiscrete(SMALL_CONFIG)
+    obs = env.reset()
+    assert model.observations[model.initial_state] == obs
+    groups, inverse = model.observation_groups()
+    assert obs in groups
+    assert groups[inverse[model.initial_state]] == obs
+
+
+def test_parallel_build(model) -> None:
+    """Test that the states expanded by several processes give the same model."""
+    parallel_model = build_transition_model(SMALL_CONFIG, num_workers=2, batch_size=16)
+    _assert_models_equal(model, parallel_model)
+
+
+def test_cache(tmp_path, model) -> None:
+    """Test that the models are cached by configuration, horizon excluded."""
+    cached = load_or_build_transition_model(SMALL_CONFIG, tmp_path, num_workers=1)
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    _assert_models_equal(model, cached)
+    other_horizon = dataclasses.replace(SMALL_CONFIG, horizon=10)
+    loaded = load_or_build_transition_model(other_horizon, tmp_path, num_workers=1)
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    _assert_models_equal(model, loaded)
+
+
+def test_to_csr(model) -> None:
+    """Test the conversion to SciPy sparse matrices."""
+    pytest.importorskip("scipy")
+    matrices = model.to_csr()
+    assert len(matrices) == model.nb_actions
+    for matrix in matrices:
+        assert matrix.shape == (model.nb_states, model.nb_states)
+        np.testing.assert_allclose(np.asarray(matrix.sum(axis=1)).ravel(), 1.0)
+
+
+def test_solvers_agree(model) -> None:
+    """Test that value iteration and policy iteration find the same values."""
+    values, greedy_policy = value_iteration(model, gamma=0.9, tolerance=1e-10)
+    pi_values, policy = policy_iteration(model, gamma=0.9, tolerance=1e-10)
+    np.testing.assert_allclose(values, pi_values, atol=1e-6)
+    assert values[model.terminal_state] == 0.0
+    # both policies are greedy with respect to the optimal values
+    future = np.bincount(
+        model.sources * model.nb_actions + model.actions,
+        weights=model.probabilities * values[model.targets],
+        minlength=model.nb_states * model.nb_actions,
+    ).reshape(model.nb_states, model.nb_actions)
+    q_values = model.expected_rewards() + 0.9 * future
+    states = np.arange(model.nb_states)
+    np.testing.assert_allclose(q_values[states, greedy_policy], values, atol=1e-6)
+    np.testing.assert_allclose(q_values[states, policy], values, atol=1e-6)
+
+
+def test_non_deterministic_config() -> None:
+    """Test that the random configurations are not supported."""
+    with pytest.raises(AssertionError):
+        build_transition_model(dataclasses.replace(SMALL_CONFIG, deterministic=False))
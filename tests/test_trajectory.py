@@ -0,0 +1,99 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the recording and the replay of trajectories."""
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.trajectory import (
+    NO_SEED,
+    TrajectoryRecorder,
+    TrajectoryReplayer,
+)
+from gym_breakout_pygame.utils import copy_observation
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNDiscrete
+from gym_breakout_pygame.wrappers.pixels import BreakoutPixels
+from tests.helpers import assert_observation_equal
+
+
+@pytest.mark.parametrize("breakout_env_cls", [BreakoutNDiscrete, BreakoutDictSpace])
+def test_replay_any_step(tmp_path, breakout_env_cls) -> None:
+    """Test that the replayer restores the state and observation of every step."""
+    config = BreakoutConfiguration(fire_enabled=True, deterministic=False)
+    env = TrajectoryRecorder(breakout_env_cls(config), tmp_path / "rec", chunk_size=50)
+    rng = np.random.default_rng(0)
+    seeds = [0, None, 2, None, 4, None]
+    episodes = []
+    actions = []
+    rewards = []
+    for seed in seeds:
+        obs = env.reset(seed=seed)
+        episode = [(env.unwrapped.get_state(), copy_observation(obs))]
+        done = False
+        while not done and len(episode) <= 150:
+            action = int(rng.integers(0, env.action_space.n))
+            obs, reward, done, _ = env.step(action)
+            episode.append((env.unwrapped.get_state(), copy_observation(obs)))
+            actions.append(action)
+            rewards.append(reward)
+        episodes.append(episode)
+    env.close()
+
+    replayer = TrajectoryReplayer(tmp_path / "rec")
+    assert replayer.env_cls is breakout_env_cls
+    assert replayer.config == config
+    assert replayer.nb_episodes == len(seeds)
+    assert len(replayer) == len(actions)
+    assert replayer.episode_seeds.tolist() == [
+        NO_SEED if seed is None else seed for seed in seeds
+    ]
+    assert replayer.column("action").tolist() == actions
+    assert replayer.column("reward").tolist() == rewards
+    for index, episode in enumerate(episodes):
+        assert replayer.episode_length(index) == len(episode) - 1
+        # visit the steps in random order
+        for step in rng.permutation(len(episode)):
+            snapshot, obs = episode[step]
+            assert replayer.get_snapshot(index, step).tobytes() == snapshot.tobytes()
+            assert_observation_equal(obs, replayer.get_observation(index, step))
+    with pytest.raises(IndexError):
+        replayer.get_snapshot(0, len(episodes[0]))
+
+
+def test_replay_stacked_frames(tmp_path) -> None:
+    """Test that the observations of stacked frames are not replayed at random."""
+    config = BreakoutConfiguration(deterministic=False)
+    env = TrajectoryRecorder(BreakoutPixels(config, frame_stack=4), tmp_path / "rec")
+    env.reset(seed=0)
+    for _ in range(5):
+        env.step(0)
+    snapshot = env.unwrapped.get_state()
+    env.close()
+
+    replayer = TrajectoryReplayer(tmp_path / "rec")
+    assert replayer.frame_stack == 4
+    assert replayer.get_snapshot(0, 5).tobytes() == snapshot.tobytes()
+    with pytest.raises(ValueError, match="stack 4 frames"):
+        replayer.get_observation(0, 5)
@@ -0,0 +1,126 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the encoding of the observations."""
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.utils import (
+    copy_observation,
+    decode,
+    decode_batch,
+    encode,
+    encode_batch,
+    map_shards,
+    stack_observations,
+    strides,
+)
+from gym_breakout_pygame.wrappers.normal_space import (
+    BreakoutNDiscrete,
+    BreakoutNMultiDiscrete,
+)
+
+
+@pytest.mark.parametrize("spaces", [[5], [7, 11, 3, 5, 13], [2**20] * 4])
+def test_batch_matches_scalar(spaces) -> None:
+    """Test that the batch functions agree with the scalar ones, also beyond int64."""
+    rng = np.random.default_rng(0)
+    obs = np.stack([rng.integers(0, size, 100) for size in spaces], axis=1)
+    codes = encode_batch(obs, spaces)
+    expected = [encode(list(map(int, row)), spaces) for row in obs]
+    assert codes.shape == (100,)
+    assert list(codes) == expected
+    decoded = decode_batch(codes, spaces)
+    assert decoded.shape == obs.shape
+    assert (decoded == obs).all()
+    assert [decode(int(code), spaces) for code in codes] == obs.tolist()
+    assert encode_batch(obs[0], spaces) == expected[0]
+
+
+def test_overflow_fallback() -> None:
+    """Test that the strides are Python integers when the codes overflow int64."""
+    assert strides((2**31, 2**32)).dtype == np.int64
+    assert strides((2**32, 2**32)).dtype == object
+    assert not strides((2, 3)).flags.writeable
+
+
+def test_discrete_observation() -> None:
+    """Test that the discrete observation encodes the multi-discrete one."""
+    env = BreakoutNDiscrete()
+    env.reset(seed=0)
+    for _ in range(100):
+        obs, _, done, _ = env.step(env.action_space.sample())
+        features = BreakoutNMultiDiscrete.observe_multidiscrete(env.state)
+        assert obs == encode(list(map(int, features)), list(env.dims))
+        assert env.observation_space.contains(obs)
+        if done:
+            env.reset()
+
+
+def test_stack_observations() -> None:
+    """Test the batching of integer, array and dictionary observations."""
+    assert stack_observations([1, 2]).tolist() == [1, 2]
+    stacked = stack_observations([np.arange(3), np.arange(3, 6)])
+    assert stacked.shape == (2, 3)
+    stacked = stack_observations([{"a": 1, "b": np.zeros(2)}] * 3)
+    assert stacked["a"].shape == (3,) and stacked["b"].shape == (3, 2)
+
+
+def test_copy_observation() -> None:
+    """Test that the copy of an observation does not share its buffers."""
+    buffer = np.arange(3)
+    copy = copy_observation({"a": 1, "b": buffer})
+    buffer[0] = 10
+    assert copy["b"].tolist() == [0, 1, 2]
+    assert copy_observation(buffer) is not buffer
+
+
+_OFFSET = [0]
+
+
+def _set_offset(offset: int) -> None:
+    """Set the offset added by '_add_offset', in the current process."""
+    _OFFSET[0] = offset
+
+
+def _add_offset(items):
+    """Add the offset to each item of a shard."""
+    return [item + _OFFSET[0] for item in items]
+
+
+@pytest.mark.parametrize("num_workers,shards_per_worker", [(1, 1), (1, 3), (2, 3)])
+def test_map_shards(num_workers, shards_per_worker) -> None:
+    """Test that the shards are contiguous, initialized, and in the order of the items."""
+    results = map_shards(
+        _add_offset,
+        range(10, 21),
+        num_workers,
+        shards_per_worker,
+        initializer=_set_offset,
+        initargs=(100,),
+    )
+    assert len(results) == (num_workers * shards_per_worker if num_workers > 1 else 1)
+    assert [item for shard in results for item in shard] == list(range(110, 121))
+    assert map_shards(
+        _add_offset, [5], num_workers=4, initializer=_set_offset, initargs=(0,)
+    ) == [[5]]
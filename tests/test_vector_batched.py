@@ -0,0 +1,88 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the batched Breakout simulator."""
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.vector.batched import BreakoutVecEnv
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import (
+    BreakoutNDiscrete,
+    BreakoutNMultiDiscrete,
+)
+from tests.helpers import assert_observation_equal, get_single
+
+
+@pytest.mark.parametrize(
+    "breakout_env_cls,observation_type",
+    [
+        (BreakoutNMultiDiscrete, "multidiscrete"),
+        (BreakoutNDiscrete, "discrete"),
+        (BreakoutDictSpace, "dict"),
+    ],
+)
+@pytest.mark.parametrize(
+    "config",
+    [
+        BreakoutConfiguration(fire_enabled=True),
+        BreakoutConfiguration(fire_enabled=True, complex_bump=True),
+        BreakoutConfiguration(brick_cols=6, brick_rows=4, fire_enabled=True),
+        BreakoutConfiguration(ball_enabled=False, fire_enabled=True, horizon=30),
+    ],
+)
+def test_same_dynamics_as_single_env(
+    breakout_env_cls, observation_type, config
+) -> None:
+    """Test that the batched simulator reproduces the single-game environments."""
+    num_envs = 4
+    vec_env = BreakoutVecEnv(num_envs, config, observation_type=observation_type)
+    envs = [breakout_env_cls(config) for _ in range(num_envs)]
+    rng = np.random.default_rng(42)
+
+    observations = vec_env.reset()
+    for index, env in enumerate(envs):
+        assert_observation_equal(env.reset(), get_single(observations, index))
+
+    for _ in range(300):
+        actions = rng.integers(0, vec_env.action_space.n, size=num_envs)
+        observations, rewards, dones, infos = vec_env.step(actions)
+        for index, env in enumerate(envs):
+            obs, reward, done, _ = env.step(int(actions[index]))
+            assert reward == rewards[index]
+            assert done == dones[index]
+            if done:
+                assert_observation_equal(obs, infos[index]["terminal_observation"])
+                obs = env.reset()
+            assert_observation_equal(obs, get_single(observations, index))
+
+
+def test_observation_space_contains_observations() -> None:
+    """Test that the observations belong to the declared observation space."""
+    vec_env = BreakoutVecEnv(3, observation_type="multidiscrete", seed=0)
+    observations = vec_env.reset()
+    for _ in range(50):
+        observations, _, _, _ = vec_env.step(np.zeros(3, dtype=np.int64))
+        for obs in observations:
+            assert vec_env.observation_space.contains(obs)
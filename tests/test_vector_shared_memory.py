@@ -0,0 +1,112 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the vectorized environment based on worker processes."""
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.vector.shared_memory import SharedMemoryVecEnv
+from gym_breakout_pygame.wrappers.dict_space import BreakoutDictSpace
+from gym_breakout_pygame.wrappers.normal_space import (
+    BreakoutNDiscrete,
+    BreakoutNMultiDiscrete,
+)
+from tests.helpers import assert_observation_equal, get_single
+
+
+class _FailingInWorker(BreakoutNDiscrete):
+    """An environment that cannot be built in a worker process."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Fail in a child process."""
+        if multiprocessing.parent_process() is not None:
+            raise ValueError("Cannot be built in a worker.")
+        super().__init__(*args, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "breakout_env_cls",
+    [BreakoutNDiscrete, BreakoutNMultiDiscrete, BreakoutDictSpace],
+)
+def test_same_results_as_sequential_envs(breakout_env_cls) -> None:
+    """Test that the workers produce the same results of sequential environments."""
+    num_envs = 5
+    config = BreakoutConfiguration(fire_enabled=True)
+    vec_env = SharedMemoryVecEnv(breakout_env_cls, num_envs, config, num_workers=2)
+    envs = [breakout_env_cls(config) for _ in range(num_envs)]
+    rng = np.random.default_rng(0)
+    try:
+        observations = vec_env.reset(seed=0)
+        for index, env in enumerate(envs):
+            expected = env.reset(seed=index)
+            assert_observation_equal(expected, get_single(observations, index))
+
+        for _ in range(200):
+            actions = rng.integers(0, vec_env.action_space.n, size=num_envs)
+            vec_env.step_async(actions)
+            observations, rewards, dones, infos = vec_env.step_wait()
+            for index, env in enumerate(envs):
+                obs, reward, done, _ = env.step(int(actions[index]))
+                assert reward == rewards[index]
+                assert done == dones[index]
+                if done:
+                    terminal_obs = infos[index]["terminal_observation"]
+                    assert_observation_equal(obs, terminal_obs)
+                    obs = env.reset()
+                assert_observation_equal(obs, get_single(observations, index))
+    finally:
+        vec_env.close()
+    assert vec_env.closed
+
+
+def test_worker_error_is_raised() -> None:
+    """Test that an error in a worker process is raised in the main process."""
+    vec_env = SharedMemoryVecEnv(BreakoutNDiscrete, 2, num_workers=1)
+    try:
+        vec_env.reset()
+        with pytest.raises(RuntimeError, match="Error in worker process"):
+            vec_env.step([0, 10])
+        with pytest.raises(RuntimeError, match="A worker process failed"):
+            vec_env.step([0, 0])
+        with pytest.raises(RuntimeError, match="A worker process failed"):
+            vec_env.reset()
+    finally:
+        vec_env.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        vec_env.reset()
+
+
+def test_worker_construction_error_is_raised() -> None:
+    """Test that an error building the environments of a worker is raised."""
+    vec_env = SharedMemoryVecEnv(_FailingInWorker, 2, num_workers=2)
+    try:
+        with pytest.raises(RuntimeError, match="Cannot be built in a worker"):
+            vec_env.reset()
+        with pytest.raises(RuntimeError, match="A worker process failed"):
+            vec_env.step_async([0, 0])
+    finally:
+        vec_env.close()
+    assert vec_env.closed
@@ -0,0 +1,124 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the Pygame viewer."""
+import numpy as np
+import pygame
+import pytest
+
+from gym_breakout_pygame.breakout_env import BreakoutConfiguration
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNMultiDiscrete
+
+
+def _redraw(viewer) -> np.ndarray:
+    """Draw the whole frame from scratch, as the viewer used to do."""
+    screen = pygame.Surface(viewer.screen.get_size())
+    screen.fill((255, 255, 255))
+    state = viewer.state
+    font = viewer.myfont
+    screen.blit(font.render(str(state.score), 100, (0, 0, 0)), (50, 10))
+    screen.blit(
+        font.render(str(state.last_command), 100, (165, 42, 42)),
+        (20, 10),
+    )
+    for drawable in [state.brick_grid, state.paddle, state.ball, state.bullet]:
+        drawable.draw_on_screen(screen)
+    return pygame.surfarray.array3d(screen)
+
+
+@pytest.mark.usefixtures("_patch_pygame_videodriver")
+def test_dirty_rects(monkeypatch) -> None:
+    """Test that the updated areas give the same frames of a full redraw."""
+    config = BreakoutConfiguration(brick_cols=5, brick_rows=4, fire_enabled=True)
+    env = BreakoutNMultiDiscrete(config)
+    env.reset(seed=0)
+    env.render()
+    viewer = env.viewer
+    updates = []
+    monkeypatch.setattr(
+        pygame.display, "update", lambda rects=None: updates.append(rects)
+    )
+    # the display is a copy of the screen, updated only in the given areas
+    display = pygame.surfarray.array3d(viewer.screen)
+    env.action_space.seed(0)
+    nb_bricks = len(env.state.brick_grid.bricks)
+    min_bricks = nb_bricks
+    for _ in range(300):
+        _, _, done, _ = env.step(env.action_space.sample())
+        min_bricks = min(min_bricks, len(env.state.brick_grid.bricks))
+        if done:
+            env.reset()
+        env.render()
+        screen = pygame.surfarray.array3d(viewer.screen)
+        rects = updates[-1]
+        if rects is None:
+            display = screen
+        else:
+            for rect in rects:
+                display[rect.left : rect.right, rect.top : rect.bottom] = screen[
+                    rect.left : rect.right, rect.top : rect.bottom
+                ]
+            assert sum(rect.width * rect.height for rect in rects) < screen.size // 6
+        assert (display == _redraw(viewer)).all()
+    # some bricks were erased from the background
+    assert min_bricks < nb_bricks
+    env.close()
+
+
+class _CountingFont:  # pylint: disable=too-few-public-methods
+    """A font that records the rendered texts."""
+
+    def __init__(self, font) -> None:
+        """Wrap a font."""
+        self.font = font
+        self.texts = []
+
+    def render(self, text, *args):
+        """Render a text with the wrapped font."""
+        self.texts.append(text)
+        return self.font.render(text, *args)
+
+
+@pytest.mark.usefixtures("_patch_pygame_videodriver")
+@pytest.mark.parametrize("label_cache_size", [0, 2])
+def test_label_cache(label_cache_size) -> None:
+    """Test that the labels are rendered by the font only when needed."""
+    # pylint: disable-next=import-outside-toplevel
+    from gym_breakout_pygame.viewer import PygameViewer
+
+    env = BreakoutNMultiDiscrete(BreakoutConfiguration(step_reward=0.0))
+    env.reset(seed=0)
+    viewer = PygameViewer(env.state, label_cache_size=label_cache_size)
+    env.viewer = viewer
+    viewer.myfont = _CountingFont(viewer.myfont)
+    actions = [0, 0, 1, 1, 2, 0]
+    for action in actions:
+        env.step(action)
+        env.render()
+    if label_cache_size == 0:
+        assert len(viewer.myfont.texts) == 2 * len(actions)
+    else:
+        # the score did not change, and the commands were rendered again only
+        # after being evicted from the cache
+        assert viewer.myfont.texts == ["0.0", "_", "<", ">", "_"]
+    env.close()
@@ -0,0 +1,131 @@
+# MIT License
+#
+# Copyright (c) 2019-2022 Marco Favorito, Luca Iocchi
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""Tests for the state hashes and the visitation counts."""
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from gym_breakout_pygame.breakout_env import (
+    BreakoutConfiguration,
+    BreakoutState,
+    Command,
+)
+from gym_breakout_pygame.visitation import (
+    VISIT_COUNT_KEY,
+    CountMinSketch,
+    LRUVisitCounts,
+    VisitationCounter,
+)
+from gym_breakout_pygame.wrappers.normal_space import BreakoutNMultiDiscrete
+
+CONFIG = BreakoutConfiguration(brick_cols=6, brick_rows=4, fire_enabled=True)
+
+
+def test_state_hash() -> None:
+    """Test that the hash follows the game state, and ignores the bookkeeping."""
+    state = BreakoutState(CONFIG)
+    assert state.state_hash() == BreakoutState(CONFIG).state_hash()
+    assert 0 <= state.state_hash() < 2**64
+    rng = np.random.default_rng(0)
+    hashes = set()
+    nb_steps = 0
+    for _ in range(300):
+        state.step(Command(int(rng.integers(0, len(Command)))))
+        nb_steps += 1
+        clone = state.clone()
+        assert clone.state_hash() == state.state_hash()
+        clone.score += 1
+        clone.last_command = Command.NOP
+        clone.set_seed(1)
+        assert clone.state_hash() == state.state_hash()
+        hashes.add(state.state_hash())
+        if state.is_finished():
+            break
+    # the ball moves at every step
+    assert len(hashes) == nb_steps
+
+
+def test_incremental_brick_hash() -> None:
+    """Test that the hash of the bricks is updated when a brick is removed."""
+    state = BreakoutState(CONFIG)
+    brick_grid = state.brick_grid
+    full_hash = brick_grid.zobrist_hash
+    previous = state.state_hash()
+    brick_grid.remove_brick_at_position((2, 3))
+    assert state.state_hash() != previous
+    removed_hash = brick_grid.zobrist_hash
+    brick_grid.set_bricks(brick_grid.bricksgrid.copy())
+    assert brick_grid.zobrist_hash == removed_hash
+    brick_grid.set_bricks(np.ones((6, 4)))
+    assert brick_grid.zobrist_hash == full_hash
+
+
+def test_lru_counts() -> None:
+    """Test that the least recently visited keys are evicted."""
+    counts = LRUVisitCounts(capacity=2)
+    assert counts.increment(1) == 1
+    assert counts.increment(2) == 1
+    assert counts.increment(1) == 2
+    assert counts.increment(3) == 1
+    assert len(counts) == 2
+    assert counts.count(2) == 0
+    assert counts.count(1) == 2
+
+
+@pytest.mark.parametrize("width,depth", [(1 << 12, 4), (64, 2)])
+def test_count_min_sketch(width, depth) -> None:
+    """Test that the sketch never underestimates the counts."""
+    rng = np.random.default_rng(0)
+    keys = [int(key) for key in rng.integers(0, 2**63, size=200, dtype=np.int64)]
+    sketch = CountMinSketch(width=width, depth=depth)
+    exact: Counter = Counter()
+    for key in rng.choice(keys, size=5000):
+        exact[int(key)] += 1
+        assert sketch.increment(int(key)) >= exact[int(key)]
+    errors = [sketch.count(key) - exact[key] for key in keys]
+    assert min(errors) >= 0
+    if width > len(keys):
+        assert np.mean(errors) < 1
+    assert sketch.nbytes == width * depth * 4
+
+
+@pytest.mark.parametrize("counts", [LRUVisitCounts(1000), CountMinSketch()])
+def test_visitation_counter(counts) -> None:
+    """Test that the wrapper counts the visited states."""
+    env = VisitationCounter(BreakoutNMultiDiscrete(CONFIG), counts)
+    env.reset(seed=0)
+    assert env.last_count == 1
+    env.reset(seed=0)
+    assert env.last_count == 2
+    exact: Counter = Counter({env.unwrapped.state.state_hash(): 2})
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        _, _, done, info = env.step(int(rng.integers(0, env.action_space.n)))
+        key = env.unwrapped.state.state_hash()
+        exact[key] += 1
+        assert info[VISIT_COUNT_KEY] == exact[key] == counts.count(key)
+        if done:
+            env.reset()
+            exact[env.unwrapped.state.state_hash()] += 1